@@ -0,0 +1,81 @@
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+import io
+import os
+import sys
+import threading
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vizard_clone.app import analysis, config, ffmpeg_utils
+from vizard_clone.app.scene_score import AUDIO_RATE
+
+PX = config.ANALYSIS_W * config.ANALYSIS_H
+
+
+def _video(levels):
+    return io.BytesIO(b"".join(bytes([v]) * PX for v in levels))
+
+
+def _fake_pipe(video, pcm, seen):
+    @contextmanager
+    def fake_pipe(cmd, tag=None, pass_fds=()):
+        seen.append((cmd, pass_fds))
+        writer = None
+        if pass_fds:
+            if pcm is None:
+                raise ffmpeg_utils.FFMpegError("Stream map '0:a:0' matches no streams")
+            fd = os.dup(pass_fds[0])  # the caller closes its copy once we yield
+
+            def write():
+                with os.fdopen(fd, "wb") as out:
+                    out.write(pcm)
+
+            writer = threading.Thread(target=write)
+            writer.start()
+        yield SimpleNamespace(stdout=video)
+        if writer is not None:
+            writer.join()
+
+    return fake_pipe
+
+
+def test_single_decode_aligns_motion_speech_and_scenes(monkeypatch):
+    # 2 fps: still for 2s, a hard cut, then still again
+    video = _video([0, 0, 0, 0, 200, 200, 200, 200])
+    loud = (0.5 * 32767 * np.ones(AUDIO_RATE)).astype("<i2").tobytes()
+    quiet = np.zeros(AUDIO_RATE, dtype="<i2").tobytes()
+    seen = []
+    monkeypatch.setattr(ffmpeg_utils, "find_ffmpeg", lambda: "ffmpeg")
+    monkeypatch.setattr(ffmpeg_utils, "open_pipe", _fake_pipe(video, loud + quiet + loud, seen))
+    monkeypatch.setattr(analysis, "probe", lambda path: SimpleNamespace(has_audio=True))
+
+    result = analysis.analyze_source("in.mp4", rate=2, threshold=100.0)
+
+    ((cmd, pass_fds),) = seen  # one ffmpeg process for video and audio
+    assert cmd.count("-i") == 1 and f"pipe:{pass_fds[0]}" in cmd
+    assert result.duration == 4
+    assert np.allclose(result.motion, [0.0, 0.0, 200 / 255 / 2, 0.0])
+    assert np.allclose(result.speech[:3], [0.5, 0.0, 0.5], atol=1e-3)
+    assert result.speech[3] == 0.0  # audio shorter than video: padded
+    assert result.scenes == [(0.0, 2.0), (2.0, 4.0)]
+
+
+def test_sources_without_audio_fall_back_to_video_only(monkeypatch):
+    seen = []
+    monkeypatch.setattr(ffmpeg_utils, "find_ffmpeg", lambda: "ffmpeg")
+    monkeypatch.setattr(ffmpeg_utils, "open_pipe", _fake_pipe(_video([0, 50, 50, 50]), None, seen))
+
+    def no_ffprobe(path):
+        raise RuntimeError("ffprobe executable not found")
+
+    monkeypatch.setattr(analysis, "probe", no_ffprobe)
+    result = analysis.analyze_source("in.mp4", rate=2, end_s=3.0)
+
+    assert [bool(fds) for _, fds in seen] == [True, False]  # retried video-only
+    assert "0:a:0" not in seen[1][0]
+    assert result.duration == 3 and len(result.motion) == len(result.speech) == 3
+    assert np.allclose(result.motion, [50 / 255, 0.0, 0.0])
+    assert not result.speech.any()
@@ -0,0 +1,93 @@
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vizard_clone.app import asr
+from vizard_clone.app.cache import DiskCache
+from vizard_clone.app.subs import SubtitleSegment
+
+
+class CountingEngine:
+    loads = 0
+    calls = 0
+
+    def __init__(self, model):
+        CountingEngine.loads += 1
+
+    def transcribe(self, path, language):
+        CountingEngine.calls += 1
+        segs = [SubtitleSegment(t, t + 2.0, f"s{t:g}") for t in range(0, 20, 2)]
+        return "de", segs
+
+
+@pytest.fixture(autouse=True)
+def _reset_counters(monkeypatch):
+    monkeypatch.setattr(CountingEngine, "loads", 0)
+    monkeypatch.setattr(CountingEngine, "calls", 0)
+
+
+def test_source_is_transcribed_once_and_sliced(tmp_path: Path, monkeypatch):
+    monkeypatch.setitem(asr.ENGINES, "counting", CountingEngine)
+    src = tmp_path / "a.mp4"
+    src.write_bytes(b"video")
+    cache = DiskCache("transcripts", root=tmp_path)
+
+    svc = asr.TranscriptionService("counting", cache=cache)
+    lang, segs = svc.segments(src, 3.0, 4.0, "small")
+    assert lang == "de"
+    assert [(s.start, s.end, s.text) for s in segs] == [
+        (3.0, 4.0, "s2"),
+        (4.0, 6.0, "s4"),
+        (6.0, 7.0, "s6"),
+    ]
+    svc.segments(src, 5.0, 10.0, "small")  # overlapping window: no new inference
+    assert (CountingEngine.loads, CountingEngine.calls) == (1, 1)
+
+    fresh = asr.TranscriptionService("counting", cache=cache)  # new process, same cache
+    assert fresh.segments(src, 18.0, 5.0, "small")[1][0].text == "s18"
+    assert CountingEngine.calls == 1
+
+
+def test_unknown_engine_falls_back_to_stub(tmp_path: Path):
+    svc = asr.TranscriptionService("missing", cache=DiskCache("transcripts", root=tmp_path))
+    assert isinstance(svc._model("small"), asr.StubEngine)
+    assert svc.engine == "stub"
+
+
+class MissingEngine(CountingEngine):
+    @staticmethod
+    def available():
+        return False
+
+
+def test_stub_fallback_is_cached_under_the_stub_engine(tmp_path: Path, monkeypatch):
+    src = tmp_path / "a.mp4"
+    src.write_bytes(b"video")
+    cache = DiskCache("transcripts", root=tmp_path)
+
+    monkeypatch.setitem(asr.ENGINES, "real", MissingEngine)
+    offline = asr.TranscriptionService("real", cache=cache)
+    assert offline.transcript(src, "small").segments == []  # stub: duration unknown
+    assert offline.engine == "stub"
+
+    monkeypatch.setitem(asr.ENGINES, "real", CountingEngine)
+    online = asr.TranscriptionService("real", cache=cache)
+    assert online.transcript(src, "small").language == "de"
+    assert CountingEngine.calls == 1
+
+
+def test_model_load_failure_falls_back_before_caching(tmp_path: Path, monkeypatch):
+    def broken(model):
+        raise RuntimeError("weights missing")
+
+    monkeypatch.setitem(asr.ENGINES, "broken", broken)
+    src = tmp_path / "a.mp4"
+    src.write_bytes(b"video")
+    svc = asr.TranscriptionService("broken", cache=DiskCache("transcripts", root=tmp_path))
+    svc.transcript(src, "small")
+    assert svc.engine == "stub"
+    stub_key = asr.make_key(asr.file_fingerprint(src), "stub", "small", "auto")
+    broken_key = asr.make_key(asr.file_fingerprint(src), "broken", "small", "auto")
+    assert svc.cache.get(stub_key) is not None and svc.cache.get(broken_key) is None
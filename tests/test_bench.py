@@ -0,0 +1,40 @@
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vizard_clone.app import bench, ffmpeg_utils
+from vizard_clone.app.bench import BenchResult, format_results
+from vizard_clone.app.ffmpeg_utils import RunStats
+
+
+def test_format_results_table():
+    results = [
+        BenchResult("throughput", 300, 2.0, 5.5, 2048),
+        BenchResult("quality", 300, 0.0, None, 512),
+    ]
+    header, fast, slow = format_results(results).splitlines()
+    assert header.split() == ["profile", "fps", "wall", "s", "cpu", "s", "size", "KiB"]
+    assert fast.split() == ["throughput", "150.0", "2.00", "5.50", "2.0"]
+    assert slow.split() == ["quality", "0.0", "0.00", "n/a", "0.5"]
+    assert len(header) == len(fast) == len(slow)
+
+
+def test_bench_encode_reads_per_process_stats(monkeypatch):
+    cmds = []
+
+    def fake_run_tool(cmd, tag=None, cwd=None, capture=False):
+        cmds.append((cmd, tag))
+        Path(cmd[-1]).write_bytes(b"x" * 4096)
+        ffmpeg_utils._REPORT.get().add(RunStats(tag, "ffmpeg", 1.5, 4.25, None, 0))
+        return b""
+
+    monkeypatch.setattr(bench, "find_ffmpeg", lambda: "ffmpeg")
+    monkeypatch.setattr(bench, "run_tool", fake_run_tool)
+    results = bench.bench_encode(["throughput", "quality"], duration=2.0, fps=30)
+
+    assert [tag for _, tag in cmds] == ["bench", "bench"]
+    assert [cmd[cmd.index("-preset") + 1] for cmd, _ in cmds] == ["ultrafast", "slow"]
+    assert [r.profile for r in results] == ["throughput", "quality"]
+    fast = results[0]
+    assert (fast.frames, fast.wall_s, fast.cpu_s, fast.size_bytes) == (60, 1.5, 4.25, 4096)
+    assert fast.fps == 40.0
@@ -0,0 +1,77 @@
+from pathlib import Path
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vizard_clone.app import analysis
+from vizard_clone.app import cache as cache_mod
+from vizard_clone.app.cache import DiskCache, file_fingerprint
+
+
+def test_fingerprint_tracks_content(tmp_path: Path):
+    src = tmp_path / "a.bin"
+    src.write_bytes(b"x" * 5000)
+    first = file_fingerprint(src, block=1024)
+    assert first == file_fingerprint(src, block=1024)
+    src.write_bytes(b"x" * 4999 + b"y")
+    assert file_fingerprint(src, block=1024) != first
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path: Path):
+    cache = DiskCache("t", root=tmp_path, max_bytes=250)
+    for i, key in enumerate(("a", "b", "c")):
+        with cache.put(key) as d:
+            (d / "data").write_bytes(b"0" * 100)
+        stamp = cache.path(key) / ".stamp"
+        os.utime(stamp, (1000 + i, 1000 + i))
+        if key == "b":
+            assert cache.get("a") is not None  # refresh "a"
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_disk_cache_put_keeps_entry_of_concurrent_writer(tmp_path: Path, monkeypatch):
+    cache = DiskCache("t", root=tmp_path)
+    real_rmtree = cache_mod.shutil.rmtree
+
+    def rmtree(path, ignore_errors=False):
+        # the rival re-publishes "k" right after our rmtree clears it
+        if Path(path) != cache.path("k"):
+            real_rmtree(path, ignore_errors=ignore_errors)
+
+    with cache.put("k") as d:
+        (d / "data").write_text("mine")
+        with cache.put("k") as other:
+            (other / "data").write_text("theirs")
+        monkeypatch.setattr(cache_mod.shutil, "rmtree", rmtree)
+    monkeypatch.undo()
+
+    entry = cache.get("k")
+    assert entry is not None and (entry / "data").read_text() == "theirs"
+    assert [p.name for p in cache.root.iterdir()] == ["k"]  # our tmp is gone
+
+
+def test_analyze_cached_reuses_profiles(tmp_path: Path, monkeypatch):
+    src = tmp_path / "video.mp4"
+    src.write_bytes(b"fake video")
+    calls = []
+
+    def fake_analyze(path, start_s, end_s, rate, threshold):
+        calls.append(path)
+        return analysis.AnalysisResult(
+            duration=3,
+            motion=np.array([0.1, 0.2, 0.3], dtype=np.float32),
+            speech=np.array([0.0, 0.5, 0.0], dtype=np.float32),
+            scenes=[(0.0, 1.5), (1.5, 3.0)],
+        )
+
+    monkeypatch.setattr(analysis, "analyze_source", fake_analyze)
+    cache = DiskCache("analysis", root=tmp_path)
+    first = analysis.analyze_cached(src, cache=cache)
+    second = analysis.analyze_cached(src, cache=cache)
+    assert len(calls) == 1
+    assert second.duration == 3
+    assert np.allclose(second.motion, first.motion)
+    assert second.scenes == [(0.0, 1.5), (1.5, 3.0)]
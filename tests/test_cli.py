@@ -0,0 +1,29 @@
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vizard_clone import cli
+from vizard_clone.app import ffmpeg_utils, pipeline
+
+
+def test_process_batch_reports_failures_without_aborting(tmp_path: Path, monkeypatch, capsys):
+    seen = []
+
+    def fake_process(video, out_dir, tmp_dir, name):
+        seen.append((video, Path(tmp_dir), Path(out_dir) / f"{name}_00.mp4"))
+        if video == "bad.mp4":
+            raise RuntimeError("boom")
+        return [Path(out_dir) / f"{name}_00.mp4"]
+
+    monkeypatch.setattr(pipeline, "process_video", fake_process)
+    videos = ["a.mp4", "bad.mp4", "other/a.mp4"]
+    rc = cli.main(["process", *videos, "--out-dir", str(tmp_path), "--jobs", "3"])
+    ffmpeg_utils.set_max_processes(None)
+
+    assert rc == 1
+    assert sorted(v for v, _, _ in seen) == sorted(videos)
+    assert len({t for _, t, _ in seen}) == len(videos)  # per-job tmp dirs
+    outputs = {v: out.name for v, _, out in seen}
+    assert len(set(outputs.values())) == len(videos)  # and per-job outputs
+    assert outputs["bad.mp4"] == "bad_00.mp4"
+    assert "bad.mp4: failed: boom" in capsys.readouterr().err
@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import sys
+import time
+import wave
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vizard_clone.app import dub
+from vizard_clone.app.asr import Transcript
+from vizard_clone.app.subs import SubtitleSegment
+
+
+class CountingTranslator:
+    name = "counting"
+    batches = []
+
+    def translate_batch(self, texts, source, target):
+        CountingTranslator.batches.append(list(texts))
+        return [t.upper() for t in texts]
+
+
+@pytest.fixture(autouse=True)
+def _reset_counters(monkeypatch):
+    monkeypatch.setattr(CountingTranslator, "batches", [])
+    monkeypatch.setattr(SlowTTS, "calls", [])
+
+
+def test_translation_is_batched_and_speech_cached(tmp_path: Path, monkeypatch):
+    monkeypatch.setitem(dub.TRANSLATORS, "counting", CountingTranslator)
+    transcript = Transcript(
+        "en", [SubtitleSegment(0, 1, "hi"), SubtitleSegment(1, 2, "there"), SubtitleSegment(2, 3, "hi")]
+    )
+    dubber = dub.Dubber("counting", "stub", root=tmp_path)
+    out = dubber.translated(transcript, "ru")
+    assert [s.text for s in out.segments] == ["HI", "THERE", "HI"]
+    dubber.translated(transcript, "ru")
+    assert dub.Dubber("counting", "stub", root=tmp_path).translated(transcript, "ru") == out
+    assert CountingTranslator.batches == [["hi", "there"]]
+
+    # A new transcript of the same source (other ASR engine or model) is
+    # translated again instead of being served the old translation
+    retranscribed = Transcript("en", [SubtitleSegment(0, 1.5, "hello"), SubtitleSegment(1.5, 3, "there")])
+    assert [s.text for s in dubber.translated(retranscribed, "ru").segments] == ["HELLO", "THERE"]
+    assert CountingTranslator.batches == [["hi", "there"], ["hello", "there"]]
+
+    first = dubber.speech("HI", "voice")
+    with wave.open(str(first)) as wav:
+        assert wav.getnframes() == dub.STUB_RATE * 0.3
+    assert dubber.speech("HI", "voice") == first
+    assert dubber.speech("HI", "other") != first
+
+
+class SlowTTS(dub.StubTTS):
+    calls = []
+
+    def synthesize(self, text, voice, out):
+        SlowTTS.calls.append(text)
+        time.sleep(0.05)  # widen the window for a duplicate synthesis
+        super().synthesize(text, voice, out)
+
+
+def test_concurrent_speech_is_synthesized_once(tmp_path: Path, monkeypatch):
+    monkeypatch.setitem(dub.TTS_ENGINES, "slow", SlowTTS)
+    dubber = dub.Dubber("stub", "slow", root=tmp_path)
+    with ThreadPoolExecutor(8) as pool:
+        paths = list(pool.map(lambda _: dubber.speech("HELLO", "voice"), range(8)))
+    assert len(set(paths)) == 1 and paths[0].exists()
+    assert SlowTTS.calls == ["HELLO"]
+
+
+def test_track_is_assembled_in_one_call(tmp_path: Path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(dub, "find_ffmpeg", lambda: "ffmpeg")
+    monkeypatch.setattr(dub, "_run", lambda cmd, tag=None: calls.append(cmd))
+    dub.assemble_track([(0.5, tmp_path / "a.wav"), (2.0, tmp_path / "b.wav")], 10.0, tmp_path / "dub.wav")
+    assert len(calls) == 1
+    graph = calls[0][calls[0].index("-filter_complex") + 1]
+    assert "adelay=delays=500:all=1[d0]" in graph and "adelay=delays=2000:all=1[d1]" in graph
+    assert "[d0][d1]amix=inputs=2" in graph and "atrim=0:10.0" in graph
@@ -1,11 +1,23 @@
 import subprocess
 from pathlib import Path
 import sys
+import threading
 
 import pytest
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
-from vizard_clone.app.ffmpeg_utils import find_ffmpeg, mux_video_with_audio
+from vizard_clone.app import config, ffmpeg_utils
+from vizard_clone.app.ffmpeg_utils import (
+    STDERR_TAIL_LINES,
+    FFMpegError,
+    collect_runs,
+    find_ffmpeg,
+    mux_video_with_audio,
+    open_pipe,
+    pngs_to_mp4,
+    run_tool,
+    x264_args,
+)
 
 
 def _sample_inputs(tmp_path: Path):
@@ -60,3 +72,98 @@ def test_mux_with_missing_audio(tmp_path: Path):
     out = tmp_path / "out_silence.mp4"
     mux_video_with_audio(video, tmp_path / "missing.m4a", 0, 1, out)
     assert out.exists() and out.stat().st_size > 0
+
+
+@pytest.mark.parametrize(
+    "codec, expected",
+    [
+        ("aac", [("source", "copy")]),
+        ("opus", [("source", "aac")]),
+        (None, [("source", "aac")]),
+        ("", [("anullsrc", "aac")]),
+    ],
+)
+def test_mux_strategy_follows_probed_codec(monkeypatch, codec, expected):
+    cmds = []
+    monkeypatch.setattr(ffmpeg_utils, "find_ffmpeg", lambda: "ffmpeg")
+    monkeypatch.setattr(ffmpeg_utils, "audio_codec", lambda source: codec)
+    monkeypatch.setattr(ffmpeg_utils, "_run", lambda cmd, cwd=None, tag=None: cmds.append(cmd))
+    mux_video_with_audio("video.mp4", "source.mkv", 3, 2, "out.mp4")
+    issued = [
+        ("anullsrc" if "lavfi" in cmd else "source", cmd[cmd.index("-c:a") + 1]) for cmd in cmds
+    ]
+    assert issued == expected
+
+
+def test_mux_falls_back_to_silence(monkeypatch):
+    cmds = []
+
+    def fake_run(cmd, cwd=None, tag=None):
+        cmds.append(cmd)
+        if "lavfi" not in cmd:
+            raise FFMpegError("broken audio")
+
+    monkeypatch.setattr(ffmpeg_utils, "find_ffmpeg", lambda: "ffmpeg")
+    monkeypatch.setattr(ffmpeg_utils, "audio_codec", lambda source: "aac")
+    monkeypatch.setattr(ffmpeg_utils, "_run", fake_run)
+    mux_video_with_audio("video.mp4", "source.mkv", 3, 2, "out.mp4")
+    assert [cmd[cmd.index("-c:a") + 1] for cmd in cmds] == ["copy", "aac", "aac"]
+    assert "lavfi" in cmds[-1]
+
+
+def test_run_tool_records_stats_and_bounds_stderr():
+    noisy = "import sys\nfor i in range(5000): print('line', i, file=sys.stderr)\nsys.exit(3)"
+    with collect_runs() as report:
+        run_tool([sys.executable, "-c", "print('ok')"], tag="probe", capture=True)
+        with pytest.raises(FFMpegError) as exc:
+            run_tool([sys.executable, "-c", noisy], tag="encode")
+    ok, failed = report.runs
+    assert (ok.tag, ok.returncode) == ("probe", 0)
+    assert ok.wall_s >= 0 and ok.cpu_s is not None
+    assert failed.returncode == 3
+    tail = str(exc.value).splitlines()
+    assert len(tail) == STDERR_TAIL_LINES and tail[-1] == "line 4999"
+    assert report.summary()["encode"]["failed"] == 1
+
+
+def test_x264_args_follow_the_profile(monkeypatch):
+    assert x264_args("throughput") == [
+        "-c:v", "libx264", "-preset", "ultrafast", "-crf", "23", "-tune", "fastdecode", "-threads", "0"
+    ]
+    assert "-tune" not in x264_args("balanced")
+    monkeypatch.setattr(config, "ENCODER_PROFILE", "quality")
+    args = x264_args()
+    assert args[args.index("-preset") + 1] == "slow"
+    assert args[args.index("-tune") + 1] == "film"
+    with pytest.raises(ValueError):
+        x264_args("lossless")
+
+
+def test_pngs_to_mp4_uses_the_active_profile(monkeypatch):
+    cmds = []
+    monkeypatch.setattr(ffmpeg_utils, "find_ffmpeg", lambda: "ffmpeg")
+    monkeypatch.setattr(ffmpeg_utils, "_run", lambda cmd, cwd=None, tag=None: cmds.append(cmd))
+    monkeypatch.setattr(config, "ENCODER_PROFILE", "balanced")
+    pngs_to_mp4("frames", 30, "out.mp4")
+    (cmd,) = cmds
+    assert cmd[cmd.index("-preset") + 1] == "veryfast"
+    assert cmd[cmd.index("-crf") + 1] == "20"
+
+
+def test_pipe_consumer_can_run_tools_under_a_single_slot(monkeypatch):
+    monkeypatch.setattr(ffmpeg_utils, "_SLOTS", threading.BoundedSemaphore(1))
+    lines = []
+
+    def consume():
+        with open_pipe([sys.executable, "-c", "print('frame')"], tag="pipe") as proc:
+            for line in proc.stdout:
+                run_tool([sys.executable, "-c", "pass"], tag="nested")
+                lines.append(line)
+
+    worker = threading.Thread(target=consume, daemon=True)
+    worker.start()
+    worker.join(timeout=10)
+    assert not worker.is_alive(), "nested run_tool deadlocked on the process slot"
+    assert lines == [b"frame\n"]
+    # The slot is free again afterwards
+    assert ffmpeg_utils._SLOTS.acquire(blocking=False)
@@ -0,0 +1,51 @@
+from pathlib import Path
+import sys
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vizard_clone.app import config
+from vizard_clone.app.focus_track import (
+    FocusPoint,
+    _attention_centroid,
+    _spectral_residual,
+    compute_focus_path,
+)
+
+
+def test_centre_path_is_compact_and_zooms_within_bounds():
+    path = compute_focus_path(1800, 1920, 1080)
+    assert len(path) == 1800
+    assert path.x.dtype == np.float32
+    assert np.allclose(path.x, 960) and np.allclose(path.y, 540)
+    assert path.zoom.min() >= config.ZOOM_MIN - 1e-6
+    assert path.zoom.max() <= config.ZOOM_MAX + 1e-6
+    assert path[0] == FocusPoint(960.0, 540.0, config.ZOOM_MIN)
+
+
+def test_centroids_are_smoothed_and_interpolated():
+    centroids = [(0.25, 0.5)] * 12 + [(0.75, 0.5)] * 12  # jump after 2s at 6 Hz
+    path = compute_focus_path(120, 1000, 1000, centroids=centroids, sample_hz=6, fps=30)
+    assert path.x[0] == 250 and path.x[-1] == 750
+    assert np.all(np.diff(path.x) >= 0)  # monotonic, no overshoot
+    assert np.max(np.diff(path.x)) < 500 / 3  # the jump is spread over several frames
+
+
+def test_sendcmd_only_emits_changes():
+    path = compute_focus_path(90, 1920, 1080)
+    path.zoom[:] = 1.0
+    script = path.to_sendcmd(1920, 1080)
+    assert script == "0.000 crop w 606, crop h 1076, crop x 656, crop y 2;\n"
+    boxes = path.crop_boxes(1920, 1080)
+    assert boxes.shape == (90, 4) and np.all(boxes % 2 == 0)
+
+
+def test_saliency_centroid_follows_a_bright_blob():
+    h, w = config.FOCUS_H, config.FOCUS_W
+    frame = np.full((h, w), 0.2, dtype=np.float32)
+    frame[8:14, 44:52] = 1.0
+    xs = np.broadcast_to((np.arange(w) + 0.5) / w, (h, w))
+    ys = np.broadcast_to(((np.arange(h) + 0.5) / h)[:, None], (h, w))
+    cx, cy = _attention_centroid(_spectral_residual(frame), xs, ys)
+    assert 0.6 < cx < 0.85 and 0.15 < cy < 0.45
+    assert _attention_centroid(np.zeros((h, w)), xs, ys) is None
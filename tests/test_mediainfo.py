@@ -0,0 +1,102 @@
+import json
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vizard_clone.app import cache, config, mediainfo
+from vizard_clone.app.mediainfo import MediaInfo, StreamInfo, _rate
+
+PROBE_JSON = json.dumps(
+    {
+        "streams": [
+            {
+                "index": 0,
+                "codec_type": "video",
+                "codec_name": "h264",
+                "width": 1920,
+                "height": 1080,
+                "pix_fmt": "yuv420p",
+                "r_frame_rate": "30000/1001",
+                "avg_frame_rate": "30000/1001",
+                "profile": "High",
+                "level": 41,
+                "time_base": "1/30000",
+            },
+            {
+                "index": 1,
+                "codec_type": "audio",
+                "codec_name": "aac",
+                "sample_rate": "48000",
+                "channels": 2,
+            },
+        ],
+        "format": {"duration": "12.5", "format_name": "mov,mp4,m4a,3gp,3g2,mj2"},
+    }
+)
+PACKETS = "0.000000,K__\n0.033367,___\n2.002000,K__\nN/A,K__\n1.001000,__\n"
+
+
+def _fake_ffprobe(monkeypatch, calls):
+    def fake_run_tool(cmd, tag=None, cwd=None, capture=False):
+        calls.append(cmd)
+        return (PROBE_JSON if "-show_format" in cmd else PACKETS).encode()
+
+    monkeypatch.setattr(mediainfo, "find_ffprobe", lambda: "ffprobe")
+    monkeypatch.setattr(mediainfo, "run_tool", fake_run_tool)
+
+
+def test_rate_parsing():
+    assert _rate("30/1") == 30.0
+    assert abs(_rate("30000/1001") - 29.97) < 0.01
+    assert _rate("25") == 25.0
+    assert _rate("0/0") == 0.0
+    assert _rate("") == 0.0
+    assert _rate("n/a") == 0.0
+
+
+def test_keyframes_from_packet_flags(monkeypatch):
+    _fake_ffprobe(monkeypatch, [])
+    assert mediainfo._keyframes("in.mp4") == (0.0, 2.002)
+
+
+def test_from_json_round_trip():
+    video = StreamInfo(0, "video", "h264", 1280, 720, "yuv420p", "30/1", "30/1", profile="Main", level=31)
+    info = MediaInfo("in.mp4", 4.0, "mp4", (video,), (0.0, 2.0))
+    loaded = MediaInfo.from_json(info.to_json())
+    assert loaded == info
+    assert loaded.keyframes == (0.0, 2.0)
+    assert loaded.fps == 30.0 and loaded.resolution == (1280, 720)
+    assert not loaded.has_audio
+
+
+def test_probe_is_cached_in_memory_and_on_disk(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "TEMP", str(tmp_path / "temp"))
+    src = tmp_path / "in.mp4"
+    src.write_bytes(b"not really a video")
+    calls = []
+    _fake_ffprobe(monkeypatch, calls)
+    mediainfo._probe_stat.cache_clear()
+
+    info = mediainfo.probe(src)
+    assert info.duration == 12.5
+    assert info.video.is_cfr and abs(info.fps - 29.97) < 0.01
+    assert info.video.profile == "High" and info.video.level == 41
+    assert info.audio.sample_rate == 48000 and info.audio.channels == 2
+    assert info.keyframes == (0.0, 2.002)
+    assert len(calls) == 2  # streams + keyframes
+
+    fingerprints = []
+    monkeypatch.setattr(
+        mediainfo, "file_fingerprint", lambda p: fingerprints.append(p) or cache.file_fingerprint(p)
+    )
+    assert mediainfo.probe(src) is info  # lru_cache, keyed on stat data
+    assert len(calls) == 2 and fingerprints == []  # no content read on a hit
+
+    mediainfo._probe_stat.cache_clear()
+    assert mediainfo.probe(src) == info  # DiskCache
+    assert len(calls) == 2
+
+    src.write_bytes(b"a different video")  # new fingerprint: probe again
+    mediainfo.probe(src)
+    assert len(calls) == 4
+    mediainfo._probe_stat.cache_clear()
@@ -0,0 +1,114 @@
+import json
+from pathlib import Path
+import sys
+import threading
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vizard_clone.app import config, ffmpeg_utils, normalize
+from vizard_clone.app.mediainfo import MediaInfo, StreamInfo
+
+
+def _info(codec="h264", pix_fmt="yuv420p", r="30/1", avg="30/1", profile="High", level=41):
+    video = StreamInfo(
+        0, "video", codec, 1920, 1080, pix_fmt, r, avg, profile=profile, level=level, time_base="1/15360"
+    )
+    return MediaInfo("in.mp4", 10.0, "mp4", (video,), (0.0, 2.0, 4.0, 6.0, 8.0))
+
+
+def test_plan_copies_compliant_input():
+    assert normalize.plan_normalization("in.mp4", _info()).mode == "copy"
+
+
+def test_plan_full_for_other_codecs():
+    plan = normalize.plan_normalization("in.mp4", _info(codec="hevc", pix_fmt="yuv420p10le"))
+    assert plan.mode == "full"
+    assert "hevc" in plan.reason and "yuv420p10le" in plan.reason
+
+
+def test_plan_reencodes_only_irregular_gops(monkeypatch):
+    times = [i / 30 for i in range(300)]
+    # Drop frames inside the GOP starting at 4.0s
+    times = [t for t in times if not 4.5 <= t < 4.7]
+    monkeypatch.setattr(normalize, "frame_times", lambda src: times)
+    plan = normalize.plan_normalization("in.mp4", _info(r="30/1", avg="2970/100"))
+    assert plan.mode == "partial"
+    assert plan.ranges == [(4.0, 6.0)]
+
+
+def test_plan_full_when_profile_cannot_be_matched(monkeypatch):
+    times = [t for t in (i / 30 for i in range(300)) if not 4.5 <= t < 4.7]
+    monkeypatch.setattr(normalize, "frame_times", lambda src: times)
+    plan = normalize.plan_normalization("in.mp4", _info(avg="2970/100", profile="High 4:4:4 Predictive"))
+    assert plan.mode == "full"
+    assert "profile" in plan.reason
+
+
+def test_partial_segments_match_source_parameters(monkeypatch, tmp_path):
+    cmds = []
+    monkeypatch.setattr(normalize, "find_ffmpeg", lambda: "ffmpeg")
+    monkeypatch.setattr(normalize, "_run", lambda cmd, cwd=None, tag=None: cmds.append(cmd))
+    plan = normalize.NormalizePlan("partial", "irregular", [(4.0, 6.0)])
+    normalize._normalize_partial(Path("in.mp4"), tmp_path / "out.mp4", plan, _info())
+
+    copied, encoded, tail, concat = cmds
+    assert copied[copied.index("-c:v") + 1] == "copy"
+    for cmd in (copied, encoded, tail):
+        assert cmd[cmd.index("-f") + 1] == "mpegts"
+    assert encoded[encoded.index("-c:v") + 1] == "libx264"
+    assert encoded[encoded.index("-profile:v") + 1] == "high"
+    assert encoded[encoded.index("-level:v") + 1] == "4.1"
+    assert encoded[encoded.index("-pix_fmt") + 1] == "yuv420p"
+    assert encoded[encoded.index("-x264-params") + 1] == "repeat-headers=1"
+    assert concat[concat.index("-video_track_timescale") + 1] == "15360"
+
+
+def test_split_points_snap_to_keyframes():
+    keyframes = tuple(float(k) for k in range(0, 100, 4))
+    assert normalize.split_points(keyframes, 100.0, 4) == [24.0, 48.0, 76.0]
+    assert normalize.split_points(keyframes, 100.0, 1) == []
+    # Never more chunks than distinct keyframes allow
+    assert normalize.split_points((0.0, 50.0), 100.0, 8) == [50.0]
+
+
+def test_chunks_tile_a_single_encode_and_run_concurrently(monkeypatch, tmp_path):
+    info = MediaInfo("in.mp4", 10.02, "mp4", (), tuple(float(k) for k in range(0, 10, 2)))
+    # Under a cap of one process the chunks still have to overlap
+    monkeypatch.setattr(ffmpeg_utils, "_SLOTS", threading.BoundedSemaphore(1))
+    chunks_started = threading.Barrier(3, timeout=5)
+    chunks, listing = [], []
+
+    def fake_run(cmd, cwd=None, tag=None):
+        with ffmpeg_utils.process_slot():
+            if tag == "normalize_chunk":
+                chunks_started.wait()
+                chunks.append(cmd)
+            else:
+                listing.extend(Path(cmd[cmd.index("-i") + 1]).read_text().splitlines())
+
+    monkeypatch.setattr(normalize, "find_ffmpeg", lambda: "ffmpeg")
+    monkeypatch.setattr(normalize, "_run", fake_run)
+    report = normalize.normalize_chunked("in.mp4", tmp_path / "out.mp4", jobs=3, info=info)
+
+    assert [(c.start_s, c.end_s) for c in report.chunks] == [(0.0, 4.0), (4.0, 6.0), (6.0, 10.02)]
+    frames = [int(cmd[cmd.index("-frames:v") + 1]) for cmd in chunks]
+    assert sum(frames) == round(info.duration * config.OUTPUT_FPS)  # single-process count
+    assert sorted(frames) == sorted(c.frames for c in report.chunks)
+    outputs = [cmd[-1] for cmd in sorted(chunks, key=lambda c: c[-1])]
+    assert [line.split("'")[1].rsplit("/", 1)[1] for line in listing] == [
+        Path(o).name for o in outputs
+    ] == ["0000.mp4", "0001.mp4", "0002.mp4"]
+
+
+def test_normalize_smart_labels_estimates_in_log(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "LOGS", str(tmp_path / "logs"))
+    monkeypatch.setattr(normalize, "probe", lambda src: _info())
+    monkeypatch.setattr(normalize, "frame_times", lambda src: [i / 30 for i in range(300)])
+    monkeypatch.setattr(normalize, "_remux", lambda src, out: None)
+    report = normalize.normalize_smart(tmp_path / "in.mp4", tmp_path / "out.mp4")
+    assert report.mode == "copy"
+    assert report.estimated_full_s == 10.0 / config.NORMALIZE_SPEED
+
+    (line,) = (tmp_path / "logs" / "normalize.jsonl").read_text().splitlines()
+    record = json.loads(line)
+    assert set(record) >= {"elapsed_s", "estimated_full_s", "estimated_saved_s"}
+    assert "saved_s" not in record
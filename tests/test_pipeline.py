@@ -0,0 +1,101 @@
+from pathlib import Path
+import json
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vizard_clone.app import pipeline
+from vizard_clone.app.analysis import AnalysisResult
+from vizard_clone.app.ffmpeg_utils import FFMpegError, collect_runs, run_tool
+
+
+def test_run_staged_overlaps_stages():
+    encoding = [threading.Event() for _ in range(5)]
+    overlapped = []
+
+    def prepare(i):
+        if i:
+            # only returns True if item i-1 reached encode while prepare still runs
+            overlapped.append(encoding[i - 1].wait(timeout=5))
+        return i * 10
+
+    def encode(x):
+        encoding[x // 10].set()
+        return x + 1
+
+    out = pipeline.run_staged(range(5), prepare, encode, cpu_workers=1, io_workers=1)
+    assert out == [1, 11, 21, 31, 41]
+    assert overlapped == [True] * 4
+
+
+def test_run_staged_records_runs_of_both_stages():
+    def prepare(i):
+        run_tool([sys.executable, "-c", "pass"], tag="prep")
+        return i
+
+    def encode(i):
+        run_tool([sys.executable, "-c", "pass"], tag="enc")
+        return i
+
+    with collect_runs() as report:
+        assert pipeline.run_staged(range(3), prepare, encode, cpu_workers=2, io_workers=2) == [0, 1, 2]
+    counts = {tag: agg["count"] for tag, agg in report.summary().items()}
+    assert counts == {"prep": 3, "enc": 3}
+
+
+def test_process_video_renders_every_window(tmp_path: Path, monkeypatch):
+    motion = np.zeros(200, dtype=np.float32)
+    motion[20:50] = 1.0
+    motion[120:150] = 1.0
+    result = AnalysisResult(duration=200, motion=motion, speech=np.zeros(200, dtype=np.float32))
+    monkeypatch.setattr(pipeline, "analyze_cached", lambda src: result)
+    monkeypatch.setattr(pipeline.config, "TOP_N", 2)
+    monkeypatch.setattr(pipeline.config, "PRENORMALIZE", False)
+    monkeypatch.setattr(pipeline.config, "WINDOW_CANDIDATES", (30,))
+    monkeypatch.setattr(pipeline, "prepare_window", lambda *args: args)
+    monkeypatch.setattr(pipeline, "encode_window", lambda args: (args[1], args[2], args[4]))
+
+    clips = pipeline.process_video(tmp_path / "vod.mp4", tmp_path / "out")
+    assert [(s, d, p.name) for s, d, p in clips] == [
+        (20, 30, "vod_00.mp4"),
+        (120, 30, "vod_01.mp4"),
+    ]
+    sidecar = json.loads((tmp_path / "out" / "vod_01.json").read_text())
+    assert sidecar["start"] == 120 and sidecar["duration"] == 30 and sidecar["score"] > 0
+
+
+def test_failed_encode_leaves_no_sidecar(tmp_path: Path, monkeypatch):
+    ones, zeros = np.ones(60, dtype=np.float32), np.zeros(60, dtype=np.float32)
+    result = AnalysisResult(duration=60, motion=ones, speech=zeros)
+    monkeypatch.setattr(pipeline, "analyze_cached", lambda src: result)
+    monkeypatch.setattr(pipeline.config, "TOP_N", 1)
+    monkeypatch.setattr(pipeline.config, "PRENORMALIZE", False)
+    monkeypatch.setattr(pipeline.config, "WINDOW_CANDIDATES", (30,))
+    monkeypatch.setattr(pipeline, "prepare_window", lambda *args: args)
+
+    def broken_encode(args):
+        raise FFMpegError("encode failed")
+
+    monkeypatch.setattr(pipeline, "encode_window", broken_encode)
+    with pytest.raises(FFMpegError):
+        pipeline.process_video(tmp_path / "vod.mp4", tmp_path / "out")
+    assert not (tmp_path / "out" / "vod_00.json").exists()
+
+
+def test_process_video_names_outputs_after_the_job(tmp_path: Path, monkeypatch):
+    ones, zeros = np.ones(60, dtype=np.float32), np.zeros(60, dtype=np.float32)
+    monkeypatch.setattr(pipeline, "analyze_cached", lambda src: AnalysisResult(60, ones, zeros))
+    monkeypatch.setattr(pipeline.config, "TOP_N", 1)
+    monkeypatch.setattr(pipeline.config, "PRENORMALIZE", False)
+    monkeypatch.setattr(pipeline.config, "WINDOW_CANDIDATES", (30,))
+    monkeypatch.setattr(pipeline, "prepare_window", lambda *args: args)
+    monkeypatch.setattr(pipeline, "encode_window", lambda args: args[4])
+
+    (clip,) = pipeline.process_video(tmp_path / "a" / "vod.mp4", tmp_path, name="vod-001")
+    assert clip.name == "vod-001_00.mp4"
+    assert (tmp_path / "vod-001_00.json").exists()
+    assert (tmp_path / "vod-001_ffmpeg_report.json").exists()
+    assert not (tmp_path / "vod_ffmpeg_report.json").exists()
@@ -0,0 +1,112 @@
+from pathlib import Path
+import json
+import sys
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vizard_clone.app import preview
+
+
+@pytest.fixture
+def client(tmp_path: Path, monkeypatch):
+    monkeypatch.setitem(preview.app.config, "CLIPS_ROOT", str(tmp_path))
+    monkeypatch.setattr(preview, "_INDEXES", {})
+    return preview.app.test_client()
+
+
+def _clips(root: Path, count: int) -> None:
+    root.mkdir(exist_ok=True)
+    for i in range(count):
+        (root / f"vod_{i:02d}.mp4").write_bytes(bytes(range(256)) * 4)
+        (root / f"vod_{i:02d}.json").write_text(json.dumps({"duration": 30, "score": i / 10}))
+
+
+def test_clips_support_ranges_and_conditional_requests(tmp_path: Path, client):
+    _clips(tmp_path, 1)
+
+    full = client.get("/clips/vod_00.mp4")
+    assert full.status_code == 200 and full.headers["Last-Modified"]
+    etag = full.headers["ETag"]
+    part = client.get("/clips/vod_00.mp4", headers={"Range": "bytes=256-511"})
+    assert part.status_code == 206
+    assert part.headers["Content-Range"] == "bytes 256-511/1024"
+    assert part.data == bytes(range(256))
+    assert client.get("/clips/vod_00.mp4", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/clips/../secret.mp4").status_code == 404
+    assert client.get("/clips/sub/vod_00.mp4").status_code == 404
+
+
+def test_index_is_incremental_paginated_and_tracks_approval(tmp_path: Path, client):
+    _clips(tmp_path, 120)
+
+    data = client.get("/api/clips?page=3&per_page=50").get_json()
+    assert data["total"] == 120 and len(data["clips"]) == 20
+    names = sorted(f"vod_{i:02d}.mp4" for i in range(120))
+    assert [c["name"] for c in data["clips"]] == names[100:]
+    assert data["clips"][0]["duration"] == 30.0
+    assert data["clips"][0]["score"] == int(names[100][4:-4]) / 10
+
+    index = preview.get_index(tmp_path)
+    assert index.refresh() is False  # nothing changed on disk
+    (tmp_path / "vod_00.mp4").unlink()
+    assert index.refresh() is True and index.page(1, 500)["total"] == 119
+    assert json.loads((tmp_path / ".preview" / "index.json").read_text()).keys() == {
+        c["name"] for c in index.page(1, 500)["clips"]
+    }
+
+    resp = client.post("/api/clips/vod_01.mp4/approval", json={"approved": True})
+    assert resp.get_json() == {"name": "vod_01.mp4", "approved": True}
+    assert index.page(1, 1)["clips"][0]["approved"] is True
+    page = client.get("/").get_data(as_text=True)
+    assert page.count('class="clip"') == preview.config.PREVIEW_PAGE_SIZE
+    assert 'loading="lazy"' in page and "checked" in page
+
+
+def test_thumbnails_are_rendered_once(tmp_path: Path, client, monkeypatch):
+    _clips(tmp_path, 1)
+    cmds = []
+
+    def fake_run_tool(cmd, tag=None, cwd=None, capture=False):
+        cmds.append(cmd)
+        Path(cmd[-1]).write_bytes(b"\xff\xd8 jpeg")
+
+    monkeypatch.setattr(preview, "find_ffmpeg", lambda: "ffmpeg")
+    monkeypatch.setattr(preview, "run_tool", fake_run_tool)
+
+    poster = client.get("/thumbs/vod_00.mp4/poster.jpg")
+    assert poster.status_code == 200 and poster.data == b"\xff\xd8 jpeg"
+    assert client.get("/thumbs/vod_00.mp4/poster.jpg").status_code == 200
+    assert client.get("/thumbs/vod_00.mp4/sprite.jpg").status_code == 200
+    assert client.get("/thumbs/vod_00.mp4/other.jpg").status_code == 404
+    assert client.get("/thumbs/missing.mp4/poster.jpg").status_code == 404
+
+    poster_cmd, sprite_cmd = cmds
+    assert poster_cmd[poster_cmd.index("-ss") + 1] == "1.0"
+    assert poster_cmd[poster_cmd.index("-vf") + 1] == f"scale={preview.POSTER_W}:{preview.POSTER_H}"
+    assert "-ss" not in sprite_cmd
+    # 10 tiles over a 30s clip
+    assert sprite_cmd[sprite_cmd.index("-vf") + 1].startswith("fps=0.333333,")
+    assert sprite_cmd[sprite_cmd.index("-vf") + 1].endswith(
+        f"tile={preview.SPRITE_COLS}x{preview.SPRITE_ROWS}"
+    )
+
+    # A changed clip invalidates its thumbnails once the listing refreshes
+    (tmp_path / "vod_00.mp4").write_bytes(b"re-rendered")
+    assert client.get("/thumbs/vod_00.mp4/poster.jpg").status_code == 200
+    assert len(cmds) == 2  # thumbnail requests do not rescan the directory
+    client.get("/api/clips")
+    assert client.get("/thumbs/vod_00.mp4/poster.jpg").status_code == 200
+    assert len(cmds) == 3
+
+
+def test_sidecar_written_after_the_clip_updates_the_entry(tmp_path: Path, client):
+    (tmp_path / "late.mp4").write_bytes(b"frames")
+    index = preview.get_index(tmp_path)
+    assert index.page()["clips"][0]["score"] is None  # indexed before its sidecar
+
+    (tmp_path / "late.json").write_text(json.dumps({"duration": 12.5, "score": 0.8}))
+    assert index.refresh() is True
+    clip = index.page()["clips"][0]
+    assert (clip["score"], clip["duration"]) == (0.8, 12.5)
+    assert index.refresh() is False
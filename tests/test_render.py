@@ -0,0 +1,84 @@
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vizard_clone.app import config, render
+from vizard_clone.app.mediainfo import MediaInfo, StreamInfo
+from vizard_clone.app.render import PreparedWindow
+from vizard_clone.app.subs import SubtitleSegment
+
+
+VIDEO = StreamInfo(0, "video", "h264", 1920, 1080, "yuv420p", "30/1", "30/1")
+AUDIO = StreamInfo(1, "audio", "aac", sample_rate=48000, channels=2)
+
+
+def _capture(monkeypatch, has_audio=True):
+    runs = []
+    streams = (VIDEO, AUDIO) if has_audio else (VIDEO,)
+    monkeypatch.setattr(render, "probe", lambda p: MediaInfo(str(p), 60.0, "mp4", streams))
+    monkeypatch.setattr(render, "find_ffmpeg", lambda: "ffmpeg")
+    monkeypatch.setattr(render, "_run", lambda cmd, cwd=None, tag=None: runs.append((cmd, cwd)))
+    return runs
+
+
+def _prepared(tmp_path: Path, **kwargs) -> PreparedWindow:
+    return PreparedWindow(
+        source=tmp_path / "src.mp4",
+        start_s=12.0,
+        dur_s=30.0,
+        tmp_dir=tmp_path,
+        out_path=tmp_path / "out" / "clip.mp4",
+        srt_path=tmp_path / "subs.srt",
+        segments=[SubtitleSegment(12.0, 14.0, "hi")],
+        **kwargs,
+    )
+
+
+def test_graph_mode_renders_in_a_single_ffmpeg_run(tmp_path: Path, monkeypatch):
+    runs = _capture(monkeypatch)
+    prep = _prepared(
+        tmp_path,
+        audio_source=tmp_path / "audio.mp4",
+        focus_cmd=tmp_path / "focus.cmd",
+        crop_box=(606, 1080, 657, 0),
+        ass_path=tmp_path / "subs.ass",
+    )
+    assert render.encode_window(prep, mode="graph") == prep.out_path
+
+    ((cmd, cwd),) = runs
+    assert cwd == tmp_path  # subtitle and sendcmd files are referenced by name
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert graph.startswith("[0:v]sendcmd=f=focus.cmd,crop=w=606:h=1080:x=657:y=0,")
+    assert f"scale={config.TARGET_W}:{config.TARGET_H}" in graph
+    assert graph.endswith(",ass=subs.ass[v]")
+    # Video and audio are seeked to the same window; audio comes from input 1
+    assert cmd.count("-ss") == 2 and cmd[cmd.index("-ss") + 1] == "12.0"
+    assert cmd[cmd.index("[v]") + 2] == "1:a:0?" and "lavfi" not in cmd
+    assert cmd[-1] == str(prep.out_path.resolve())
+    assert prep.out_path.parent.is_dir()
+
+
+def test_graph_mode_without_focus_or_subtitles(tmp_path: Path, monkeypatch):
+    runs = _capture(monkeypatch)
+    prep = _prepared(tmp_path, dub_path=tmp_path / "dub.wav")
+    prep.segments = []
+    render.encode_window_graph(prep)
+
+    ((cmd, _),) = runs
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert graph.startswith("[0:v]crop=w=") and "sendcmd" not in graph
+    assert "subtitles=" not in graph and "ass=" not in graph
+    # The dub track is already in clip time: no seek on the second input
+    assert cmd.count("-ss") == 1
+    assert cmd[cmd.index("-i", cmd.index("-i") + 1) + 1] == str((tmp_path / "dub.wav").resolve())
+
+
+def test_graph_mode_adds_silence_for_sources_without_audio(tmp_path: Path, monkeypatch):
+    runs = _capture(monkeypatch, has_audio=False)
+    render.encode_window_graph(_prepared(tmp_path))
+
+    ((cmd, _),) = runs
+    lavfi = cmd.index("lavfi")
+    assert cmd[lavfi + 1 : lavfi + 5] == ["-t", "30.0", "-i", "anullsrc=channel_layout=stereo:sample_rate=44100"]
+    # Same stream layout as the chain path: video plus a silent stereo track
+    assert cmd[cmd.index("[v]") + 2] == "1:a:0"
@@ -1,8 +1,16 @@
+from contextlib import contextmanager
 from pathlib import Path
+from types import SimpleNamespace
+import io
+import random
 import sys
 
+import numpy as np
+import pytest
+
 sys.path.append(str(Path(__file__).resolve().parents[1]))
-from vizard_clone.app.scene_score import pick_best_windows
+from vizard_clone.app import config, ffmpeg_utils, scene_score
+from vizard_clone.app.scene_score import StreamingWindowPicker, pick_best_windows
 
 
 def test_pick_best_windows_simple():
@@ -18,3 +26,132 @@ def test_pick_best_windows_simple():
         top_n=2,
     )
     assert [(w.start, w.end) for w in wins] == [(0, 10), (20, 30)]
+
+
+def _reference_pick(duration, motion, speech, window_candidates, step, top_n, min_gap):
+    candidates = []
+    for w in window_candidates:
+        for start in range(0, max(0, duration - w) + 1, step):
+            end = start + w
+            score = 0.7 * sum(motion[start:end]) / w + 0.3 * sum(speech[start:end]) / w
+            candidates.append((start, end, score))
+    candidates.sort(key=lambda c: c[2], reverse=True)
+    picked = []
+    for c in candidates:
+        if len(picked) >= top_n:
+            break
+        if all(c[1] + min_gap <= p[0] or c[0] >= p[1] + min_gap for p in picked):
+            picked.append(c)
+    return sorted((s, e) for s, e, _ in picked)
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_pick_best_windows_matches_reference(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(scene_score, "np", None)
+    rng = random.Random(1234)
+    duration = 900
+    motion = [rng.randint(0, 9) for _ in range(duration)]
+    speech = [rng.randint(0, 9) for _ in range(duration - 30)]  # shorter profile
+    for top_n, min_gap in ((5, 2), (12, 0), (3, 10)):
+        wins = pick_best_windows(duration, motion, speech, (60, 45, 30), 5, top_n, min_gap)
+        expected = _reference_pick(duration, motion, speech, (60, 45, 30), 5, top_n, min_gap)
+        assert [(w.start, w.end) for w in wins] == expected
+
+
+def test_streaming_picker_matches_batch_on_separated_peaks():
+    duration = 600
+    motion = [0.0] * duration
+    for peak in (40, 250, 470):
+        for i in range(peak, peak + 30):
+            motion[i] = 1.0
+    speech = [0.0] * duration
+    picker = StreamingWindowPicker(window_candidates=[30], step=5, min_gap=2)
+    emitted = []
+    first_emit_at = None
+    for m, s in zip(motion, speech):
+        out = picker.push(m, s)
+        if out and first_emit_at is None:
+            first_emit_at = picker.seconds
+        emitted.extend(out)
+    emitted.extend(picker.flush())
+    batch = pick_best_windows(duration, motion, speech, [30], 5, top_n=3)
+    assert [(w.start, w.end) for w in emitted] == [(w.start, w.end) for w in batch]
+    # The first clip is released long before the stream ends.
+    assert first_emit_at is not None and first_emit_at < 150
+
+
+def test_streaming_picker_respects_top_n():
+    picker = StreamingWindowPicker(window_candidates=[10], step=5, top_n=2, min_gap=0)
+    out = picker.extend([1.0] * 200, [0.0] * 200) + picker.flush()
+    assert len(out) == 2
+
+
+def test_streaming_picker_keeps_the_best_n():
+    motion = [0.0] * 300
+    for peak, level in ((20, 0.2), (80, 0.9), (140, 0.3), (200, 1.0), (260, 0.5)):
+        for i in range(peak, peak + 10):
+            motion[i] = level
+    picker = StreamingWindowPicker(window_candidates=[10], step=5, top_n=2, min_gap=2)
+    assert picker.extend(motion, [0.0] * 300) == []  # nothing is final before the end
+    assert [(w.start, w.end) for w in picker.flush()] == [(80, 90), (200, 210)]
+
+
+def test_motion_profile_averages_gray_frame_deltas(monkeypatch):
+    px = config.ANALYSIS_W * config.ANALYSIS_H
+    levels = [0, 0, 51, 51, 51, 102, 102, 102]  # two frames per second
+    stream = io.BytesIO(b"".join(bytes([v]) * px for v in levels))
+    seen = []
+
+    @contextmanager
+    def fake_pipe(cmd, tag=None, pass_fds=()):
+        seen.append(cmd)
+        yield SimpleNamespace(stdout=stream)
+
+    monkeypatch.setattr(ffmpeg_utils, "find_ffmpeg", lambda: "ffmpeg")
+    monkeypatch.setattr(ffmpeg_utils, "open_pipe", fake_pipe)
+    profile = scene_score.motion_profile("in.mp4", start_s=1.0, end_s=6.0, fps=2)
+
+    assert profile.dtype == np.float32
+    # second 0: one still delta; 1 and 2: a 51-level step among two deltas;
+    # 3: still; 4: past the stream, padded to the requested range
+    assert np.allclose(profile, [0.0, 0.1, 0.1, 0.0, 0.0])
+    cmd = seen[0]
+    assert cmd[cmd.index("-ss") + 1] == "1.0" and cmd[cmd.index("-t") + 1] == "5.0"
+    vf = cmd[cmd.index("-vf") + 1]
+    assert vf.startswith("fps=2.0,") and vf.endswith("format=gray")
+
+
+def test_detect_scenes_yields_hsv_cuts_lazily(monkeypatch):
+    px = config.ANALYSIS_W * config.ANALYSIS_H
+    colours = [(200, 30, 30)] * 20 + [(30, 30, 200)] * 20 + [(40, 30, 200)] * 5
+    stream = io.BytesIO(b"".join(bytes(c) * px for c in colours))
+    seen = []
+
+    @contextmanager
+    def fake_pipe(cmd, tag=None, pass_fds=()):
+        seen.append(cmd)
+        yield SimpleNamespace(stdout=stream)
+
+    monkeypatch.setattr(ffmpeg_utils, "find_ffmpeg", lambda: "ffmpeg")
+    monkeypatch.setattr(ffmpeg_utils, "open_pipe", fake_pipe)
+    scenes = scene_score.detect_scenes("in.mp4", min_scene_len=10)
+    assert next(scenes) == (0, 20)
+    assert stream.tell() < len(stream.getvalue())  # yielded before the end
+    assert list(scenes) == [(20, 45)]
+    assert "rgb24" in seen[0][seen[0].index("-vf") + 1]
+
+
+def test_read_speech_separates_voice_from_noise_and_silence():
+    rate = scene_score.AUDIO_RATE
+    t = np.arange(rate) / rate
+    voice = 0.1 * sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 15))
+    noise = np.random.default_rng(0).normal(0, 0.1, rate)
+    pcm = np.concatenate([voice, noise, np.zeros(rate), voice[: rate // 2]])
+    stream = io.BytesIO((pcm * 32767).astype("<i2").tobytes())
+
+    energy, activity = scene_score._PerSecond(), scene_score._PerSecond()
+    scene_score._read_speech(stream, energy, activity)
+    rms = energy.finish()
+    assert len(rms) == 4 and rms[2] == 0 and abs(rms[1] - 0.1) < 0.005
+    assert list(activity.finish()) == [1.0, 0.0, 0.0, 1.0]
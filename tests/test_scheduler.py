@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vizard_clone.app import scheduler
+from vizard_clone.app.scheduler import Job, JobStore, Scheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = datetime(2024, 1, 1, 12, 0)
+
+    def __call__(self):
+        return self.now
+
+
+def _job(clock, minutes, name):
+    return Job(clock.now + timedelta(minutes=minutes), f"{name}.mp4", name, "", ["t"])
+
+
+def test_due_jobs_run_in_order_and_queue_survives_restart(tmp_path: Path, monkeypatch):
+    uploaded = []
+    monkeypatch.setattr(scheduler, "upload", lambda path, *a: uploaded.append(path))
+    clock = Clock()
+    sched = Scheduler(JobStore(tmp_path / "jobs.db"), workers=1, clock=clock)
+    for minutes, name in ((30, "c"), (-5, "a"), (10, "b")):
+        sched.add(_job(clock, minutes, name))
+
+    for fut in sched.run_pending():
+        fut.result()
+    assert uploaded == ["a.mp4"]
+    assert [j.title for j in sched.jobs] == ["b", "c"]
+    sched.shutdown()
+
+    clock.now += timedelta(minutes=20)
+    restarted = Scheduler(JobStore(tmp_path / "jobs.db"), workers=1, clock=clock)
+    assert [j.title for j in restarted.jobs] == ["b", "c"]
+    for fut in restarted.run_pending():
+        fut.result()
+    assert uploaded == ["a.mp4", "b.mp4"]
+    restarted.shutdown()
+
+
+def test_failed_uploads_back_off_then_give_up(tmp_path: Path, monkeypatch):
+    def failing(*args):
+        raise OSError("network down")
+
+    monkeypatch.setattr(scheduler, "upload", failing)
+    clock = Clock()
+    store = JobStore(tmp_path / "jobs.db")
+    sched = Scheduler(store, retries=2, backoff=10.0, clock=clock)
+    job = sched.add(_job(clock, 0, "a"))
+
+    delays = []
+    for _ in range(3):
+        start = clock.now
+        for fut in sched.run_pending():
+            fut.result()
+        if sched.jobs:
+            delays.append((sched.jobs[0].when - start).total_seconds())
+            clock.now = sched.jobs[0].when
+    assert delays == [10.0, 20.0]
+    assert sched.jobs == [] and list(store.pending()) == []
+    assert job.attempts == 3
+    sched.shutdown()
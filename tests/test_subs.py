@@ -0,0 +1,69 @@
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vizard_clone.app import ffmpeg_utils
+from vizard_clone.app.subs import (
+    SubtitleSegment,
+    burn_subtitles,
+    parse_ass,
+    parse_srt,
+    write_ass,
+    write_srt,
+)
+
+SEGMENTS = [
+    SubtitleSegment(12.0, 14.5, "a rather long subtitle line that has to be wrapped twice"),
+    SubtitleSegment(3725.25, 3726.0, "late"),
+]
+
+
+def test_srt_uses_clip_time_and_wraps(tmp_path: Path):
+    path = write_srt((s for s in SEGMENTS), tmp_path / "a.srt", offset=10.0, max_chars=20)
+    text = path.read_text()
+    assert text.startswith("1\n00:00:02,000 --> 00:00:04,500\na rather long\n")
+    assert "2\n01:01:55,250 --> 01:01:56,000\nlate\n" in text
+    assert max(len(line) for line in text.splitlines()) <= 29  # timestamp lines
+    assert parse_srt(path, offset=10.0) == SEGMENTS
+
+
+def test_ass_round_trip_and_skips_segments_before_offset(tmp_path: Path):
+    segs = [SubtitleSegment(1.0, 2.0, "gone")] + SEGMENTS
+    path = write_ass(segs, tmp_path / "a.ass", offset=10.0, max_chars=20)
+    text = path.read_text()
+    assert "PlayResY: 1920" in text and "Style: Default," in text
+    assert "Dialogue: 0,0:00:02.00,0:00:04.50,Default,,0,0,0,,a rather long\\N" in text
+    assert parse_ass(path, offset=10.0) == SEGMENTS
+
+
+def test_empty_segments_are_skipped_in_both_formats(tmp_path: Path):
+    segs = [SubtitleSegment(11.0, 11.5, "  "), SEGMENTS[0], SubtitleSegment(15.0, 16.0, ""), SEGMENTS[1]]
+    srt = write_srt(segs, tmp_path / "a.srt", offset=10.0, max_chars=20)
+    assert srt.read_text().startswith("1\n00:00:02,000 --> ")
+    assert "\n2\n01:01:55,250 --> " in srt.read_text()
+    assert parse_srt(srt, offset=10.0) == SEGMENTS
+    assert parse_ass(write_ass(segs, tmp_path / "a.ass", offset=10.0), offset=10.0) == SEGMENTS
+
+
+def test_burn_subtitles_links_without_events_and_renames_in_place(tmp_path: Path, monkeypatch):
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(b"frames")
+    empty = write_ass([], tmp_path / "empty.ass")
+    copy = burn_subtitles(video, empty, tmp_path / "copy.mp4")
+    assert copy.read_bytes() == b"frames"
+    assert copy.stat().st_ino == video.stat().st_ino  # hard link, no copy
+
+    calls = []
+
+    def fake_run(cmd, cwd=None, tag=None):
+        calls.append((cmd, cwd))
+        Path(cmd[-1]).write_bytes(b"burned")
+
+    monkeypatch.setattr(ffmpeg_utils, "find_ffmpeg", lambda: "ffmpeg")
+    monkeypatch.setattr(ffmpeg_utils, "_run", fake_run)
+    subs = write_ass(SEGMENTS, tmp_path / "subs.ass")
+    burn_subtitles(video, subs, video)
+    cmd, cwd = calls[0]
+    assert cmd[cmd.index("-vf") + 1] == "ass=subs.ass" and Path(cwd) == tmp_path
+    assert video.read_bytes() == b"burned"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["clip.mp4", "copy.mp4", "empty.ass", "subs.ass"]
@@ -0,0 +1,67 @@
+from pathlib import Path
+import os
+import sys
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vizard_clone.app.upload_server import UploadServer
+from vizard_clone.app.uploader import UploadClient, UploadError
+
+
+def test_chunked_upload_reuses_connections(tmp_path: Path):
+    data = os.urandom(100_000)
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(data)
+    with UploadServer(tmp_path / "srv") as srv:
+        client = UploadClient(srv.url, chunk_size=16_384, state_dir=tmp_path / "state")
+        result = client.upload(video, "title", "desc", ["a"], channel="c1")
+        assert result["title"] == "title" and result["size"] == len(data)
+        assert srv.file(result["id"]).read_bytes() == data
+        assert srv.chunk_requests == 7
+        assert srv.connections == 1
+        client.pool.close()
+    assert list((tmp_path / "state").iterdir()) == []
+
+
+def test_interrupted_upload_resumes_from_persisted_offset(tmp_path: Path):
+    data = os.urandom(50_000)
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(data)
+    with UploadServer(tmp_path / "srv", fail_chunks={3}) as srv:
+        client = UploadClient(srv.url, chunk_size=10_000, state_dir=tmp_path / "state")
+        with pytest.raises(UploadError):
+            client.upload(video, "t", "", [], channel="c1")
+        assert srv.bytes_received == 20_000
+
+        fresh = UploadClient(srv.url, chunk_size=10_000, state_dir=tmp_path / "state")
+        result = fresh.upload(video, "t", "", [], channel="c1")
+        assert srv.file(result["id"]).read_bytes() == data
+        assert srv.bytes_received == len(data)  # nothing was sent twice
+        assert len(srv.sessions) == 1
+        client.pool.close()
+        fresh.pool.close()
+
+
+def test_transport_error_keeps_session_for_resume(tmp_path: Path):
+    data = os.urandom(30_000)
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(data)
+    with UploadServer(tmp_path / "srv") as srv:
+        client = UploadClient(srv.url, chunk_size=10_000, state_dir=tmp_path / "state")
+        request = client.pool.request
+
+        def reset_on_first_chunk(method, url, body=None, headers=None):
+            if method == "PUT" and body:
+                raise ConnectionResetError("connection reset by peer")
+            return request(method, url, body=body, headers=headers)
+
+        client.pool.request = reset_on_first_chunk
+        with pytest.raises(ConnectionResetError):
+            client.upload(video, "t", "", [], channel="c1")
+
+        client.pool.request = request
+        result = client.upload(video, "t", "", [], channel="c1")
+        assert srv.file(result["id"]).read_bytes() == data
+        assert len(srv.sessions) == 1  # the first session was resumed
+        client.pool.close()
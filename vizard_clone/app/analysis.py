@@ -0,0 +1,225 @@
+"""Single-pass source analysis.
+
+:func:`analyze_source` demuxes and decodes a source exactly once and
+computes everything the window picker needs: the per-second motion
+profile, per-second RMS speech energy and the scene cuts.  A single
+ffmpeg process writes downscaled grayscale video to stdout and mono PCM
+to a second pipe; both are consumed concurrently so neither can stall
+the decoder.
+
+:func:`analyze_cached` wraps the analysis with an on-disk cache keyed by
+the source fingerprint, so re-scoring a source with different window
+settings does not decode it again.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from . import config, ffmpeg_utils
+from .cache import DiskCache, file_fingerprint, make_key
+from .mediainfo import probe
+from .scene_score import (
+    AUDIO_RATE,
+    _PerSecond,
+    _fit_length,
+    _frame_deltas,
+    _gray_filter,
+    _read_speech,
+    _seek_args,
+)
+
+
+@dataclass
+class AnalysisResult:
+    """Per-second profiles and scene cuts of one source.
+
+    ``scenes`` holds ``(start_s, end_s)`` ranges in seconds relative to
+    the start of the analysed range.
+    """
+
+    duration: int
+    motion: np.ndarray
+    speech: np.ndarray
+    scenes: List[Tuple[float, float]] = field(default_factory=list)
+
+
+def _scene_ranges(cuts: List[int], total_frames: int, rate: float) -> List[Tuple[float, float]]:
+    bounds = [0, *cuts, total_frames]
+    return [
+        (round(a / rate, 3), round(b / rate, 3)) for a, b in zip(bounds, bounds[1:]) if b > a
+    ]
+
+
+def _analysis_cmd(
+    path: str | Path, start_s: float, end_s: float | None, rate: float, audio_fd: Optional[int]
+) -> List[str]:
+    cmd = [ffmpeg_utils.find_ffmpeg(), "-v", "error", "-nostdin"]
+    cmd += _seek_args(start_s, end_s)
+    cmd += ["-i", str(path)]
+    cmd += ["-map", "0:v:0", "-vf", _gray_filter(rate), "-f", "rawvideo", "pipe:1"]
+    if audio_fd is not None:
+        cmd += [
+            "-map",
+            "0:a:0",
+            "-ac",
+            "1",
+            "-ar",
+            str(AUDIO_RATE),
+            "-f",
+            "s16le",
+            f"pipe:{audio_fd}",
+        ]
+    return cmd
+
+
+def _run_analysis(
+    path: str | Path,
+    start_s: float,
+    end_s: float | None,
+    rate: float,
+    threshold: float,
+    with_audio: bool,
+) -> AnalysisResult:
+    motion = _PerSecond()
+    speech = _PerSecond()
+    cuts: List[int] = []
+    last_cut = 0
+    frames = 1
+    min_scene = max(1, int(rate))  # ignore flashes shorter than a second
+
+    audio_r = audio_w = None
+    audio = reader = None
+    if with_audio:
+        audio_r, audio_w = os.pipe()
+    cmd = _analysis_cmd(path, start_s, end_s, rate, audio_w)
+
+    try:
+        pass_fds = (audio_w,) if audio_w is not None else ()
+        with ffmpeg_utils.open_pipe(cmd, tag="analysis", pass_fds=pass_fds) as proc:
+            if audio_w is not None:
+                os.close(audio_w)
+                audio_w = None
+                audio, audio_r = os.fdopen(audio_r, "rb"), None
+                reader = threading.Thread(target=_read_speech, args=(audio, speech), daemon=True)
+                reader.start()
+            for idx, delta in _frame_deltas(proc.stdout, config.ANALYSIS_W, config.ANALYSIS_H):
+                frames = idx + 1
+                motion.add(int(idx / rate), delta / 255.0)
+                if delta >= threshold and idx - last_cut >= min_scene:
+                    cuts.append(idx)
+                    last_cut = idx
+    finally:
+        if reader is not None:
+            reader.join()
+        if audio is not None:
+            audio.close()
+        for fd in (audio_r, audio_w):
+            if fd is not None:
+                os.close(fd)
+
+    motion_arr, speech_arr = motion.finish(), speech.finish()
+    if end_s is not None:
+        duration = int(math.ceil(end_s - start_s))
+    else:
+        duration = max(len(motion_arr), len(speech_arr))
+    return AnalysisResult(
+        duration=duration,
+        motion=_fit_length(motion_arr, duration),
+        speech=_fit_length(speech_arr, duration),
+        scenes=_scene_ranges(cuts, frames, rate),
+    )
+
+
+def analyze_source(
+    path: str | Path,
+    start_s: float = 0.0,
+    end_s: float | None = None,
+    rate: float = config.SAMPLE_HZ,
+    threshold: float = config.SCENE_LUMA_THRESHOLD,
+) -> AnalysisResult:
+    """Analyse ``path`` with a single decode of video and audio.
+
+    Parameters
+    ----------
+    path:
+        Source media file.
+    start_s, end_s:
+        Range to analyse; ``end_s=None`` reads to the end of the file.
+    rate:
+        Video sampling rate in frames per second.
+    threshold:
+        Scene cut threshold applied to the mean absolute luma change
+        between consecutive sampled frames (``0..255`` scale).  This is
+        not the HSV metric of :func:`.scene_score.detect_scenes`, hence
+        its own default, ``config.SCENE_LUMA_THRESHOLD``.
+    """
+
+    if os.name == "nt":  # pragma: no cover - pass_fds is POSIX only
+        return _run_analysis(path, start_s, end_s, rate, threshold, with_audio=False)
+    try:
+        has_audio = probe(path).has_audio
+    except RuntimeError:
+        has_audio = None  # ffprobe unavailable: find out the hard way
+    if has_audio is not None:
+        return _run_analysis(path, start_s, end_s, rate, threshold, with_audio=has_audio)
+    try:
+        return _run_analysis(path, start_s, end_s, rate, threshold, with_audio=True)
+    except ffmpeg_utils.FFMpegError:
+        # Sources without an audio stream make the PCM output fail; retry
+        # video-only and leave the speech profile silent.
+        return _run_analysis(path, start_s, end_s, rate, threshold, with_audio=False)
+
+
+def _store(entry: Path, result: AnalysisResult) -> None:
+    np.save(entry / "motion.npy", np.asarray(result.motion, dtype=np.float32))
+    np.save(entry / "speech.npy", np.asarray(result.speech, dtype=np.float32))
+    scenes = np.asarray(result.scenes, dtype=np.float64).reshape(-1, 2)
+    np.save(entry / "scenes.npy", scenes)
+    (entry / "meta.json").write_text(json.dumps({"duration": result.duration}))
+
+
+def _load(entry: Path) -> AnalysisResult:
+    meta = json.loads((entry / "meta.json").read_text())
+    scenes = np.load(entry / "scenes.npy")
+    return AnalysisResult(
+        duration=int(meta["duration"]),
+        motion=np.load(entry / "motion.npy", mmap_mode="r"),
+        speech=np.load(entry / "speech.npy", mmap_mode="r"),
+        scenes=[(float(a), float(b)) for a, b in scenes],
+    )
+
+
+def analyze_cached(
+    path: str | Path,
+    start_s: float = 0.0,
+    end_s: float | None = None,
+    rate: float = config.SAMPLE_HZ,
+    threshold: float = config.SCENE_LUMA_THRESHOLD,
+    cache: DiskCache | None = None,
+) -> AnalysisResult:
+    """Like :func:`analyze_source` but served from the analysis cache.
+
+    Profiles are stored as ``.npy`` arrays and loaded memory-mapped, so a
+    cache hit costs a fingerprint and a few small reads.
+    """
+
+    cache = cache or DiskCache("analysis")
+    key = make_key(file_fingerprint(path), start_s, end_s, rate, threshold)
+    entry = cache.get(key)
+    if entry is not None:
+        try:
+            return _load(entry)
+        except (OSError, ValueError, KeyError):
+            pass  # corrupt entry, recompute below
+    result = analyze_source(path, start_s, end_s, rate, threshold)
+    with cache.put(key) as tmp:
+        _store(tmp, result)
+    return result
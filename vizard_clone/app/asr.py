@@ -0,0 +1,230 @@
+"""Speech recognition service.
+
+:class:`TranscriptionService` transcribes a whole source once and serves
+per-window subtitle segments by slicing that transcript, so overlapping
+windows of the same video never trigger new inference.  Models are
+loaded once per process and kept for its lifetime; transcripts are
+persisted in the ``transcripts`` namespace of the on-disk cache, keyed by
+source fingerprint, engine, model and language.
+
+Engines are looked up by name in :data:`ENGINES` (``config.ASR_ENGINE``).
+``faster-whisper`` is used when the package is installed; otherwise the
+service warns once and falls back to the dependency free ``stub`` engine.
+"""
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import config
+from .cache import DiskCache, file_fingerprint, make_key
+from .subs import SubtitleSegment
+
+try:  # pragma: no cover - optional dependency
+    import faster_whisper
+except Exception:  # pragma: no cover
+    faster_whisper = None  # type: ignore
+
+log = logging.getLogger(__name__)
+
+STUB_SEGMENT_SEC = 5.0
+
+
+@dataclass
+class Transcript:
+    language: str
+    segments: List[SubtitleSegment]
+    _ends: List[float] = field(default_factory=list, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.segments.sort(key=lambda s: s.start)
+        self._ends = [s.end for s in self.segments]
+
+    def slice(self, start_s: float, end_s: float) -> List[SubtitleSegment]:
+        """Return segments overlapping ``[start_s, end_s)``, clipped to it.
+
+        Times stay absolute (source timeline).  Segments are sorted by
+        start and ASR output does not overlap, so the first candidate is
+        found by bisecting the end times.
+        """
+
+        out = []
+        for seg in self.segments[bisect.bisect_right(self._ends, start_s) :]:
+            if seg.start >= end_s:
+                break
+            out.append(SubtitleSegment(max(seg.start, start_s), min(seg.end, end_s), seg.text))
+        return out
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {"language": self.language, "segments": [asdict(s) for s in self.segments]}
+        )
+
+    @classmethod
+    def from_json(cls, text: str) -> "Transcript":
+        data = json.loads(text)
+        return cls(data["language"], [SubtitleSegment(**s) for s in data["segments"]])
+
+
+class StubEngine:
+    """Placeholder engine: English ``"stub"`` captions every few seconds."""
+
+    name = "stub"
+
+    def __init__(self, model: str) -> None:
+        self.model = model
+
+    def transcribe(self, path: str, language: Optional[str]) -> Tuple[str, List[SubtitleSegment]]:
+        from .mediainfo import probe  # local import: only needed for the duration
+
+        try:
+            duration = probe(path).duration
+        except RuntimeError:
+            duration = 0.0
+        segments = []
+        t = 0.0
+        while t < duration:
+            segments.append(SubtitleSegment(t, min(t + STUB_SEGMENT_SEC, duration), "stub"))
+            t += STUB_SEGMENT_SEC
+        return language or "en", segments
+
+
+class FasterWhisperEngine:
+    """CTranslate2 Whisper via the ``faster-whisper`` package."""
+
+    name = "faster-whisper"
+
+    @staticmethod
+    def available() -> bool:
+        return faster_whisper is not None
+
+    def __init__(self, model: str) -> None:
+        if faster_whisper is None:
+            raise RuntimeError("faster-whisper is not installed")
+        self.model = faster_whisper.WhisperModel(model, device="auto", compute_type="default")
+
+    def transcribe(self, path: str, language: Optional[str]) -> Tuple[str, List[SubtitleSegment]]:
+        segments, info = self.model.transcribe(path, language=language, vad_filter=True)
+        out = [SubtitleSegment(s.start, s.end, s.text.strip()) for s in segments]
+        return info.language, out
+
+
+ENGINES: Dict[str, Callable[[str], object]] = {
+    StubEngine.name: StubEngine,
+    FasterWhisperEngine.name: FasterWhisperEngine,
+}
+
+
+class TranscriptionService:
+    """Process-wide transcription with model reuse and transcript caching."""
+
+    def __init__(self, engine: Optional[str] = None, cache: Optional[DiskCache] = None) -> None:
+        self.engine = engine or config.ASR_ENGINE
+        self.cache = cache or DiskCache("transcripts")
+        self._models: Dict[Tuple[str, str], object] = {}
+        self._transcripts: Dict[str, Transcript] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    def _fallback(self, reason: object) -> None:
+        log.warning("ASR engine %s unavailable (%s); using stub", self.engine, reason)
+        self.engine = StubEngine.name
+
+    def _engine_name(self) -> str:
+        """Resolve the engine that will run, without loading a model.
+
+        Engines whose factory reports ``available() == False`` (or that
+        are not registered) are replaced by the stub up front, so cache
+        keys always name the engine that produced the transcript.
+        """
+
+        with self._lock:
+            factory = ENGINES.get(self.engine)
+            if factory is None:
+                self._fallback(f"unknown ASR engine {self.engine!r}")
+            elif not getattr(factory, "available", lambda: True)():
+                self._fallback("not installed")
+            return self.engine
+
+    def _model(self, model: str):
+        """Return the engine instance for ``model``, loading it on first use."""
+
+        self._engine_name()
+        with self._lock:
+            key = (self.engine, model)
+            if key not in self._models:
+                try:
+                    self._models[key] = ENGINES[self.engine](model)
+                except RuntimeError as exc:
+                    self._fallback(exc)
+                    key = (self.engine, model)
+                    self._models[key] = StubEngine(model)
+            return self._models[key]
+
+    def transcript(self, path: str | Path, model: str, language: Optional[str] = None) -> Transcript:
+        """Return the transcript of the whole of ``path``.
+
+        Inference runs at most once per (source, engine, model, language);
+        concurrent callers for the same source wait for the first one.
+        The cache key always names the engine that actually ran.
+        """
+
+        path = str(path)
+        engine = self._engine_name()
+        key = make_key(file_fingerprint(path), engine, model, language or "auto")
+        with self._lock:
+            lock = self._key_locks.setdefault(key, threading.Lock())
+        with lock:
+            cached = self._transcripts.get(key)
+            if cached is not None:
+                return cached
+            entry = self.cache.get(key)
+            transcript = None
+            if entry is not None:
+                try:
+                    transcript = Transcript.from_json((entry / "transcript.json").read_text())
+                except (OSError, ValueError, KeyError, TypeError):
+                    transcript = None  # corrupt entry, transcribe again
+            if transcript is None:
+                runner = self._model(model)
+                if self.engine != engine:
+                    # the model failed to load and the stub took over
+                    return self.transcript(path, model, language)
+                lang, segments = runner.transcribe(path, language)
+                transcript = Transcript(lang, segments)
+                with self.cache.put(key) as tmp:
+                    (tmp / "transcript.json").write_text(transcript.to_json())
+            self._transcripts[key] = transcript
+            return transcript
+
+    def segments(
+        self,
+        path: str | Path,
+        start_s: float,
+        dur_s: float,
+        model: str,
+        language: Optional[str] = None,
+    ) -> Tuple[str, List[SubtitleSegment]]:
+        """Return ``(language, segments)`` for one window of ``path``."""
+
+        transcript = self.transcript(path, model, language)
+        return transcript.language, transcript.slice(start_s, start_s + dur_s)
+
+
+_SERVICE: Optional[TranscriptionService] = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def get_service() -> TranscriptionService:
+    """Return the shared per-process :class:`TranscriptionService`."""
+
+    global _SERVICE
+    with _SERVICE_LOCK:
+        if _SERVICE is None:
+            _SERVICE = TranscriptionService()
+        return _SERVICE
@@ -0,0 +1,86 @@
+"""Encoder profile benchmark.
+
+:func:`bench_encode` encodes a synthetic ``testsrc2`` pattern at
+``TARGET_W`` x ``TARGET_H`` once per encoder profile and reports the
+encoding speed, the CPU time consumed by ffmpeg and the output size, so
+per-host settings can be chosen from measurements.  Every encode goes
+through :func:`.ffmpeg_utils.run_tool`, so timings come from its
+per-process :class:`~.ffmpeg_utils.RunStats` and the process cap applies.
+"""
+from __future__ import annotations
+
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from . import config
+from .ffmpeg_utils import collect_runs, find_ffmpeg, run_tool, x264_args
+
+
+@dataclass
+class BenchResult:
+    profile: str
+    frames: int
+    wall_s: float
+    cpu_s: Optional[float]
+    size_bytes: int
+
+    @property
+    def fps(self) -> float:
+        return self.frames / self.wall_s if self.wall_s else 0.0
+
+
+def bench_encode(
+    profiles: Optional[Iterable[str]] = None,
+    duration: float = 10.0,
+    fps: int = config.OUTPUT_FPS,
+) -> List[BenchResult]:
+    """Encode a test pattern with every profile and return the results.
+
+    Wall and CPU time are those of each ffmpeg process itself, so other
+    processes running at the same time do not skew them.
+    """
+
+    ffmpeg = find_ffmpeg()
+    names = list(profiles or config.ENCODER_PROFILES)
+    source = f"testsrc2=size={config.TARGET_W}x{config.TARGET_H}:rate={fps}:duration={duration}"
+    results: List[BenchResult] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in names:
+            out = Path(tmp) / f"{name}.mp4"
+            cmd = [
+                ffmpeg,
+                "-y",
+                "-v",
+                "error",
+                "-f",
+                "lavfi",
+                "-i",
+                source,
+                *x264_args(name),
+                "-pix_fmt",
+                "yuv420p",
+                str(out),
+            ]
+            with collect_runs() as report:
+                run_tool(cmd, tag="bench")
+            (stats,) = report.runs
+            results.append(
+                BenchResult(
+                    name, int(round(duration * fps)), stats.wall_s, stats.cpu_s, out.stat().st_size
+                )
+            )
+    return results
+
+
+def format_results(results: Iterable[BenchResult]) -> str:
+    """Render results as a fixed-width table."""
+
+    lines = [f"{'profile':<12} {'fps':>8} {'wall s':>8} {'cpu s':>8} {'size KiB':>10}"]
+    for r in results:
+        cpu = f"{r.cpu_s:8.2f}" if r.cpu_s is not None else f"{'n/a':>8}"
+        lines.append(
+            f"{r.profile:<12} {r.fps:8.1f} {r.wall_s:8.2f} {cpu} {r.size_bytes / 1024:10.1f}"
+        )
+    return "\n".join(lines)
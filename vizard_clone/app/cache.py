@@ -0,0 +1,129 @@
+"""Small on-disk cache shared by the analysis stages.
+
+Entries are directories under ``config.TEMP/cache/<namespace>`` so each
+stage can store whatever files suit it (``.npy`` arrays, JSON, audio).
+Entries are published atomically by renaming a fully written temporary
+directory, and the least recently used entries are evicted once the
+namespace grows beyond its size cap.
+"""
+from __future__ import annotations
+
+import errno
+import hashlib
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from . import config
+
+FINGERPRINT_BLOCK = 1 << 20
+_STAMP = ".stamp"
+
+
+def file_fingerprint(path: str | Path, block: int = FINGERPRINT_BLOCK) -> str:
+    """Return a cheap content fingerprint for ``path``.
+
+    The fingerprint combines file size and mtime with a hash of the first
+    and last ``block`` bytes, which is enough to notice re-encoded or
+    replaced files without reading multi-gigabyte sources in full.
+    """
+
+    path = Path(path)
+    st = path.stat()
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{st.st_size}:{st.st_mtime_ns}".encode())
+    with path.open("rb") as fh:
+        h.update(fh.read(block))
+        if st.st_size > block:
+            fh.seek(max(block, st.st_size - block))
+            h.update(fh.read(block))
+    return h.hexdigest()
+
+
+def make_key(*parts: object) -> str:
+    """Hash arbitrary key parts into a filesystem friendly string."""
+
+    return hashlib.blake2b("\x1f".join(map(str, parts)).encode(), digest_size=16).hexdigest()
+
+
+class DiskCache:
+    """Directory-per-entry cache with an LRU size cap."""
+
+    def __init__(
+        self,
+        namespace: str,
+        root: str | Path | None = None,
+        max_bytes: int | None = None,
+    ) -> None:
+        self.root = Path(root or config.TEMP) / "cache" / namespace
+        self.max_bytes = config.CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    def path(self, key: str) -> Path:
+        return self.root / key
+
+    def get(self, key: str) -> Optional[Path]:
+        """Return the entry directory for ``key`` or ``None`` on a miss."""
+
+        entry = self.path(key)
+        stamp = entry / _STAMP
+        if not stamp.exists():
+            return None
+        try:
+            os.utime(stamp)  # mark as recently used
+        except OSError:  # pragma: no cover - evicted concurrently
+            return None
+        return entry
+
+    @contextmanager
+    def put(self, key: str) -> Iterator[Path]:
+        """Yield a scratch directory that becomes the entry for ``key``.
+
+        The entry only becomes visible if the ``with`` block succeeds.
+        """
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.root))
+        try:
+            yield tmp
+            (tmp / _STAMP).touch()
+            entry = self.path(key)
+            if entry.exists():
+                shutil.rmtree(entry, ignore_errors=True)
+            try:
+                os.replace(tmp, entry)
+            except OSError as exc:
+                # Another writer published the same key between the rmtree
+                # and the rename; its entry is equivalent, so keep it.
+                if exc.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                    raise
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop least recently used entries until under ``max_bytes``."""
+
+        if not self.root.exists():
+            return
+        entries = []
+        total = 0
+        for entry in self.root.iterdir():
+            stamp = entry / _STAMP
+            if not stamp.exists():
+                continue
+            size = sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+            entries.append((stamp.stat().st_mtime, size, entry))
+            total += size
+        entries.sort()
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
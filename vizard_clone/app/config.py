@@ -21,31 +21,79 @@ ASPECT = 9 / 16
 TOP_N = 5
 WINDOW_CANDIDATES = (60, 45, 30)
 STEP = 5
-SCENE_THRESHOLD = 27.0
+# Scene cut thresholds; each belongs to one frame-difference metric.
+SCENE_THRESHOLD = 27.0  # mean HSV change (detect_scenes, PySceneDetect scale)
+SCENE_LUMA_THRESHOLD = 30.0  # mean luma change (analysis; ffmpeg scene score 0.3)
 SAMPLE_HZ = 6
+ANALYSIS_W = 160  # frame size used by the analysis decoders
+ANALYSIS_H = 90
+FOCUS_W = 64  # frame size used by focus tracking
+FOCUS_H = 36
 SMOOTH_SEC = 0.5
 ZOOM_MIN = 1.00
 ZOOM_MAX = 1.10
 ZOOM_PERIOD = 6.0
 
+# Subtitle style for burn-in, in TARGET_W x TARGET_H pixels
+SUB_FONT = "Arial"
+SUB_FONT_SIZE = 64
+SUB_MARGIN_H = 80
+SUB_MARGIN_V = 320
+
+# Worker pools of the staged clip executor (see pipeline.process_video)
+CPU_WORKERS = 1  # transcription / focus tracking
+ENCODE_WORKERS = 2  # ffmpeg encodes
+
+CACHE_MAX_BYTES = 2 * 1024**3  # per cache namespace under TEMP/cache
+
+# Named x264 encoder profiles.  ``threads=0`` lets x264 pick; ``tune=None``
+# leaves x264's default tuning.  Use ``vizard_clone bench-encode`` to
+# compare them on a given host.
+ENCODER_PROFILES = {
+    "throughput": {"preset": "ultrafast", "tune": "fastdecode", "crf": 23, "threads": 0},
+    "balanced": {"preset": "veryfast", "tune": None, "crf": 20, "threads": 0},
+    "quality": {"preset": "slow", "tune": "film", "crf": 18, "threads": 0},
+}
+ENCODER_PROFILE = os.getenv("ENCODER_PROFILE", "balanced")
+
+# "graph" renders each clip with a single ffmpeg filter graph; "chain" is
+# the legacy PNG -> MP4 -> mux -> burn-in sequence.
+RENDER_MODE = "graph"
+OUTPUT_FPS = 30
+
 PRENORMALIZE = True
+NORMALIZE_JOBS = int(os.getenv("NORMALIZE_JOBS", "1"))  # >1: keyframe-chunked encode
+NORMALIZE_SPEED = 4.0  # assumed full re-encode speed (x realtime) for reports
 AUTO_FFMPEG = True
 FFMPEG_PATH = None  # optional manual override
 
 WHISPER_MODEL = "small"
 LANG_AUTO = True
+ASR_ENGINE = os.getenv("ASR_ENGINE", "faster-whisper")  # or "stub"
+ASR_LANGUAGE = os.getenv("ASR_LANGUAGE", "en")  # used when LANG_AUTO is off
 
 TTS_ENGINE = os.getenv("TTS_ENGINE", "edge")
 TTS_VOICE = os.getenv("TTS_VOICE", "ru-RU-DariyaNeural")
 
 TRANSLATE_ENGINE = os.getenv("TRANSLATE_ENGINE", "argos")
 
+DUB_ENABLED = False  # replace the clip audio with a translated TTS track
+DUB_LANGUAGE = os.getenv("DUB_LANGUAGE", "ru")
+
 # YouTube / uploader settings
 YTB_CLIENT_SECRET_FILE = os.getenv("YTB_CLIENT_SECRET_FILE")
 YTB_SCOPES = ["https://www.googleapis.com/auth/youtube.upload"]
 CHANNEL_ID = os.getenv("CHANNEL_ID")
 AUTO_UPLOAD = False
 REQUIRE_APPROVAL = True
+UPLOAD_WORKERS = 2  # concurrent uploads of the scheduler
+UPLOAD_RETRIES = 3
+UPLOAD_BACKOFF = 30.0  # seconds before the first retry, doubled per attempt
+UPLOAD_URL = os.getenv("UPLOAD_URL", "")  # resumable endpoint; empty: stub uploads
+UPLOAD_CHUNK = 8 * 1024 * 1024  # bytes per request
+UPLOAD_PER_CHANNEL = 2  # concurrent uploads per channel
+
+PREVIEW_PAGE_SIZE = 50  # clips per review page
 
 
 @dataclass
@@ -0,0 +1,280 @@
+"""Translation and text-to-speech dubbing.
+
+The dubbing stage works on the cached source transcript from :mod:`.asr`:
+
+* :meth:`Dubber.translated` translates every segment of a source in one
+  batch (duplicates removed) and memoises the result in-process and in
+  the ``translations`` cache namespace, so the windows of a source share
+  a single translation call.
+* :meth:`Dubber.speech` synthesises each unique ``(text, voice)`` pair
+  once; audio is stored in the content-addressed ``tts`` cache, so
+  repeated phrases and re-renders cost nothing.
+* :func:`assemble_track` places the phrases of a window on a silent
+  timeline with a single ffmpeg ``adelay``/``amix`` graph.
+
+Engines are looked up by name in :data:`TRANSLATORS`
+(``config.TRANSLATE_ENGINE``) and :data:`TTS_ENGINES`
+(``config.TTS_ENGINE``).  The ``argos`` and ``edge`` engines need their
+optional packages; when they are missing the stage warns once and uses
+the offline ``stub`` engines.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import wave
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import config
+from .asr import Transcript, get_service
+from .cache import DiskCache, make_key
+from .ffmpeg_utils import _run, find_ffmpeg, make_silence
+from .subs import SubtitleSegment
+
+try:  # pragma: no cover - optional dependency
+    import argostranslate.translate as argos_translate
+except Exception:  # pragma: no cover
+    argos_translate = None  # type: ignore
+
+try:  # pragma: no cover - optional dependency
+    import edge_tts
+except Exception:  # pragma: no cover
+    edge_tts = None  # type: ignore
+
+log = logging.getLogger(__name__)
+
+STUB_RATE = 16000
+STUB_SEC_PER_CHAR = 0.06
+
+
+class StubTranslator:
+    """Returns the text unchanged."""
+
+    name = "stub"
+
+    def translate_batch(self, texts: Sequence[str], source: str, target: str) -> List[str]:
+        return list(texts)
+
+
+class ArgosTranslator:
+    """Offline translation with Argos Translate (installed language packs)."""
+
+    name = "argos"
+
+    def __init__(self) -> None:
+        if argos_translate is None:
+            raise RuntimeError("argostranslate is not installed")
+
+    def translate_batch(self, texts: Sequence[str], source: str, target: str) -> List[str]:
+        translation = argos_translate.get_translation_from_codes(source, target)
+        return [translation.translate(t) for t in texts]
+
+
+class StubTTS:
+    """Writes a quiet tone whose length follows the text length."""
+
+    name = "stub"
+    suffix = ".wav"
+
+    def synthesize(self, text: str, voice: str, out: Path) -> None:
+        n = int(STUB_RATE * max(0.3, STUB_SEC_PER_CHAR * len(text)))
+        t = np.arange(n) / STUB_RATE
+        samples = (0.1 * 32767 * np.sin(2 * np.pi * 220 * t)).astype("<i2")
+        with wave.open(str(out), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(STUB_RATE)
+            wav.writeframes(samples.tobytes())
+
+
+class EdgeTTS:
+    """Microsoft Edge online voices via the ``edge-tts`` package."""
+
+    name = "edge"
+    suffix = ".mp3"
+
+    def __init__(self) -> None:
+        if edge_tts is None:
+            raise RuntimeError("edge-tts is not installed")
+
+    def synthesize(self, text: str, voice: str, out: Path) -> None:
+        asyncio.run(edge_tts.Communicate(text, voice).save(str(out)))
+
+
+TRANSLATORS: Dict[str, Callable[[], object]] = {
+    StubTranslator.name: StubTranslator,
+    ArgosTranslator.name: ArgosTranslator,
+}
+TTS_ENGINES: Dict[str, Callable[[], object]] = {
+    StubTTS.name: StubTTS,
+    EdgeTTS.name: EdgeTTS,
+}
+
+
+def _load(registry: Dict[str, Callable[[], object]], name: str, kind: str):
+    factory = registry.get(name)
+    try:
+        if factory is None:
+            raise RuntimeError(f"unknown {kind} engine {name!r}")
+        return factory()
+    except RuntimeError as exc:
+        log.warning("%s engine %s unavailable (%s); using stub", kind, name, exc)
+        return registry["stub"]()
+
+
+def assemble_track(
+    phrases: Sequence[Tuple[float, Path]], duration: float, out: str | Path
+) -> Path:
+    """Mix ``(start_s, audio)`` phrases into one track of ``duration`` s.
+
+    All phrases go through one ffmpeg call: each input is delayed to its
+    start, the inputs are summed with ``amix`` (no level normalisation)
+    and the result is padded/trimmed to ``duration``.  Without phrases
+    the track is plain silence.
+    """
+
+    out = Path(out)
+    if not phrases:
+        return make_silence(duration, out)
+    cmd = [find_ffmpeg(), "-y", "-v", "error"]
+    chains = []
+    for idx, (start, audio) in enumerate(phrases):
+        cmd += ["-i", str(audio)]
+        delay = max(0, round(start * 1000))
+        chains.append(
+            f"[{idx}:a]aformat=sample_rates=44100:channel_layouts=stereo,"
+            f"adelay=delays={delay}:all=1[d{idx}]"
+        )
+    inputs = "".join(f"[d{i}]" for i in range(len(phrases)))
+    chains.append(
+        f"{inputs}amix=inputs={len(phrases)}:duration=longest:normalize=0,"
+        f"apad,atrim=0:{duration}[dub]"
+    )
+    cmd += ["-filter_complex", ";".join(chains), "-map", "[dub]", "-ar", "44100", "-ac", "2", str(out)]
+    _run(cmd, tag="dub")
+    return out
+
+
+class Dubber:
+    """Process-wide translation and speech synthesis with caching."""
+
+    def __init__(
+        self,
+        translator: Optional[str] = None,
+        tts: Optional[str] = None,
+        root: str | Path | None = None,
+    ) -> None:
+        self.translator = _load(TRANSLATORS, translator or config.TRANSLATE_ENGINE, "translation")
+        self.tts = _load(TTS_ENGINES, tts or config.TTS_ENGINE, "TTS")
+        self.translations = DiskCache("translations", root=root)
+        self.audio = DiskCache("tts", root=root)
+        self._translated: Dict[str, Transcript] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def translated(self, transcript: Transcript, target: str) -> Transcript:
+        """Return ``transcript`` translated to ``target``.
+
+        All distinct segment texts are translated in a single batch call.
+        The result is cached by a hash of the transcript itself (language,
+        texts and timings), the engine and the target language, so a
+        re-transcription with another ASR engine or model is translated
+        again.  Concurrent callers for the same key wait for the first one.
+        """
+
+        key = make_key(make_key(transcript.to_json()), self.translator.name, target)
+        with self._key_lock(key):
+            cached = self._translated.get(key)
+            if cached is not None:
+                return cached
+            entry = self.translations.get(key)
+            result = None
+            if entry is not None:
+                try:
+                    result = Transcript.from_json((entry / "transcript.json").read_text())
+                except (OSError, ValueError, KeyError, TypeError):
+                    result = None  # corrupt entry, translate again
+            if result is None:
+                if transcript.language == target:
+                    texts = {}
+                else:
+                    unique = list(dict.fromkeys(s.text for s in transcript.segments))
+                    batch = self.translator.translate_batch(unique, transcript.language, target)
+                    texts = dict(zip(unique, batch))
+                result = Transcript(
+                    target,
+                    [SubtitleSegment(s.start, s.end, texts.get(s.text, s.text)) for s in transcript.segments],
+                )
+                with self.translations.put(key) as tmp:
+                    (tmp / "transcript.json").write_text(result.to_json())
+            self._translated[key] = result
+            return result
+
+    def speech(self, text: str, voice: str) -> Path:
+        """Return the cached audio file for ``text`` spoken by ``voice``.
+
+        Concurrent callers for the same phrase wait for the first one
+        instead of synthesising it again.
+        """
+
+        key = make_key(self.tts.name, voice, text)
+        name = "speech" + self.tts.suffix
+        with self._key_lock(key):
+            entry = self.audio.get(key)
+            if entry is None:
+                with self.audio.put(key) as tmp:
+                    self.tts.synthesize(text, voice, tmp / name)
+                entry = self.audio.path(key)
+            return entry / name
+
+    def dub_window(
+        self,
+        source: str | Path,
+        start_s: float,
+        dur_s: float,
+        out: str | Path,
+        target: Optional[str] = None,
+        voice: Optional[str] = None,
+    ) -> Path:
+        """Write the dub track for one window of ``source`` to ``out``.
+
+        The track starts at the window start (clip time).
+        """
+
+        target = target or config.DUB_LANGUAGE
+        voice = voice or config.TTS_VOICE
+        service = get_service()
+        language = None if config.LANG_AUTO else config.ASR_LANGUAGE
+        transcript = service.transcript(source, config.WHISPER_MODEL, language)
+        window = self.translated(transcript, target).slice(start_s, start_s + dur_s)
+        audio: Dict[str, Path] = {}
+        phrases = []
+        for seg in window:
+            if not seg.text.strip():
+                continue
+            if seg.text not in audio:
+                audio[seg.text] = self.speech(seg.text, voice)
+            phrases.append((seg.start - start_s, audio[seg.text]))
+        return assemble_track(phrases, dur_s, out)
+
+
+_DUBBER: Optional[Dubber] = None
+_DUBBER_LOCK = threading.Lock()
+
+
+def get_dubber() -> Dubber:
+    """Return the shared per-process :class:`Dubber`."""
+
+    global _DUBBER
+    with _DUBBER_LOCK:
+        if _DUBBER is None:
+            _DUBBER = Dubber()
+        return _DUBBER
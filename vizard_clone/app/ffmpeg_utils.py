@@ -8,16 +8,28 @@ specification so that the stubs can be expanded in the future.
 """
 from __future__ import annotations
 
+import contextvars
+import functools
+import json
 import os
 import shutil
 import subprocess
-import tempfile
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Deque, Dict, Iterator, List, Optional, TypeVar
 
 from . import config
 
 
+T = TypeVar("T")
+
+
 class FFMpegError(RuntimeError):
     """Raised when ffmpeg failed to produce the expected output."""
 
@@ -30,10 +42,18 @@ def find_ffmpeg() -> str:
     Windows default ``D:\\ffmpeg\\bin\\ffmpeg.exe``.  The return value is
     guaranteed to be a string; if the executable cannot be located a
     ``RuntimeError`` is raised.
+
+    The lookup is cached per ``config.FFMPEG_PATH`` value, so the ``PATH``
+    scan happens once per process rather than once per invocation.
     """
 
-    if config.FFMPEG_PATH and Path(config.FFMPEG_PATH).exists():
-        return str(config.FFMPEG_PATH)
+    return _locate_ffmpeg(config.FFMPEG_PATH)
+
+
+@functools.lru_cache(maxsize=8)
+def _locate_ffmpeg(override: Optional[str]) -> str:
+    if override and Path(override).exists():
+        return str(override)
 
     path = shutil.which("ffmpeg")
     if path:
@@ -46,13 +66,286 @@ def find_ffmpeg() -> str:
     raise RuntimeError("ffmpeg executable not found")
 
 
-def _run(cmd: list[str]) -> None:
+_SLOTS: Optional[threading.BoundedSemaphore] = None
+# Set while the current context holds a slot; nested runs reuse it
+_SLOT_HELD: ContextVar[bool] = ContextVar("ffmpeg_slot_held", default=False)
+
+
+def set_max_processes(limit: Optional[int]) -> None:
+    """Bound the number of ffmpeg processes running at the same time.
+
+    ``None`` or ``0`` removes the limit.  The limit is process wide and is
+    shared by every thread that launches ffmpeg through this module.
+    """
+
+    global _SLOTS
+    _SLOTS = threading.BoundedSemaphore(limit) if limit else None
+
+
+@contextmanager
+def process_slot() -> Iterator[None]:
+    """Hold one of the ffmpeg process slots for the duration of the block.
+
+    The slot is re-entrant per :mod:`contextvars` context: a tool started
+    while the caller already holds a slot (e.g. while consuming an
+    :func:`open_pipe` stream, or from workers bound with
+    :func:`in_context` inside the block) runs under that slot instead of
+    waiting for another one, which with a limit of 1 would deadlock.
+    """
+
+    slots = _SLOTS
+    if slots is None or _SLOT_HELD.get():
+        yield
+        return
+    with slots:
+        _SLOT_HELD.set(True)
+        try:
+            yield
+        finally:
+            _SLOT_HELD.set(False)
+
+
+# ---------------------------------------------------------------------------
+# Instrumentation
+
+STDERR_TAIL_LINES = 50
+
+
+@dataclass
+class RunStats:
+    """Resource usage of one ffmpeg/ffprobe invocation."""
+
+    tag: str
+    program: str
+    wall_s: float
+    cpu_s: Optional[float]
+    max_rss_kb: Optional[int]
+    returncode: int
+    stderr_tail: str = ""
+
+
+@dataclass
+class RunReport:
+    """Collects :class:`RunStats` for every invocation inside :func:`collect_runs`."""
+
+    runs: List[RunStats] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, stats: RunStats) -> None:
+        with self._lock:
+            self.runs.append(stats)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Aggregate count, wall and CPU seconds per tag."""
+
+        out: Dict[str, Dict[str, float]] = {}
+        for r in list(self.runs):
+            agg = out.setdefault(r.tag, {"count": 0, "wall_s": 0.0, "cpu_s": 0.0, "failed": 0})
+            agg["count"] += 1
+            agg["wall_s"] = round(agg["wall_s"] + r.wall_s, 3)
+            agg["cpu_s"] = round(agg["cpu_s"] + (r.cpu_s or 0.0), 3)
+            agg["failed"] += r.returncode != 0
+        return out
+
+    def to_json(self) -> str:
+        runs = [{k: v for k, v in asdict(r).items() if k != "stderr_tail" or r.returncode} for r in self.runs]
+        return json.dumps({"summary": self.summary(), "runs": runs}, indent=2)
+
+
+_REPORT: ContextVar[Optional[RunReport]] = ContextVar("ffmpeg_run_report", default=None)
+
+
+@contextmanager
+def collect_runs() -> Iterator[RunReport]:
+    """Record stats of every invocation made in this context.
+
+    The report travels with the current :mod:`contextvars` context, so
+    work submitted to thread pools must be run in a copy of it (see
+    :func:`in_context`).
+    """
+
+    report = RunReport()
+    token = _REPORT.set(report)
+    try:
+        yield report
+    finally:
+        _REPORT.reset(token)
+
+
+def in_context(fn: Callable[..., T]) -> Callable[..., T]:
+    """Bind ``fn`` to a copy of the current context for use in a pool.
+
+    Every call runs in its own copy, because a context can only be entered
+    by one thread at a time.
+    """
+
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.copy().run(fn, *args, **kwargs)
+
+
+def _drain_stderr(stream, tail: Deque[bytes]) -> None:
+    for line in iter(stream.readline, b""):
+        tail.append(line)
+    stream.close()
+
+
+def _wait(proc: subprocess.Popen):
+    """Wait for ``proc`` returning ``(returncode, rusage or None)``."""
+
+    if hasattr(os, "wait4"):
+        try:
+            _, status, usage = os.wait4(proc.pid, 0)
+        except ChildProcessError:  # pragma: no cover - already reaped
+            return proc.wait(), None
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        return proc.returncode, usage
+    return proc.wait(), None  # pragma: no cover - Windows
+
+
+class _Tracked:
+    """Launch a process, drain its stderr into a ring buffer and record stats."""
+
+    def __init__(self, cmd: list[str], tag: Optional[str], **popen) -> None:
+        self.cmd = cmd
+        self.tag = tag or Path(cmd[0]).stem
+        self.tail: Deque[bytes] = deque(maxlen=STDERR_TAIL_LINES)
+        self.t0 = time.perf_counter()
+        self.proc = subprocess.Popen(cmd, stderr=subprocess.PIPE, **popen)
+        self._reader = threading.Thread(
+            target=_drain_stderr, args=(self.proc.stderr, self.tail), daemon=True
+        )
+        self._reader.start()
+
+    @property
+    def stderr(self) -> str:
+        return b"".join(self.tail).decode("utf-8", "ignore")
+
+    def finish(self) -> int:
+        returncode, usage = _wait(self.proc)
+        self._reader.join()
+        cpu = rss = None
+        if usage is not None:
+            cpu = round(usage.ru_utime + usage.ru_stime, 3)
+            rss = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+        report = _REPORT.get()
+        if report is not None:
+            report.add(
+                RunStats(
+                    tag=self.tag,
+                    program=Path(self.cmd[0]).name,
+                    wall_s=round(time.perf_counter() - self.t0, 3),
+                    cpu_s=cpu,
+                    max_rss_kb=rss,
+                    returncode=returncode,
+                    stderr_tail=self.stderr if returncode else "",
+                )
+            )
+        return returncode
+
+
+def run_tool(
+    cmd: list[str],
+    tag: Optional[str] = None,
+    cwd: str | Path | None = None,
+    capture: bool = False,
+) -> bytes:
+    """Run *cmd*, returning its stdout when ``capture`` is true.
+
+    Raises :class:`FFMpegError` with the tail of stderr on failure.
+    """
+
+    with process_slot():
+        run = _Tracked(
+            cmd, tag, stdout=subprocess.PIPE if capture else subprocess.DEVNULL, cwd=cwd
+        )
+        out = run.proc.stdout.read() if capture else b""
+        if capture:
+            run.proc.stdout.close()
+        returncode = run.finish()
+    if returncode != 0:
+        raise FFMpegError(run.stderr)
+    return out
+
+
+def _run(cmd: list[str], cwd: str | Path | None = None, tag: Optional[str] = None) -> None:
     """Run *cmd* raising :class:`FFMpegError` on failure."""
 
+    run_tool(cmd, tag=tag, cwd=cwd)
+
+
+@contextmanager
+def open_pipe(
+    cmd: list[str], tag: Optional[str] = None, pass_fds: tuple = ()
+) -> Iterator[subprocess.Popen]:
+    """Run *cmd* with its stdout connected to a pipe.
+
+    The caller reads ``proc.stdout`` inside the ``with`` block.  stderr is
+    drained into a bounded ring buffer by a background thread so a chatty
+    ffmpeg can never block on a full pipe.  If the block exits early the
+    process is killed; otherwise a non-zero exit status raises
+    :class:`FFMpegError`.  ``pass_fds`` are inherited by the child, e.g.
+    for a second output pipe.
+
+    The process slot is held for the whole block; tools launched by the
+    consumer meanwhile share it (see :func:`process_slot`).
+    """
+
+    with process_slot():
+        run = _Tracked(cmd, tag, stdout=subprocess.PIPE, pass_fds=pass_fds)
+        proc = run.proc
+        finished = False
+        try:
+            yield proc
+            finished = True
+        finally:
+            if not finished and proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            returncode = run.finish()
+        if returncode != 0:
+            raise FFMpegError(run.stderr)
+
+
+def read_full(stream, buf: bytearray | memoryview) -> int:
+    """Fill *buf* from *stream* and return the number of bytes read.
+
+    Fewer than ``len(buf)`` bytes are only returned at end of stream.
+    """
+
+    view = memoryview(buf)
+    got = 0
+    while got < len(view):
+        n = stream.readinto(view[got:])
+        if not n:
+            break
+        got += n
+    return got
+
+
+def read_exact(stream, buf: bytearray | memoryview) -> bool:
+    """Fill *buf* from *stream*; return ``False`` on a clean or short EOF."""
+
+    return read_full(stream, buf) == len(buf)
+
+
+def x264_args(profile: Optional[str] = None) -> list[str]:
+    """Return libx264 encoder arguments for a named encoder profile.
+
+    ``profile`` defaults to ``config.ENCODER_PROFILE``; see
+    ``config.ENCODER_PROFILES`` for the available names.
+    """
+
+    name = profile or config.ENCODER_PROFILE
     try:
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    except subprocess.CalledProcessError as exc:  # pragma: no cover - exercised in tests
-        raise FFMpegError(exc.stderr.decode("utf-8", "ignore")) from exc
+        settings = config.ENCODER_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"unknown encoder profile: {name!r}") from None
+    args = ["-c:v", "libx264", "-preset", settings["preset"], "-crf", str(settings["crf"])]
+    if settings.get("tune"):
+        args += ["-tune", settings["tune"]]
+    if settings.get("threads") is not None:
+        args += ["-threads", str(settings["threads"])]
+    return args
 
 
 def pngs_to_mp4(frames_dir: str | Path, fps: int, out_mp4: str | Path) -> Path:
@@ -79,18 +372,80 @@ def pngs_to_mp4(frames_dir: str | Path, fps: int, out_mp4: str | Path) -> Path:
         str(fps),
         "-i",
         str(frames / "%04d.png"),
-        "-c:v",
-        "libx264",
+        *x264_args(),
         "-pix_fmt",
         "yuv420p",
         "-movflags",
         "+faststart",
         str(out_mp4),
     ]
-    _run(cmd)
+    _run(cmd, tag="pngs_to_mp4")
     return out_mp4
 
 
+def find_ffprobe() -> Optional[str]:
+    """Return the ffprobe executable next to ffmpeg, or ``None``."""
+
+    try:
+        ffmpeg = Path(find_ffmpeg())
+    except RuntimeError:
+        ffmpeg = None
+    if ffmpeg is not None:
+        sibling = ffmpeg.with_name(ffmpeg.name.replace("ffmpeg", "ffprobe"))
+        if sibling != ffmpeg and sibling.exists():
+            return str(sibling)
+    return shutil.which("ffprobe")
+
+
+def audio_codec(source: str | Path) -> Optional[str]:
+    """Return the codec of the first audio stream of ``source``.
+
+    An empty string means the file is missing, unreadable or has no
+    audio; ``None`` means ffprobe is unavailable and the answer is
+    unknown.  Metadata comes from :func:`.mediainfo.probe`, so each
+    source is probed once.
+    """
+
+    from .mediainfo import probe  # local import: mediainfo imports this module
+
+    if not os.path.exists(source):
+        return ""
+    try:
+        info = probe(source)
+    except RuntimeError as exc:
+        if isinstance(exc, FFMpegError):
+            return ""
+        return None
+    return info.audio.codec_name if info.audio else ""
+
+
+def _mux_cmd(
+    ffmpeg: str,
+    video_silent: Path,
+    audio_input: list[str],
+    audio_codec_args: list[str],
+    out_mp4: Path,
+) -> list[str]:
+    return [
+        ffmpeg,
+        "-y",
+        "-i",
+        str(video_silent),
+        *audio_input,
+        "-map",
+        "0:v:0",
+        "-map",
+        "1:a:0",
+        "-c:v",
+        "copy",
+        *audio_codec_args,
+        str(out_mp4),
+    ]
+
+
+_AAC_ENCODE = ["-c:a", "aac", "-ar", "44100", "-ac", "2"]
+
+
 def mux_video_with_audio(
     video_silent: str | Path,
     source: str | Path,
@@ -100,10 +455,17 @@ def mux_video_with_audio(
 ) -> Path:
     """Mux ``video_silent`` with an audio segment from ``source``.
 
-    The function tries three strategies as described in the project
-    specification.  The first two strategies reuse audio from ``source``.
-    If they fail a final attempt creates a silent audio track to ensure
-    ``out_mp4`` is always produced.
+    The audio stream of ``source`` is probed once (and cached) so the
+    right strategy is chosen up front and each clip costs a single
+    ffmpeg run:
+
+    * AAC audio is stream-copied from the seeked source;
+    * any other audio codec is re-encoded to AAC;
+    * a missing source or one without audio gets a generated silent
+      track from ``anullsrc``.
+
+    If the chosen strategy fails anyway the silent track is used as a
+    last resort so ``out_mp4`` is always produced.
     """
 
     ffmpeg = find_ffmpeg()
@@ -111,94 +473,33 @@ def mux_video_with_audio(
     source = Path(source)
     out_mp4 = Path(out_mp4)
 
-    # Strategy 1: re-encode audio directly from source.
-    cmd1 = [
-        ffmpeg,
-        "-y",
-        "-i",
-        str(video_silent),
-        "-ss",
-        str(start_s),
+    segment = ["-ss", str(start_s), "-t", str(dur_s), "-i", str(source)]
+    silence = [
+        "-f",
+        "lavfi",
         "-t",
         str(dur_s),
         "-i",
-        str(source),
-        "-map",
-        "0:v:0",
-        "-map",
-        "1:a:0",
-        "-c:v",
-        "copy",
-        "-c:a",
-        "aac",
-        "-ar",
-        "44100",
-        "-ac",
-        "2",
-        str(out_mp4),
+        "anullsrc=channel_layout=stereo:sample_rate=44100",
     ]
-    try:
-        _run(cmd1)
-        return out_mp4
-    except FFMpegError:
-        pass  # fall back
-
-    # Strategy 2: extract audio first then mux.
-    with tempfile.TemporaryDirectory() as tmp:
-        audio_tmp = Path(tmp) / "segment.m4a"
-        cmd_extract = [
-            ffmpeg,
-            "-y",
-            "-ss",
-            str(start_s),
-            "-t",
-            str(dur_s),
-            "-i",
-            str(source),
-            "-c:a",
-            "aac",
-            "-ar",
-            "44100",
-            "-ac",
-            "2",
-            str(audio_tmp),
-        ]
+
+    codec = audio_codec(source)
+    if codec == "aac":
+        attempts = [(segment, ["-c:a", "copy"]), (segment, _AAC_ENCODE)]
+    elif codec or codec is None:  # None (unknown): try the source first
+        attempts = [(segment, _AAC_ENCODE)]
+    else:
+        attempts = []
+    attempts.append((silence, _AAC_ENCODE))
+
+    for audio_input, codec_args in attempts[:-1]:
         try:
-            _run(cmd_extract)
-            cmd_mux = [
-                ffmpeg,
-                "-y",
-                "-i",
-                str(video_silent),
-                "-i",
-                str(audio_tmp),
-                "-c",
-                "copy",
-                str(out_mp4),
-            ]
-            _run(cmd_mux)
+            _run(_mux_cmd(ffmpeg, video_silent, audio_input, codec_args, out_mp4), tag="mux")
             return out_mp4
         except FFMpegError:
             pass  # fall back
-
-    # Strategy 3: generate silence.
-    with tempfile.TemporaryDirectory() as tmp:
-        silence = Path(tmp) / "silence.m4a"
-        make_silence(dur_s, silence)
-        cmd_mux = [
-            ffmpeg,
-            "-y",
-            "-i",
-            str(video_silent),
-            "-i",
-            str(silence),
-            "-c:v",
-            "copy",
-            "-c:a",
-            "aac",
-            str(out_mp4),
-        ]
-        _run(cmd_mux)
+    audio_input, codec_args = attempts[-1]
+    _run(_mux_cmd(ffmpeg, video_silent, audio_input, codec_args, out_mp4), tag="mux")
     return out_mp4
 
 
@@ -221,5 +522,5 @@ def make_silence(duration: float, out_audio: str | Path) -> Path:
         "anullsrc=channel_layout=stereo:sample_rate=44100",
         str(out_audio),
     ]
-    _run(cmd)
+    _run(cmd, tag="silence")
     return out_audio
@@ -1,14 +1,29 @@
-"""Focus tracking placeholder implementation.
+"""Focus tracking: a smooth virtual camera path for vertical crops.
 
-The real project computes saliency and motion based attention maps to
-produce a smooth virtual camera path.  Implementing this would require a
-number of heavy dependencies.  For the sake of the exercises this module
-contains lightweight stubs that document the intended interface.
+The path is driven by attention centroids sampled at ``config.SAMPLE_HZ``
+(for example saliency or motion centres of mass, in normalised ``0..1``
+coordinates).  :func:`compute_focus_path` smooths them over
+``config.SMOOTH_SEC``, interpolates them to the output frame rate and
+adds a slow zoom oscillation between ``config.ZOOM_MIN`` and
+``config.ZOOM_MAX`` with period ``config.ZOOM_PERIOD``.  Everything is
+vectorised and the result is stored as a struct of ``float32`` arrays
+rather than one object per frame.
+
+:func:`estimate_centroids` provides those centroids.  It only looks at
+``config.SAMPLE_HZ`` frames per second, decoded by ffmpeg straight to
+tiny grayscale images (``config.FOCUS_W`` x ``config.FOCUS_H``), so the
+cost scales with the number of samples rather than rendered frames.
+Each sample's attention map combines spectral-residual saliency with the
+frame difference to the previous sample.
 """
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import config, ffmpeg_utils
 
 
 dataclass = dataclass  # re-export for type checkers
@@ -21,11 +36,195 @@ class FocusPoint:
     zoom: float
 
 
-def compute_focus_path(num_frames: int, width: int, height: int) -> List[FocusPoint]:
-    """Return a list of ``FocusPoint`` objects describing the camera path.
+class FocusPath:
+    """Per-frame camera path stored as parallel ``float32`` arrays.
 
-    The stub simply centres the focus and applies a constant zoom of 1.0.
-    It is sufficient for tests that rely on deterministic behaviour.
+    Indexing and iteration yield :class:`FocusPoint` objects for
+    compatibility, but bulk consumers should use the ``x``, ``y`` and
+    ``zoom`` arrays directly.
     """
 
-    return [FocusPoint(width / 2, height / 2, 1.0) for _ in range(num_frames)]
+    __slots__ = ("x", "y", "zoom", "fps")
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, zoom: np.ndarray, fps: float) -> None:
+        self.x = np.asarray(x, dtype=np.float32)
+        self.y = np.asarray(y, dtype=np.float32)
+        self.zoom = np.asarray(zoom, dtype=np.float32)
+        self.fps = fps
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def __getitem__(self, idx: int) -> FocusPoint:
+        return FocusPoint(float(self.x[idx]), float(self.y[idx]), float(self.zoom[idx]))
+
+    def __iter__(self) -> Iterator[FocusPoint]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def crop_boxes(self, width: int, height: int, aspect: float = config.ASPECT) -> np.ndarray:
+        """Return an ``(n, 4)`` int array of ``w, h, x, y`` crop boxes.
+
+        Boxes have the requested ``aspect``, are shrunk by the zoom factor,
+        centred on the path and clamped to the ``width`` x ``height``
+        frame.  Sizes and offsets are even, as required by yuv420p.
+        """
+
+        base_w = min(width, height * aspect)
+        w = np.floor(base_w / self.zoom / 2) * 2
+        h = np.minimum(np.floor(w / aspect / 2) * 2, height - height % 2)
+        x = np.clip(self.x - w / 2, 0, width - w)
+        y = np.clip(self.y - h / 2, 0, height - h)
+        boxes = np.stack([w, h, np.floor(x / 2) * 2, np.floor(y / 2) * 2], axis=1)
+        return boxes.astype(np.int32)
+
+    def to_sendcmd(self, width: int, height: int, target: str = "crop") -> str:
+        """Export the path as an ffmpeg ``sendcmd`` script for a crop filter.
+
+        Only frames where the crop box changes produce a command, so a
+        static path collapses to a single line.
+        """
+
+        boxes = self.crop_boxes(width, height)
+        if not len(boxes):
+            return ""
+        changed = np.ones(len(boxes), dtype=bool)
+        changed[1:] = np.any(boxes[1:] != boxes[:-1], axis=1)
+        times = np.flatnonzero(changed) / self.fps
+        lines = [
+            f"{t:.3f} {target} w {w}, {target} h {h}, {target} x {x}, {target} y {y};"
+            for t, (w, h, x, y) in zip(times, boxes[changed])
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _smooth(values: np.ndarray, window: int) -> np.ndarray:
+    """Centred moving average with edge padding (keeps the length)."""
+
+    if window <= 1 or len(values) < 2:
+        return values
+    pad = window // 2
+    padded = np.pad(values, (pad, window - 1 - pad), mode="edge")
+    kernel = np.full(window, 1.0 / window)
+    return np.convolve(padded, kernel, mode="valid")
+
+
+def compute_focus_path(
+    num_frames: int,
+    width: int,
+    height: int,
+    centroids: Optional[Sequence[Tuple[float, float]]] = None,
+    sample_hz: float = config.SAMPLE_HZ,
+    fps: float = config.OUTPUT_FPS,
+) -> FocusPath:
+    """Return the camera path for ``num_frames`` output frames.
+
+    Parameters
+    ----------
+    num_frames:
+        Number of frames to produce.
+    width, height:
+        Source frame size; the path is returned in source pixels.
+    centroids:
+        Attention centres sampled at ``sample_hz`` in normalised ``0..1``
+        coordinates.  ``None`` keeps the focus centred.
+    sample_hz, fps:
+        Sampling rate of ``centroids`` and output frame rate.
+    """
+
+    t = np.arange(num_frames, dtype=np.float64) / fps
+    if centroids is None or len(centroids) == 0:
+        fx = np.full(num_frames, 0.5)
+        fy = np.full(num_frames, 0.5)
+    else:
+        c = np.asarray(centroids, dtype=np.float64).reshape(-1, 2)
+        window = max(1, int(round(config.SMOOTH_SEC * sample_hz)))
+        ts = np.arange(len(c), dtype=np.float64) / sample_hz
+        fx = np.interp(t, ts, _smooth(c[:, 0], window))
+        fy = np.interp(t, ts, _smooth(c[:, 1], window))
+
+    phase = 0.5 - 0.5 * np.cos(2 * np.pi * t / config.ZOOM_PERIOD)
+    zoom = config.ZOOM_MIN + (config.ZOOM_MAX - config.ZOOM_MIN) * phase
+    return FocusPath(fx * width, fy * height, zoom, fps)
+
+
+def _spectral_residual(frame: np.ndarray) -> np.ndarray:
+    """Spectral residual saliency map (Hou & Zhang, 2007) of a small image."""
+
+    spectrum = np.fft.fft2(frame)
+    log_amp = np.log1p(np.abs(spectrum))
+    phase = np.angle(spectrum)
+    # 3x3 box average of the log amplitude, with wrap-around like the FFT
+    avg = sum(np.roll(np.roll(log_amp, dy, 0), dx, 1) for dy in (-1, 0, 1) for dx in (-1, 0, 1)) / 9
+    residual = np.exp(log_amp - avg + 1j * phase)
+    sal = np.abs(np.fft.ifft2(residual)) ** 2
+    return sal / (sal.max() or 1.0)
+
+
+def _attention_centroid(sal: np.ndarray, xs: np.ndarray, ys: np.ndarray) -> Optional[Tuple[float, float]]:
+    """Centre of mass of the above-average part of an attention map."""
+
+    weights = np.clip(sal - sal.mean(), 0, None)
+    total = float(weights.sum())
+    if total <= 1e-9:
+        return None
+    return float((weights * xs).sum() / total), float((weights * ys).sum() / total)
+
+
+def estimate_centroids(
+    source: str,
+    start_s: float,
+    dur_s: float,
+    sample_hz: float = config.SAMPLE_HZ,
+) -> np.ndarray:
+    """Return an ``(n, 2)`` array of normalised attention centroids.
+
+    One centroid is produced per sample at ``sample_hz``; samples without
+    a clear focus repeat the previous centroid (the centre initially).
+    The result feeds :func:`compute_focus_path` directly.
+    """
+
+    w, h = config.FOCUS_W, config.FOCUS_H
+    cmd = [ffmpeg_utils.find_ffmpeg(), "-v", "error", "-nostdin"]
+    if start_s:
+        cmd += ["-ss", str(start_s)]
+    cmd += [
+        "-t",
+        str(dur_s),
+        "-i",
+        str(source),
+        "-an",
+        "-sn",
+        "-dn",
+        "-vf",
+        f"fps={sample_hz},scale={w}:{h}:flags=area,format=gray",
+        "-f",
+        "rawvideo",
+        "pipe:1",
+    ]
+
+    xs = np.broadcast_to((np.arange(w) + 0.5) / w, (h, w))
+    ys = np.broadcast_to(((np.arange(h) + 0.5) / h)[:, None], (h, w))
+    raw = bytearray(w * h)
+    frame = np.frombuffer(raw, dtype=np.uint8).reshape(h, w)
+    cur = np.empty((h, w), dtype=np.float32)
+    prev = np.empty((h, w), dtype=np.float32)
+    motion = np.empty((h, w), dtype=np.float32)
+
+    centroids = []
+    last = (0.5, 0.5)
+    with ffmpeg_utils.open_pipe(cmd, tag="focus") as proc:
+        while ffmpeg_utils.read_exact(proc.stdout, raw):
+            np.multiply(frame, 1.0 / 255.0, out=cur)
+            sal = _spectral_residual(cur)
+            if centroids:
+                np.subtract(cur, prev, out=motion)
+                np.abs(motion, out=motion)
+                peak = float(motion.max())
+                if peak > 0:
+                    sal = sal + motion / peak
+            found = _attention_centroid(sal, xs, ys)
+            last = found if found is not None else last
+            centroids.append(last)
+            cur, prev = prev, cur
+    return np.asarray(centroids, dtype=np.float32).reshape(-1, 2)
@@ -0,0 +1,205 @@
+"""Cached media metadata.
+
+:func:`probe` runs ffprobe once per file and returns a :class:`MediaInfo`
+describing the container, its streams and the keyframe index of the
+first video stream.  Results are memoised in-process (keyed on path,
+size and mtime, so a hit costs one ``stat``) and persisted in the
+on-disk cache keyed by the file fingerprint, so normalisation,
+scoring, muxing and rendering can all make decisions without probing or
+decoding the same file again.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .cache import DiskCache, file_fingerprint
+from .ffmpeg_utils import find_ffprobe, run_tool
+
+
+@dataclass(frozen=True)
+class StreamInfo:
+    index: int
+    codec_type: str
+    codec_name: str
+    width: int = 0
+    height: int = 0
+    pix_fmt: str = ""
+    r_frame_rate: str = ""
+    avg_frame_rate: str = ""
+    sample_rate: int = 0
+    channels: int = 0
+    profile: str = ""
+    level: int = 0
+    time_base: str = ""
+
+    @property
+    def fps(self) -> float:
+        return _rate(self.avg_frame_rate) or _rate(self.r_frame_rate)
+
+    @property
+    def nominal_fps(self) -> float:
+        """Frame rate declared by the stream (``r_frame_rate``)."""
+        return _rate(self.r_frame_rate) or self.fps
+
+    @property
+    def is_cfr(self) -> bool:
+        """Best-effort constant frame rate check from the stream header."""
+        return bool(self.r_frame_rate) and _rate(self.r_frame_rate) == _rate(self.avg_frame_rate)
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    path: str
+    duration: float
+    format_name: str = ""
+    streams: Tuple[StreamInfo, ...] = ()
+    keyframes: Tuple[float, ...] = field(default=(), repr=False)
+
+    @property
+    def video(self) -> Optional[StreamInfo]:
+        return next((s for s in self.streams if s.codec_type == "video"), None)
+
+    @property
+    def audio(self) -> Optional[StreamInfo]:
+        return next((s for s in self.streams if s.codec_type == "audio"), None)
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio is not None
+
+    @property
+    def fps(self) -> float:
+        return self.video.fps if self.video else 0.0
+
+    @property
+    def resolution(self) -> Tuple[int, int]:
+        return (self.video.width, self.video.height) if self.video else (0, 0)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, text: str) -> "MediaInfo":
+        data = json.loads(text)
+        data["streams"] = tuple(StreamInfo(**s) for s in data.get("streams", ()))
+        data["keyframes"] = tuple(data.get("keyframes", ()))
+        return cls(**data)
+
+
+def _rate(value: str) -> float:
+    if not value:
+        return 0.0
+    num, _, den = value.partition("/")
+    try:
+        return float(num) / float(den or 1) if float(den or 1) else 0.0
+    except ValueError:
+        return 0.0
+
+
+def _ffprobe(args: list[str]) -> str:
+    ffprobe = find_ffprobe()
+    if ffprobe is None:
+        raise RuntimeError("ffprobe executable not found")
+    out = run_tool([ffprobe, "-v", "error", *args], tag="ffprobe", capture=True)
+    return out.decode("utf-8", "ignore")
+
+
+def frame_times(path: str | Path) -> List[float]:
+    """Return sorted presentation times of every video packet.
+
+    Unlike :func:`probe` this is not cached; it is only needed when the
+    stream header is not enough to judge timing (e.g. suspected VFR).
+    """
+
+    out = _ffprobe(
+        ["-select_streams", "v:0", "-show_entries", "packet=pts_time", "-of", "csv=p=0", str(path)]
+    )
+    return sorted(float(t) for t in out.split() if t not in ("", "N/A"))
+
+
+def _keyframes(path: str) -> Tuple[float, ...]:
+    """Return keyframe timestamps of the first video stream.
+
+    Packet flags are read from the demuxer, so no frame is decoded.
+    """
+
+    out = _ffprobe(
+        ["-select_streams", "v:0", "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path]
+    )
+    times = []
+    for line in out.splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags and pts not in ("", "N/A"):
+            times.append(float(pts))
+    return tuple(sorted(times))
+
+
+def _run_probe(path: str) -> MediaInfo:
+    data = json.loads(_ffprobe(["-show_format", "-show_streams", "-of", "json", path]))
+    streams = []
+    for s in data.get("streams", []):
+        streams.append(
+            StreamInfo(
+                index=int(s.get("index", 0)),
+                codec_type=s.get("codec_type", ""),
+                codec_name=s.get("codec_name", ""),
+                width=int(s.get("width") or 0),
+                height=int(s.get("height") or 0),
+                pix_fmt=s.get("pix_fmt", ""),
+                r_frame_rate=s.get("r_frame_rate", ""),
+                avg_frame_rate=s.get("avg_frame_rate", ""),
+                sample_rate=int(s.get("sample_rate") or 0),
+                channels=int(s.get("channels") or 0),
+                profile=s.get("profile", ""),
+                level=int(s.get("level") or 0),
+                time_base=s.get("time_base", ""),
+            )
+        )
+    fmt = data.get("format", {})
+    has_video = any(s.codec_type == "video" for s in streams)
+    return MediaInfo(
+        path=path,
+        duration=float(fmt.get("duration") or 0.0),
+        format_name=fmt.get("format_name", ""),
+        streams=tuple(streams),
+        keyframes=_keyframes(path) if has_video else (),
+    )
+
+
+def _probe_fingerprinted(path: str, fingerprint: str) -> MediaInfo:
+    cache = DiskCache("mediainfo")
+    entry = cache.get(fingerprint)
+    if entry is not None:
+        try:
+            info = MediaInfo.from_json((entry / "info.json").read_text())
+            return MediaInfo(path, info.duration, info.format_name, info.streams, info.keyframes)
+        except (OSError, ValueError, TypeError):
+            pass  # corrupt entry, probe again
+    info = _run_probe(path)
+    with cache.put(fingerprint) as tmp:
+        (tmp / "info.json").write_text(info.to_json())
+    return info
+
+
+def probe(path: str | Path) -> MediaInfo:
+    """Return :class:`MediaInfo` for ``path``, probing at most once.
+
+    Raises ``RuntimeError`` if ffprobe is not installed and
+    :class:`~.ffmpeg_utils.FFMpegError` if the file cannot be probed.
+    """
+
+    path = str(path)
+    st = os.stat(path)
+    return _probe_stat(path, st.st_size, st.st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=128)
+def _probe_stat(path: str, size: int, mtime_ns: int) -> MediaInfo:
+    # The in-process memo is keyed on stat data, so a hit costs one stat;
+    # the content fingerprint (for the disk cache) is only read on a miss.
+    return _probe_fingerprinted(path, file_fingerprint(path))
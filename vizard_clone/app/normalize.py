@@ -1,17 +1,68 @@
 """Video normalisation helpers.
 
-The function implemented here performs the bare minimum required for the
-unit tests.  It strips audio and ensures the video stream is constant
-frame rate 30fps H.264.  Error handling is intentionally forgiving –
-ffmpeg's ``-err_detect ignore_err`` option is used to attempt decoding of
-slightly broken input files.
+:func:`normalize_video_only` strips audio and ensures the video stream is
+constant frame rate 30fps H.264.  Error handling is intentionally
+forgiving – ffmpeg's ``-err_detect ignore_err`` option is used to attempt
+decoding of slightly broken input files.
+
+:func:`normalize_smart` avoids that full re-encode when it is not needed.
+:func:`plan_normalization` inspects the input and chooses one of three
+paths:
+
+``copy``
+    The input already is H.264 yuv420p 30fps CFR; it is only remuxed.
+``partial``
+    Stream parameters comply but some GOPs have irregular frame timing;
+    only those GOP ranges are re-encoded and the rest is stream-copied.
+    The re-encoded ranges match the source's profile, level and pixel
+    format, and every segment goes through MPEG-TS with SPS/PPS repeated
+    in-band, so decoders see valid parameter sets at every seam.  Sources
+    whose parameters cannot be matched get a full encode instead.
+``full``
+    Anything else is fully re-encoded with :func:`normalize_video_only`,
+    or with :func:`normalize_chunked` when ``config.NORMALIZE_JOBS > 1``.
 """
 from __future__ import annotations
 
-import subprocess
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
+from typing import List, Optional, Tuple
+
+from . import config
+from .ffmpeg_utils import FFMpegError, find_ffmpeg, in_context, process_slot, x264_args, _run
+from .mediainfo import MediaInfo, StreamInfo, frame_times, probe
+
+log = logging.getLogger(__name__)
+
+# Fraction of GOPs that may be irregular before a full re-encode is cheaper
+PARTIAL_MAX_FRACTION = 0.5
+# Relative deviation from the nominal frame interval tolerated in a GOP
+TIMING_TOLERANCE = 0.25
+# ffprobe H.264 profile names -> libx264 ``-profile:v`` values
+_X264_PROFILES = {
+    "constrained baseline": "baseline",
+    "baseline": "baseline",
+    "main": "main",
+    "high": "high",
+}
+
 
-from .ffmpeg_utils import find_ffmpeg, _run
+def _encode_args() -> List[str]:
+    return [
+        "-vf",
+        f"fps={config.OUTPUT_FPS}",
+        "-r",
+        str(config.OUTPUT_FPS),
+        "-pix_fmt",
+        "yuv420p",
+        *x264_args(),
+    ]
 
 
 def normalize_video_only(src: str | Path, out_path: str | Path) -> Path:
@@ -41,23 +92,417 @@ def normalize_video_only(src: str | Path, out_path: str | Path) -> Path:
         "-map",
         "0:v:0",
         "-an",
-        "-vf",
-        "fps=30",
-        "-r",
-        "30",
-        "-pix_fmt",
-        "yuv420p",
-        "-c:v",
-        "libx264",
-        "-preset",
-        "veryfast",
-        "-crf",
-        "20",
+        *_encode_args(),
         "-movflags",
         "+faststart",
         "-vsync",
         "cfr",
         str(out_path),
     ]
-    _run(cmd)
+    _run(cmd, tag="normalize")
     return out_path
+
+
+@dataclass
+class NormalizePlan:
+    mode: str  # "copy", "partial" or "full"
+    reason: str
+    # Half-open ``(start_s, end_s)`` ranges to re-encode in "partial" mode
+    ranges: List[Tuple[float, float]] = field(default_factory=list)
+
+
+@dataclass
+class NormalizeReport:
+    src: str
+    out: str
+    mode: str
+    reason: str
+    elapsed_s: float
+    # Not measured: derived from ``config.NORMALIZE_SPEED``
+    estimated_full_s: float
+    estimated_saved_s: float
+
+
+def _stream_issues(info: MediaInfo) -> List[str]:
+    v = info.video
+    if v is None:
+        return ["no video stream"]
+    issues = []
+    if v.codec_name != "h264":
+        issues.append(f"codec {v.codec_name}")
+    if v.pix_fmt != "yuv420p":
+        issues.append(f"pix_fmt {v.pix_fmt}")
+    if abs(v.nominal_fps - config.OUTPUT_FPS) > 0.01:
+        issues.append(f"{v.nominal_fps:.3f}fps")
+    if not info.keyframes:
+        issues.append("no keyframe index")
+    return issues
+
+
+def _irregular_gops(times: List[float], keyframes: Tuple[float, ...], fps: float) -> List[Tuple[float, float]]:
+    """Return merged GOP ranges whose frame spacing is not ``1/fps``."""
+
+    nominal = 1.0 / fps
+    bounds = [*keyframes, float("inf")]
+    bad: List[Tuple[float, float]] = []
+    i = 0
+    for gop_start, gop_end in zip(bounds, bounds[1:]):
+        prev = None
+        irregular = False
+        while i < len(times) and times[i] < gop_end:
+            if prev is not None and abs(times[i] - prev - nominal) > nominal * TIMING_TOLERANCE:
+                irregular = True
+            prev = times[i]
+            i += 1
+        if irregular:
+            end = gop_end if gop_end != float("inf") else (prev or gop_start) + nominal
+            if bad and bad[-1][1] == gop_start:
+                bad[-1] = (bad[-1][0], end)
+            else:
+                bad.append((gop_start, end))
+    return bad
+
+
+def plan_normalization(src: str | Path, info: Optional[MediaInfo] = None) -> NormalizePlan:
+    """Decide how ``src`` must be normalised (see module docstring)."""
+
+    try:
+        info = info or probe(src)
+    except RuntimeError as exc:
+        return NormalizePlan("full", f"probe failed: {exc}".strip())
+    issues = _stream_issues(info)
+    if issues:
+        return NormalizePlan("full", ", ".join(issues))
+    if info.video.is_cfr:
+        return NormalizePlan("copy", "already H.264 yuv420p CFR")
+    ranges = _irregular_gops(frame_times(src), info.keyframes, info.video.nominal_fps)
+    if not ranges:
+        return NormalizePlan("copy", "frame timing is regular")
+    bad = sum(b - a for a, b in ranges)
+    if info.duration and bad / info.duration > PARTIAL_MAX_FRACTION:
+        return NormalizePlan("full", f"{bad:.1f}s of irregular timing")
+    if _matched_encode_args(info.video) is None:
+        return NormalizePlan("full", f"cannot match profile {info.video.profile!r} level {info.video.level}")
+    return NormalizePlan("partial", f"{len(ranges)} irregular GOP range(s)", ranges)
+
+
+def _remux(src: Path, out_path: Path) -> None:
+    _run(
+        [
+            find_ffmpeg(),
+            "-y",
+            "-i",
+            str(src),
+            "-map",
+            "0:v:0",
+            "-an",
+            "-c:v",
+            "copy",
+            "-movflags",
+            "+faststart",
+            str(out_path),
+        ],
+        tag="remux",
+    )
+
+
+def _timescale(video: StreamInfo) -> Optional[int]:
+    num, _, den = video.time_base.partition("/")
+    try:
+        return int(den) if int(num) == 1 else None
+    except ValueError:
+        return None
+
+
+def _matched_encode_args(video: StreamInfo) -> Optional[List[str]]:
+    """Encoder arguments producing H.264 that can be spliced into ``video``.
+
+    Profile, level and pixel format follow the source, and SPS/PPS are
+    repeated before every keyframe.  Returns ``None`` if the source's
+    parameters are unknown or cannot be reproduced with libx264.
+    """
+
+    profile = _X264_PROFILES.get(video.profile.lower())
+    if profile is None or not video.level or _timescale(video) is None:
+        return None
+    return [
+        "-vf",
+        f"fps={config.OUTPUT_FPS}",
+        "-r",
+        str(config.OUTPUT_FPS),
+        "-pix_fmt",
+        video.pix_fmt,
+        *x264_args(),
+        "-profile:v",
+        profile,
+        "-level:v",
+        f"{video.level / 10:.1f}",
+        "-x264-params",
+        "repeat-headers=1",
+    ]
+
+
+def _segment(src: Path, start: float, end: float, encode_args: Optional[List[str]], out: Path) -> None:
+    """Cut ``[start, end)`` of ``src`` to an MPEG-TS segment.
+
+    With ``encode_args`` the range is re-encoded, otherwise stream-copied
+    (the TS muxer's ``h264_mp4toannexb`` puts SPS/PPS before each IDR).
+    """
+
+    cmd = [find_ffmpeg(), "-y", "-ss", f"{start:.6f}"]
+    if end != float("inf"):
+        cmd += ["-to", f"{end:.6f}"]
+    cmd += ["-i", str(src), "-map", "0:v:0", "-an"]
+    cmd += encode_args if encode_args is not None else ["-c:v", "copy"]
+    cmd += ["-f", "mpegts", str(out)]
+    _run(cmd, tag="normalize_segment")
+
+
+def concat_copy(parts: List[Path], out_path: Path, workdir: Path, timescale: Optional[int] = None) -> None:
+    """Join ``parts`` with the concat demuxer without re-encoding.
+
+    ``timescale`` sets the MP4 video track timescale of the output.
+    """
+
+    listing = workdir / "parts.txt"
+    listing.write_text("".join(f"file '{p.resolve().as_posix()}'\n" for p in parts))
+    _run(
+        [
+            find_ffmpeg(),
+            "-y",
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            str(listing),
+            "-c",
+            "copy",
+            *(["-video_track_timescale", str(timescale)] if timescale else []),
+            "-movflags",
+            "+faststart",
+            str(out_path),
+        ],
+        tag="concat",
+    )
+
+
+def _normalize_partial(src: Path, out_path: Path, plan: NormalizePlan, info: MediaInfo) -> None:
+    encode_args = _matched_encode_args(info.video)
+    if encode_args is None:
+        raise FFMpegError("source parameters cannot be matched for a partial encode")
+    duration = info.duration
+    edges = [0.0]
+    for a, b in plan.ranges:
+        edges += [a, b]
+    edges.append(float("inf"))
+    with tempfile.TemporaryDirectory(dir=out_path.parent) as tmp:
+        workdir = Path(tmp)
+        parts = []
+        for i, (a, b) in enumerate(zip(edges, edges[1:])):
+            if b <= a or (duration and a >= duration):
+                continue
+            part = workdir / f"{i:04d}.ts"
+            _segment(src, a, b, encode_args if i % 2 else None, part)
+            parts.append(part)
+        concat_copy(parts, out_path, workdir, _timescale(info.video))
+
+
+@dataclass
+class ChunkTiming:
+    start_s: float
+    end_s: Optional[float]  # ``None`` if the source duration is unknown
+    frames: Optional[int]
+    elapsed_s: float
+
+
+@dataclass
+class ChunkedReport:
+    chunks: List[ChunkTiming]
+    split_s: float
+    encode_s: float
+    concat_s: float
+    total_s: float
+
+
+def split_points(keyframes: Tuple[float, ...], duration: float, chunks: int) -> List[float]:
+    """Pick up to ``chunks - 1`` keyframe times that split ``duration`` evenly."""
+
+    points: List[float] = []
+    if chunks < 2 or not keyframes or duration <= 0:
+        return points
+    for i in range(1, chunks):
+        target = duration * i / chunks
+        best = min(keyframes, key=lambda k: abs(k - target))
+        if 0 < best < duration and (not points or best > points[-1]):
+            points.append(best)
+    return points
+
+
+def _grid_frames(t: float) -> int:
+    """Number of ``config.OUTPUT_FPS`` frames before time ``t``."""
+    return int(round(t * config.OUTPUT_FPS))
+
+
+def _encode_chunk(src: Path, start: float, end: Optional[float], threads: int, out: Path) -> ChunkTiming:
+    cmd = [find_ffmpeg(), "-y", "-err_detect", "ignore_err"]
+    if start:
+        cmd += ["-ss", f"{start:.6f}"]
+    cmd += ["-i", str(src), "-map", "0:v:0", "-an", *_encode_args(), "-threads", str(threads)]
+    frames = None
+    if end is not None:
+        # Counting frames on the output grid makes the chunks tile exactly:
+        # together they hold as many frames as a single-process encode.
+        frames = _grid_frames(end) - _grid_frames(start)
+        cmd += ["-frames:v", str(frames)]
+    cmd += ["-vsync", "cfr", "-f", "mp4", str(out)]
+    t0 = time.perf_counter()
+    _run(cmd, tag="normalize_chunk")
+    return ChunkTiming(start, end, frames, round(time.perf_counter() - t0, 3))
+
+
+def normalize_chunked(
+    src: str | Path,
+    out_path: str | Path,
+    jobs: int,
+    info: Optional[MediaInfo] = None,
+) -> ChunkedReport:
+    """Full re-encode of ``src`` split into keyframe-aligned chunks.
+
+    The input is cut at ``jobs - 1`` keyframes, the chunks are encoded
+    concurrently (each with a share of the CPU threads) and joined with
+    the concat demuxer without re-encoding.  Each chunk's frame count is
+    fixed on the ``config.OUTPUT_FPS`` grid so the result has the same
+    frame count and CFR timing as :func:`normalize_video_only`.
+
+    The whole normalisation takes a single ffmpeg process slot, which the
+    chunk workers share, so a ``--jobs`` cap cannot serialise the chunks.
+    """
+
+    src = Path(src)
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+    info = info or probe(src)
+    points = split_points(info.keyframes, info.duration, jobs)
+    bounds: List[Tuple[float, Optional[float]]] = list(
+        zip([0.0, *points], [*points, info.duration or None])
+    )
+    t_split = time.perf_counter()
+
+    # every chunk runs at once under the shared slot below
+    threads = max(1, (os.cpu_count() or 1) // len(bounds))
+    with process_slot(), tempfile.TemporaryDirectory(dir=out_path.parent) as tmp:
+        workdir = Path(tmp)
+        parts = [workdir / f"{i:04d}.mp4" for i in range(len(bounds))]
+        with ThreadPoolExecutor(max_workers=len(bounds)) as pool:
+            timings = list(
+                pool.map(
+                    in_context(lambda job: _encode_chunk(src, job[0][0], job[0][1], threads, job[1])),
+                    zip(bounds, parts),
+                )
+            )
+        t_encode = time.perf_counter()
+        concat_copy(parts, out_path, workdir)
+    t_end = time.perf_counter()
+
+    report = ChunkedReport(
+        chunks=timings,
+        split_s=round(t_split - t0, 3),
+        encode_s=round(t_encode - t_split, 3),
+        concat_s=round(t_end - t_encode, 3),
+        total_s=round(t_end - t0, 3),
+    )
+    for c in timings:
+        log.info("chunk %.2f-%s: %ss", c.start_s, c.end_s, c.elapsed_s)
+    log.info(
+        "normalize_chunked %s: %d chunk(s), split %.2fs, encode %.2fs, concat %.2fs, total %.2fs",
+        src,
+        len(timings),
+        report.split_s,
+        report.encode_s,
+        report.concat_s,
+        report.total_s,
+    )
+    return report
+
+
+def _full(src: Path, out_path: Path) -> str:
+    """Run a full re-encode, chunked when ``config.NORMALIZE_JOBS > 1``."""
+
+    if config.NORMALIZE_JOBS > 1:
+        try:
+            normalize_chunked(src, out_path, config.NORMALIZE_JOBS)
+            return "chunked"
+        except RuntimeError:
+            log.warning("chunked normalisation failed, using a single process", exc_info=True)
+    normalize_video_only(src, out_path)
+    return "single"
+
+
+def _record(report: NormalizeReport) -> None:
+    log.info(
+        "normalize %s: %s (%s) in %.1fs, estimated saving %.1fs",
+        report.src,
+        report.mode,
+        report.reason,
+        report.elapsed_s,
+        report.estimated_saved_s,
+    )
+    try:
+        logs = Path(config.LOGS)
+        logs.mkdir(parents=True, exist_ok=True)
+        with (logs / "normalize.jsonl").open("a", encoding="utf-8") as fh:
+            fh.write(json.dumps(asdict(report)) + "\n")
+    except OSError:  # pragma: no cover - logging must never fail the job
+        log.warning("could not write normalize report", exc_info=True)
+
+
+def normalize_smart(src: str | Path, out_path: str | Path) -> NormalizeReport:
+    """Normalise ``src`` choosing the cheapest compliant path.
+
+    Returns a :class:`NormalizeReport` with the chosen mode, the measured
+    ``elapsed_s`` and the time saved against a full re-encode.  The full
+    encode is not run, so ``estimated_full_s`` and ``estimated_saved_s``
+    assume ``config.NORMALIZE_SPEED``.  The report is also appended to
+    ``config.LOGS/normalize.jsonl``.
+    """
+
+    src = Path(src)
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    plan = plan_normalization(src)
+    try:
+        info: Optional[MediaInfo] = probe(src)
+    except RuntimeError:
+        info = None
+    duration = info.duration if info is not None else 0.0
+
+    t0 = time.perf_counter()
+    mode, reason = plan.mode, plan.reason
+    try:
+        if plan.mode == "copy":
+            _remux(src, out_path)
+        elif plan.mode == "partial":
+            _normalize_partial(src, out_path, plan, info)
+        else:
+            _full(src, out_path)
+    except FFMpegError as exc:
+        if plan.mode == "full":
+            raise
+        mode, reason = "full", f"{plan.mode} failed: {str(exc).strip()[:200]}"
+        _full(src, out_path)
+    elapsed = time.perf_counter() - t0
+
+    estimated = duration / config.NORMALIZE_SPEED if duration else elapsed
+    report = NormalizeReport(
+        src=str(src),
+        out=str(out_path),
+        mode=mode,
+        reason=reason,
+        elapsed_s=round(elapsed, 3),
+        estimated_full_s=round(estimated, 3),
+        estimated_saved_s=round(max(0.0, estimated - elapsed), 3),
+    )
+    _record(report)
+    return report
@@ -1,24 +1,177 @@
-"""High level processing pipeline (stub)."""
+"""High level processing pipeline.
+
+:func:`process_video` analyses a source once, picks the best windows and
+renders each of them.  Rendering is split into a CPU-bound stage
+(transcription, subtitles) and a subprocess-bound stage (ffmpeg
+encoding) which run on separate bounded pools, so preparing clip
+``k + 1`` overlaps encoding clip ``k``.
+"""
 from __future__ import annotations
 
+import contextvars
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Callable, List, Sequence, TypeVar
 
 from . import config
-from .render import render_window
+from .ffmpeg_utils import collect_runs
+from .analysis import analyze_cached
+from .mediainfo import probe
+from .normalize import normalize_smart
+from .render import encode_window, prepare_window
+from .scene_score import Window, pick_best_windows
+
+T = TypeVar("T")
+P = TypeVar("P")
+R = TypeVar("R")
+
+
+def run_staged(
+    items: Sequence[T],
+    prepare: Callable[[T], P],
+    encode: Callable[[P], R],
+    cpu_workers: int = config.CPU_WORKERS,
+    io_workers: int = config.ENCODE_WORKERS,
+) -> List[R]:
+    """Run ``encode(prepare(item))`` for every item as a two-stage pipeline.
+
+    Each item is handed to the ``encode`` pool as soon as its ``prepare``
+    step finishes, so total wall time approaches that of the slowest stage
+    rather than the sum of both.  Results are returned in item order; if
+    any item fails the first error is raised after all items settle.
+
+    Both stages run in copies of the caller's :mod:`contextvars` context
+    (so :func:`~.ffmpeg_utils.collect_runs` sees their ffmpeg runs); the
+    encode step is submitted from a done-callback on a prepare worker,
+    whose own context would not carry the caller's report.
+    """
+
+    ctx = contextvars.copy_context()
+
+    def bound(fn: Callable) -> Callable:
+        run = ctx.copy()  # a context can only be entered by one thread at a time
+        return lambda *args: run.run(fn, *args)
+
+    finals: List[Future] = [Future() for _ in items]
+    with ThreadPoolExecutor(cpu_workers) as cpu, ThreadPoolExecutor(io_workers) as io:
+
+        def settle(done: Future, final: Future) -> None:
+            if done.exception() is not None:
+                final.set_exception(done.exception())
+            else:
+                final.set_result(done.result())
+
+        def chain(prepared: Future, final: Future) -> None:
+            if prepared.exception() is not None:
+                final.set_exception(prepared.exception())
+                return
+            try:
+                encoded = io.submit(bound(encode), prepared.result())
+            except Exception as exc:  # pragma: no cover - pool shut down
+                final.set_exception(exc)
+                return
+            encoded.add_done_callback(lambda f: settle(f, final))
+
+        for item, final in zip(items, finals):
+            cpu.submit(bound(prepare), item).add_done_callback(lambda f, final=final: chain(f, final))
+
+        errors = [f.exception() for f in finals]
+    for err in errors:
+        if err is not None:
+            raise err
+    return [f.result() for f in finals]
 
 
-def process_video(src_path: str | Path, out_dir: str | Path) -> List[Path]:
+def _write_sidecar(out_path: Path, src_path: Path, win: Window, dur: float) -> None:
+    """Record where a clip comes from next to it (``<clip>.json``).
+
+    The preview index reads score and duration from here instead of
+    probing every clip.
+    """
+
+    sidecar = out_path.with_suffix(".json")
+    data = {"source": str(src_path), "start": win.start, "duration": dur, "score": win.score}
+    sidecar.write_text(json.dumps(data), encoding="utf-8")
+
+
+def _render_source(src_path: Path, out_dir: Path, tmp_dir: Path, name: str) -> List[Path]:
+    result = analyze_cached(src_path)
+    try:
+        duration = int(probe(src_path).duration) or result.duration
+    except (RuntimeError, OSError):
+        duration = result.duration
+    windows = pick_best_windows(
+        duration,
+        result.motion,
+        result.speech,
+        window_candidates=config.WINDOW_CANDIDATES,
+        step=config.STEP,
+        top_n=config.TOP_N,
+    )
+
+    video_src, audio_src = src_path, None
+    if config.PRENORMALIZE and windows:
+        report = normalize_smart(src_path, tmp_dir / "normalized.mp4")
+        video_src, audio_src = Path(report.out), src_path
+
+    def prepare(job: tuple[int, Window]):
+        idx, win = job
+        dur = max(0, min(win.end, duration) - win.start)
+        out_path = out_dir / f"{name}_{idx:02d}.mp4"
+        prepared = prepare_window(
+            video_src,
+            win.start,
+            dur,
+            tmp_dir / f"{idx:02d}",
+            out_path,
+            audio_src,
+        )
+        return prepared, out_path, win, dur
+
+    def encode(job):
+        prepared, out_path, win, dur = job
+        clip = encode_window(prepared)
+        # only clips that were actually rendered get a sidecar
+        _write_sidecar(out_path, src_path, win, dur)
+        return clip
+
+    return run_staged(list(enumerate(windows)), prepare, encode)
+
+
+def process_video(
+    src_path: str | Path,
+    out_dir: str | Path,
+    tmp_dir: str | Path | None = None,
+    name: str | None = None,
+) -> List[Path]:
     """Process ``src_path`` and return a list of generated clips.
 
-    The function is intentionally tiny; it simply renders a single
-    5-second window starting at the beginning of the video.  This mirrors
-    the interface of the full project while keeping the execution time
-    minimal for the unit tests.
+    The source is analysed (or loaded from the analysis cache), the
+    ``config.TOP_N`` best windows are picked and every window is rendered
+    to ``<name>_<nn>.mp4`` in ``out_dir``, in chronological order.
+    ``name`` defaults to the source stem.  With
+    ``config.PRENORMALIZE`` the video is first normalised with
+    :func:`~.normalize.normalize_smart` and audio is taken from the
+    original source.
+
+    Resource usage of every ffmpeg/ffprobe invocation made for this
+    source is written to ``<name>_ffmpeg_report.json`` in ``out_dir``.
+
+    ``tmp_dir`` defaults to ``out_dir / "tmp" / <name>``; callers running
+    several videos at once should pass a distinct ``name`` and directory
+    per job.
     """
 
+    src_path = Path(src_path)
     out_dir = Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
-    clip_path = out_dir / "clip.mp4"
-    render_window(src_path, 0, 5, out_dir / "tmp", clip_path)
-    return [clip_path]
+    name = name or src_path.stem
+    tmp_dir = Path(tmp_dir) if tmp_dir is not None else out_dir / "tmp" / name
+
+    with collect_runs() as runs:
+        try:
+            return _render_source(src_path, out_dir, tmp_dir, name)
+        finally:
+            report_path = out_dir / f"{name}_ffmpeg_report.json"
+            report_path.write_text(runs.to_json(), encoding="utf-8")
@@ -1,21 +1,314 @@
-"""Minimal Flask preview application."""
+"""Minimal Flask preview application.
+
+Clips are served from ``config.PROCESSED`` only (the app config key
+``CLIPS_ROOT`` overrides it).  Video responses are conditional: Werkzeug
+answers ``Range`` requests with ``206`` partial content and sets ``ETag``
+and ``Last-Modified``, so scrubbing a clip does not download it again.
+
+:class:`ClipIndex` keeps a JSON index of the clips (duration, window
+score, thumbnail URLs) in ``<root>/.preview/index.json``.  Every refresh
+lists the directory once and only re-reads clips whose size or mtime
+changed or whose ``<clip>.json`` sidecar (written by the pipeline after
+the clip, with score and duration) appeared or changed.  Only the review
+page and the clip listing refresh the index; thumbnail and approval
+requests use it as it is.  Poster and sprite-sheet thumbnails are
+rendered by ffmpeg on first request and kept next to the index.
+
+The review page renders one page of the index at a time with lazily
+loaded posters and approval toggles, so it stays fast with thousands of
+clips.
+"""
 from __future__ import annotations
 
+import json
+import os
+import threading
+from html import escape
 from pathlib import Path
-from typing import List
+from typing import Dict, Optional
+from urllib.parse import quote
 
-from flask import Flask, send_from_directory
+from flask import Flask, abort, current_app, jsonify, request, send_from_directory
+
+from . import config
+from .ffmpeg_utils import FFMpegError, find_ffmpeg, run_tool
 
 app = Flask(__name__)
 
+_META_DIR = ".preview"
+POSTER_W, POSTER_H = 270, 480
+SPRITE_COLS, SPRITE_ROWS = 5, 2
+SPRITE_W, SPRITE_H = 108, 192
+
+
+def _write_json(path: Path, data) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class ClipIndex:
+    """Incrementally refreshed index of the clips in one directory."""
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        self.meta = self.root / _META_DIR
+        self.path = self.meta / "index.json"
+        self.approvals_path = self.meta / "approvals.json"
+        self._lock = threading.Lock()
+        self._thumb_locks: Dict[str, threading.Lock] = {}
+        self._entries: Dict[str, dict] = {}
+        self._approvals: Dict[str, bool] = {}
+        try:
+            self._entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._entries = {}
+        try:
+            self._approvals = json.loads(self.approvals_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._approvals = {}
+
+    def _entry(self, name: str, st: os.stat_result, sidecar_mtime_ns: Optional[int]) -> dict:
+        sidecar = self.root / (Path(name).stem + ".json")
+        try:
+            info = json.loads(sidecar.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            info = {}
+        duration = info.get("duration")
+        if duration is None:
+            from .mediainfo import probe  # local import: only for clips without sidecar
+
+            try:
+                duration = probe(self.root / name).duration
+            except (RuntimeError, OSError):
+                duration = 0.0
+        return {
+            "name": name,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sidecar_mtime_ns": sidecar_mtime_ns,
+            "duration": float(duration),
+            "score": info.get("score"),
+            "source": info.get("source"),
+            "start": info.get("start"),
+            "poster": f"/thumbs/{quote(name)}/poster.jpg",
+            "sprite": f"/thumbs/{quote(name)}/sprite.jpg",
+        }
+
+    def refresh(self) -> bool:
+        """Bring the index up to date; return whether anything changed."""
+
+        with self._lock:
+            seen = {}
+            sidecars: Dict[str, int] = {}
+            try:
+                with os.scandir(self.root) as it:
+                    for de in it:
+                        if de.name.endswith(".mp4") and de.is_file():
+                            seen[de.name] = de.stat()
+                        elif de.name.endswith(".json") and de.is_file():
+                            sidecars[de.name[:-5]] = de.stat().st_mtime_ns
+            except FileNotFoundError:
+                pass
+            changed = False
+            for name in list(self._entries):
+                if name not in seen:
+                    del self._entries[name]
+                    changed = True
+            for name, st in seen.items():
+                old = self._entries.get(name)
+                sidecar = sidecars.get(name[:-4])
+                if (
+                    old is None
+                    or old["size"] != st.st_size
+                    or old["mtime_ns"] != st.st_mtime_ns
+                    or old.get("sidecar_mtime_ns") != sidecar
+                ):
+                    self._entries[name] = self._entry(name, st, sidecar)
+                    self._drop_thumbnails(name)
+                    changed = True
+            if changed:
+                self.meta.mkdir(parents=True, exist_ok=True)
+                _write_json(self.path, self._entries)
+            return changed
+
+    def page(self, page: int = 1, per_page: int = config.PREVIEW_PAGE_SIZE) -> dict:
+        """Return one page of clips (sorted by name) plus paging info."""
+
+        with self._lock:
+            names = sorted(self._entries)
+            total = len(names)
+            per_page = max(1, per_page)
+            start = (max(1, page) - 1) * per_page
+            clips = [
+                dict(self._entries[n], approved=self._approvals.get(n, False))
+                for n in names[start : start + per_page]
+            ]
+        return {"page": max(1, page), "per_page": per_page, "total": total, "clips": clips}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def set_approved(self, name: str, approved: bool) -> None:
+        with self._lock:
+            self._approvals[name] = approved
+            self.meta.mkdir(parents=True, exist_ok=True)
+            _write_json(self.approvals_path, self._approvals)
+
+    def _thumb_dir(self, name: str) -> Path:
+        return self.meta / "thumbs" / name
+
+    def _drop_thumbnails(self, name: str) -> None:
+        for kind in ("poster", "sprite"):
+            (self._thumb_dir(name) / f"{kind}.jpg").unlink(missing_ok=True)
+
+    def thumbnail(self, name: str, kind: str) -> Path:
+        """Return the ``poster`` or ``sprite`` image, rendering it once."""
+
+        out = self._thumb_dir(name) / f"{kind}.jpg"
+        with self._lock:
+            lock = self._thumb_locks.setdefault(name, threading.Lock())
+            duration = self._entries.get(name, {}).get("duration") or 0.0
+        with lock:
+            if out.exists():
+                return out
+            out.parent.mkdir(parents=True, exist_ok=True)
+            src = str(self.root / name)
+            if kind == "poster":
+                seek = ["-ss", str(min(1.0, duration / 2))]
+                vf = f"scale={POSTER_W}:{POSTER_H}"
+            else:
+                seek = []
+                tiles = SPRITE_COLS * SPRITE_ROWS
+                rate = tiles / duration if duration > 0 else 1
+                vf = f"fps={rate:.6f},scale={SPRITE_W}:{SPRITE_H},tile={SPRITE_COLS}x{SPRITE_ROWS}"
+            tmp = out.with_name(f".{kind}.tmp.jpg")
+            cmd = [find_ffmpeg(), "-y", "-v", "error", *seek, "-i", src, "-vf", vf, "-frames:v", "1", str(tmp)]
+            run_tool(cmd, tag="thumbnail")
+            os.replace(tmp, out)
+            return out
+
+
+_INDEXES: Dict[str, ClipIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def _root() -> Path:
+    return Path(current_app.config.get("CLIPS_ROOT") or config.PROCESSED).resolve()
+
+
+def get_index(root: Optional[str | Path] = None, refresh: bool = True) -> ClipIndex:
+    """Return the index for ``root``, one instance per directory.
+
+    With ``refresh`` the index is brought up to date first (one directory
+    scan); a new index is always refreshed once.
+    """
+
+    root = Path(root).resolve() if root is not None else _root()
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(str(root))
+        if index is None:
+            index = _INDEXES[str(root)] = ClipIndex(root)
+            refresh = True
+    if refresh:
+        index.refresh()
+    return index
+
+
+def _clip_name(name: str) -> str:
+    """Reject anything but a plain clip file name."""
+
+    if not name.endswith(".mp4") or Path(name).name != name or name.startswith("."):
+        abort(404)
+    return name
+
 
 @app.route("/clips/<path:name>")
 def clips(name: str):
-    directory = Path(name).parent
-    filename = Path(name).name
-    return send_from_directory(directory, filename)
+    return send_from_directory(_root(), _clip_name(name), conditional=True, max_age=3600)
+
+
+@app.route("/thumbs/<name>/<kind>.jpg")
+def thumbs(name: str, kind: str):
+    if kind not in ("poster", "sprite"):
+        abort(404)
+    index = get_index(refresh=False)
+    if _clip_name(name) not in index:
+        abort(404)
+    try:
+        path = index.thumbnail(name, kind)
+    except (FFMpegError, RuntimeError, OSError):
+        abort(404)
+    return send_from_directory(path.parent, path.name, conditional=True, max_age=86400)
+
+
+@app.route("/api/clips")
+def api_clips():
+    page = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", config.PREVIEW_PAGE_SIZE, type=int)
+    return jsonify(get_index().page(page, min(per_page, 500)))
+
+
+@app.route("/api/clips/<name>/approval", methods=["POST"])
+def api_approval(name: str):
+    index = get_index(refresh=False)
+    if _clip_name(name) not in index:
+        abort(404)
+    approved = bool((request.get_json(silent=True) or {}).get("approved"))
+    index.set_approved(name, approved)
+    return jsonify({"name": name, "approved": approved})
+
+
+_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Clip review</title>
+<style>
+body{{font-family:sans-serif;margin:1em}} .grid{{display:flex;flex-wrap:wrap;gap:1em}}
+.clip{{width:{w}px}} .clip img,.clip video{{width:{w}px;height:{h}px;background:#000}}
+</style></head><body>
+<h1>Clip review</h1><p>{total} clip(s) &middot; page {page} of {pages} {nav}</p>
+<div class="grid">{items}</div>
+<script>
+function play(el){{var v=document.createElement('video');v.src=el.dataset.src;v.controls=true;
+v.autoplay=true;v.preload='none';el.replaceWith(v);}}
+function approve(box){{fetch('/api/clips/'+encodeURIComponent(box.dataset.name)+'/approval',
+{{method:'POST',headers:{{'Content-Type':'application/json'}},
+body:JSON.stringify({{approved:box.checked}})}});}}
+</script></body></html>"""
+
+_ITEM = """<div class="clip"><img loading="lazy" src="{poster}" data-src="{src}" onclick="play(this)"
+alt="{name}"><div>{name}</div><div>{duration:.1f}s &middot; score {score}</div>
+<label><input type="checkbox" data-name="{name}" onchange="approve(this)"{checked}> approved</label></div>"""
 
 
-# The full implementation would list clips and provide approval toggles.
-# For the purposes of this kata the Flask app only exposes a static file
-# endpoint so other modules can import ``app`` without side effects.
+@app.route("/")
+def review():
+    page = request.args.get("page", 1, type=int)
+    data = get_index().page(page)
+    pages = max(1, -(-data["total"] // data["per_page"]))
+    nav = []
+    if data["page"] > 1:
+        nav.append(f'<a href="?page={data["page"] - 1}">previous</a>')
+    if data["page"] < pages:
+        nav.append(f'<a href="?page={data["page"] + 1}">next</a>')
+    items = []
+    for clip in data["clips"]:
+        name = escape(clip["name"], quote=True)
+        items.append(
+            _ITEM.format(
+                poster=escape(clip["poster"], quote=True),
+                src=escape(f"/clips/{quote(clip['name'])}", quote=True),
+                name=name,
+                duration=clip["duration"],
+                score="n/a" if clip["score"] is None else f"{clip['score']:.2f}",
+                checked=" checked" if clip["approved"] else "",
+            )
+        )
+    return _PAGE.format(
+        w=POSTER_W,
+        h=POSTER_H,
+        total=data["total"],
+        page=data["page"],
+        pages=pages,
+        nav=" ".join(nav),
+        items="".join(items),
+    )
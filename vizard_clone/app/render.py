@@ -1,57 +1,256 @@
-"""Rendering pipeline stubs.
+"""Rendering pipeline.
 
 The function :func:`render_window` represents a simplified end-to-end
-process for a single clip.  It does not implement the sophisticated
-features from the original project such as dynamic cropping and subtitle
-burn-in; instead it merely demonstrates how the utilities can be wired
-together.  This keeps the module lightweight for the unit tests while
-providing a clear extension point for future work.
+process for a single clip.  Two encoders are available, selected with
+``config.RENDER_MODE``:
+
+``"graph"``
+    One ffmpeg invocation seeks the source, crops and scales it to
+    ``TARGET_W`` x ``TARGET_H`` along the focus path, burns in the
+    subtitles and encodes the audio: a single decode, encode and write
+    per clip.
+``"chain"``
+    The original proof-of-concept that wires the individual utilities
+    together (PNG frames, muxing, subtitle burn-in as separate steps).
 """
 from __future__ import annotations
 
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, List, Optional, Tuple
 
 from . import config
-from .ffmpeg_utils import mux_video_with_audio, pngs_to_mp4
-from .focus_track import compute_focus_path
-from .subs import burn_subtitles, transcribe_segment, write_srt
+from .ffmpeg_utils import _run, find_ffmpeg, mux_video_with_audio, pngs_to_mp4, x264_args
+from .focus_track import compute_focus_path, estimate_centroids
+from .mediainfo import probe
+from .subs import SubtitleSegment, burn_subtitles, transcribe_segment, write_ass, write_srt
 
 
-def render_window(
+@dataclass
+class PreparedWindow:
+    """Output of the CPU-bound stage of :func:`render_window`."""
+
+    source: Path
+    start_s: float
+    dur_s: float
+    tmp_dir: Path
+    out_path: Path
+    srt_path: Path
+    segments: List[SubtitleSegment]
+    # Audio comes from here when ``source`` is a video-only normalised file
+    audio_source: Optional[Path] = None
+    # sendcmd script driving the crop along the focus path, and the
+    # initial ``(w, h, x, y)`` crop box
+    focus_cmd: Optional[Path] = None
+    crop_box: Optional[Tuple[int, int, int, int]] = None
+    # Styled subtitles for burn-in (same events as ``srt_path``)
+    ass_path: Optional[Path] = None
+    # Dubbed audio track in clip time, replaces the source audio
+    dub_path: Optional[Path] = None
+
+    @property
+    def audio(self) -> Path:
+        return self.audio_source or self.source
+
+
+def prepare_window(
     source: str | Path,
     start_s: float,
     dur_s: float,
     tmp_dir: str | Path,
     out_path: str | Path,
-) -> Path:
-    """Render a very small proof-of-concept clip.
-
-    The function performs the following minimal steps:
+    audio_source: str | Path | None = None,
+) -> PreparedWindow:
+    """CPU-bound half of :func:`render_window`: transcription, subtitles
+    and the focus path.
 
-    * transcribe the segment (stub)
-    * write a trivial SRT file
-    * simply copy the video portion via ``ffmpeg`` and mux the audio using
-      :func:`mux_video_with_audio`
+    ``audio_source`` supplies the audio (and the speech to transcribe)
+    when ``source`` is a video-only normalised file.
+    With ``config.DUB_ENABLED`` the translated dub track is built here
+    as well.
     """
 
     tmp_dir = Path(tmp_dir)
-    out_path = Path(out_path)
     tmp_dir.mkdir(parents=True, exist_ok=True)
     srt_path = tmp_dir / "subs.srt"
+    ass_path = tmp_dir / "subs.ass"
 
-    # Subtitle workflow (dummy)
-    result = transcribe_segment(source, start_s, dur_s, str(tmp_dir), config.WHISPER_MODEL)
+    audio_path = Path(audio_source) if audio_source is not None else None
+    result = transcribe_segment(
+        audio_path or source, start_s, dur_s, str(tmp_dir), config.WHISPER_MODEL
+    )
     segments = result["segments"]
-    write_srt(segments, srt_path)
+    # Subtitle files use clip time, the segments keep source time
+    write_srt(segments, srt_path, offset=start_s)
+    write_ass(segments, ass_path, offset=start_s)
+
+    dub_path = None
+    if config.DUB_ENABLED:
+        from .dub import get_dubber  # imported lazily, only needed when dubbing
+
+        dub_path = get_dubber().dub_window(audio_path or source, start_s, dur_s, tmp_dir / "dub.wav")
+
+    focus_cmd = crop_box = None
+    try:
+        width, height = probe(source).resolution
+    except (RuntimeError, OSError):
+        width = height = 0  # unknown size: the encoder falls back to a centre crop
+    if width and height:
+        num_frames = max(1, int(round(dur_s * config.OUTPUT_FPS)))
+        try:
+            centroids = estimate_centroids(str(source), start_s, dur_s)
+        except RuntimeError:
+            centroids = None  # tracking failed: keep the focus centred
+        path = compute_focus_path(num_frames, width, height, centroids)
+        focus_cmd = tmp_dir / "focus.cmd"
+        focus_cmd.write_text(path.to_sendcmd(width, height), encoding="utf-8")
+        crop_box = tuple(int(v) for v in path.crop_boxes(width, height)[0])
+
+    return PreparedWindow(
+        Path(source),
+        start_s,
+        dur_s,
+        tmp_dir,
+        Path(out_path),
+        srt_path,
+        segments,
+        audio_path,
+        focus_cmd,
+        crop_box,
+        ass_path,
+        dub_path,
+    )
+
+
+def _crop_filter(num_frames: int) -> str:
+    """Return a static 9:16 ``crop`` filter centred on the mean focus.
+
+    Used when the source size is unknown and no sendcmd script exists.
+    """
+
+    path = compute_focus_path(max(1, num_frames), 1, 1)  # normalised coords
+    fx, fy, zoom = float(path.x.mean()), float(path.y.mean()), float(path.zoom.mean())
+    w = f"trunc(min(iw\\,ih*{config.ASPECT})/{zoom:.4f}/2)*2"
+    h = f"trunc(ow/{config.ASPECT}/2)*2"
+    x = f"clip(iw*{fx:.4f}-ow/2\\,0\\,iw-ow)"
+    y = f"clip(ih*{fy:.4f}-oh/2\\,0\\,ih-oh)"
+    return f"crop=w={w}:h={h}:x={x}:y={y}"
+
+
+def _has_audio(path: Path) -> bool:
+    """Return whether ``path`` has an audio stream (``True`` if unknown)."""
+
+    try:
+        return probe(path).has_audio
+    except (OSError, RuntimeError):
+        return True
+
+
+def encode_window_graph(prep: PreparedWindow) -> Path:
+    """Encode a clip with a single ffmpeg filter graph.
+
+    ffmpeg runs inside ``prep.tmp_dir`` so the subtitle file can be
+    referenced by its bare name, avoiding filter-argument escaping of
+    arbitrary paths.
+    """
+
+    num_frames = int(round(prep.dur_s * config.OUTPUT_FPS))
+    if prep.focus_cmd is not None and prep.crop_box is not None:
+        w, h, x, y = prep.crop_box
+        crop = [f"sendcmd=f={prep.focus_cmd.name}", f"crop=w={w}:h={h}:x={x}:y={y}"]
+    else:
+        crop = [_crop_filter(num_frames)]
+    chain = [
+        *crop,
+        f"scale={config.TARGET_W}:{config.TARGET_H}:flags=lanczos",
+        "setsar=1",
+        f"fps={config.OUTPUT_FPS}",
+    ]
+    if prep.segments:
+        if prep.ass_path is not None:
+            chain.append(f"ass={prep.ass_path.name}")
+        else:
+            chain.append(f"subtitles={prep.srt_path.name}")
+    graph = "[0:v]" + ",".join(chain) + "[v]"
+
+    seek = ["-ss", str(prep.start_s), "-t", str(prep.dur_s)]
+    cmd = [find_ffmpeg(), "-y", "-v", "error", *seek, "-i", str(prep.source.resolve())]
+    audio_input = 0
+    if prep.dub_path is not None:
+        cmd += ["-i", str(prep.dub_path.resolve())]
+        audio_input = 1
+    elif prep.audio_source is not None:
+        cmd += [*seek, "-i", str(prep.audio_source.resolve())]
+        audio_input = 1
+    audio_map = f"{audio_input}:a:0?"
+    if prep.dub_path is None and not _has_audio(prep.audio):
+        # Match the chain path, which muxes silence for audio-less sources
+        cmd += ["-f", "lavfi", "-t", str(prep.dur_s), "-i", "anullsrc=channel_layout=stereo:sample_rate=44100"]
+        audio_map = f"{audio_input + 1}:a:0"
+    cmd += [
+        "-filter_complex",
+        graph,
+        "-map",
+        "[v]",
+        "-map",
+        audio_map,
+        *x264_args(),
+        "-pix_fmt",
+        "yuv420p",
+        "-c:a",
+        "aac",
+        "-ar",
+        "44100",
+        "-ac",
+        "2",
+        "-movflags",
+        "+faststart",
+        str(prep.out_path.resolve()),
+    ]
+    prep.out_path.parent.mkdir(parents=True, exist_ok=True)
+    _run(cmd, cwd=prep.tmp_dir, tag="render")
+    return prep.out_path
+
+
+def encode_window(prep: PreparedWindow, mode: str | None = None) -> Path:
+    """Subprocess-bound half of :func:`render_window`: ffmpeg encoding."""
+
+    if (mode or config.RENDER_MODE) == "graph":
+        return encode_window_graph(prep)
 
     # Extract video frames (as a placeholder we simply copy using ffmpeg)
-    silent_video = tmp_dir / "silent.mp4"
-    pngs_to_mp4(tmp_dir, 30, silent_video)  # this will fail if no PNGs; placeholder
+    silent_video = prep.tmp_dir / "silent.mp4"
+    pngs_to_mp4(prep.tmp_dir, 30, silent_video)  # this will fail if no PNGs; placeholder
 
     # Mux audio using helper which includes silence fallback
-    mux_video_with_audio(silent_video, source, start_s, dur_s, out_path)
+    if prep.dub_path is not None:
+        mux_video_with_audio(silent_video, prep.dub_path, 0.0, prep.dur_s, prep.out_path)
+    else:
+        mux_video_with_audio(silent_video, prep.audio, prep.start_s, prep.dur_s, prep.out_path)
+
+    # Burn subtitles in place (the ASS file carries the style)
+    burn_subtitles(prep.out_path, prep.ass_path or prep.srt_path, prep.out_path)
+    return prep.out_path
+
+
+def render_window(
+    source: str | Path,
+    start_s: float,
+    dur_s: float,
+    tmp_dir: str | Path,
+    out_path: str | Path,
+) -> Path:
+    """Render a single clip.
+
+    The function performs the following steps:
+
+    * transcribe the segment
+    * write SRT and ASS subtitles in clip time
+    * optionally build a dubbed audio track (``config.DUB_ENABLED``)
+    * encode the clip according to ``config.RENDER_MODE``
+
+    It is :func:`prepare_window` followed by :func:`encode_window`; the
+    pipeline calls the two halves separately so they can overlap.
+    """
 
-    # Burn subtitles (dummy copy)
-    burn_subtitles(out_path, srt_path, out_path)
-    return out_path
+    return encode_window(prepare_window(source, start_s, dur_s, tmp_dir, out_path))
@@ -5,11 +5,40 @@ implemented: the :func:`pick_best_windows` function.  It operates on
 pre-calculated motion and speech energy profiles and selects the best
 non-overlapping windows according to the weighted score described in the
 specification.
+
+Window scores are computed from cumulative sums so every candidate costs
+O(1) regardless of its length.  NumPy is used when available; a pure
+Python implementation with identical results is kept as a fallback.
+
+:func:`motion_profile` and :func:`detect_scenes` read downscaled frames
+streamed by ffmpeg instead of decoding full-resolution video in Python;
+:func:`speech_energy` and :func:`voice_activity` read mono PCM the same
+way.
 """
 from __future__ import annotations
 
+import heapq
+import math
+from bisect import bisect_left
 from dataclasses import dataclass
-from typing import Iterable, List, Sequence, Tuple
+from itertools import accumulate
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+from . import config, ffmpeg_utils
+
+try:  # pragma: no cover - NumPy is optional for the scoring engine
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+
+
+MOTION_WEIGHT = 0.7
+SPEECH_WEIGHT = 0.3
+
+AUDIO_RATE = 16000  # mono PCM rate used for speech analysis
+VAD_FRAME = 320  # 20 ms at AUDIO_RATE
+VAD_MIN_RMS = 10 ** (-45 / 20)  # -45 dBFS
+VAD_MAX_FLATNESS = 0.35
 
 
 @dataclass
@@ -19,6 +48,88 @@ class Window:
     score: float
 
 
+def _window_bounds(duration: int, window_candidates: Sequence[int], step: int) -> Iterator[Tuple[int, int]]:
+    """Yield ``(start, end)`` for every candidate in scoring order."""
+
+    for w in window_candidates:
+        for start in range(0, max(0, duration - w) + 1, step):
+            yield start, start + w
+
+
+def _score_windows_numpy(duration, motion, speech, window_candidates, step):
+    cm = np.concatenate(([0.0], np.cumsum(np.asarray(motion, dtype=np.float64))))
+    cs = np.concatenate(([0.0], np.cumsum(np.asarray(speech, dtype=np.float64))))
+    starts_all, ends_all, scores_all = [], [], []
+    for w in window_candidates:
+        starts = np.arange(0, max(0, duration - w) + 1, step, dtype=np.int64)
+        ends = starts + w
+        # Slicing semantics: ``motion[start:end]`` silently truncates.
+        m_lo = np.minimum(starts, len(cm) - 1)
+        m_hi = np.minimum(ends, len(cm) - 1)
+        s_lo = np.minimum(starts, len(cs) - 1)
+        s_hi = np.minimum(ends, len(cs) - 1)
+        motion_avg = (cm[m_hi] - cm[m_lo]) / w
+        speech_avg = (cs[s_hi] - cs[s_lo]) / w
+        starts_all.append(starts)
+        ends_all.append(ends)
+        scores_all.append(MOTION_WEIGHT * motion_avg + SPEECH_WEIGHT * speech_avg)
+    if not scores_all:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float64)
+    return np.concatenate(starts_all), np.concatenate(ends_all), np.concatenate(scores_all)
+
+
+def _score_windows_python(duration, motion, speech, window_candidates, step):
+    cm = [0.0, *accumulate(float(v) for v in motion)]
+    cs = [0.0, *accumulate(float(v) for v in speech)]
+    last_m, last_s = len(cm) - 1, len(cs) - 1
+    starts: List[int] = []
+    ends: List[int] = []
+    scores: List[float] = []
+    for start, end in _window_bounds(duration, window_candidates, step):
+        w = end - start
+        motion_avg = (cm[min(end, last_m)] - cm[min(start, last_m)]) / w
+        speech_avg = (cs[min(end, last_s)] - cs[min(start, last_s)]) / w
+        starts.append(start)
+        ends.append(end)
+        scores.append(MOTION_WEIGHT * motion_avg + SPEECH_WEIGHT * speech_avg)
+    return starts, ends, scores
+
+
+def score_windows(
+    duration: int,
+    motion: Sequence[float],
+    speech: Sequence[float],
+    window_candidates: Sequence[int] = (60, 45, 30),
+    step: int = 5,
+):
+    """Score every candidate window of every size in a single pass.
+
+    Returns three parallel sequences ``(starts, ends, scores)`` ordered by
+    window size (in ``window_candidates`` order) and then by start time.
+    NumPy arrays are returned when NumPy is installed, plain lists
+    otherwise.
+    """
+
+    if np is not None:
+        return _score_windows_numpy(duration, motion, speech, window_candidates, step)
+    return _score_windows_python(duration, motion, speech, window_candidates, step)
+
+
+def _ranked(scores) -> Iterator[int]:
+    """Yield candidate indices by descending score, ties in input order."""
+
+    if np is not None and isinstance(scores, np.ndarray):
+        # A stable sort on the negated scores matches ``list.sort(reverse=True)``.
+        yield from np.argsort(-scores, kind="stable").tolist()
+        return
+    # Lazy heap: O(n) to build, O(log n) per candidate actually inspected.
+    heap = [(-score, idx) for idx, score in enumerate(scores)]
+    heapq.heapify(heap)
+    while heap:
+        yield heapq.heappop(heap)[1]
+
+
 def pick_best_windows(
     duration: int,
     motion: Sequence[float],
@@ -47,43 +158,475 @@ def pick_best_windows(
         start of another.
     """
 
-    candidates: List[Window] = []
-    for w in window_candidates:
-        for start in range(0, max(0, duration - w) + 1, step):
-            end = start + w
-            motion_avg = sum(motion[start:end]) / w
-            speech_avg = sum(speech[start:end]) / w
-            score = 0.7 * motion_avg + 0.3 * speech_avg
-            candidates.append(Window(start, end, score))
-
-    # Sort by score descending
-    candidates.sort(key=lambda w: w.score, reverse=True)
+    starts, ends, scores = score_windows(duration, motion, speech, window_candidates, step)
 
+    # Picked windows are kept sorted by start so that overlap checks only
+    # need to look at the two neighbours of a candidate.
     picked: List[Window] = []
-    for win in candidates:
+    picked_starts: List[int] = []
+    if top_n <= 0:
+        return picked
+    for idx in _ranked(scores):
+        start, end = int(starts[idx]), int(ends[idx])
+        pos = bisect_left(picked_starts, start)
+        if pos > 0 and start < picked[pos - 1].end + min_gap:
+            continue
+        if pos < len(picked) and end + min_gap > picked[pos].start:
+            continue
+        picked.insert(pos, Window(start, end, float(scores[idx])))
+        picked_starts.insert(pos, start)
         if len(picked) >= top_n:
             break
-        if all(win.end + min_gap <= p.start or win.start >= p.end + min_gap for p in picked):
-            picked.append(win)
-
-    # Sort picked windows chronologically for convenience
-    picked.sort(key=lambda w: w.start)
     return picked
 
 
-# The following functions are placeholders to maintain the module
-# interface.  They are intentionally simplified and are not used in the
-# unit tests, but they provide starting points for future development.
+class StreamingWindowPicker:
+    """Incremental counterpart of :func:`pick_best_windows`.
+
+    Samples are fed one second at a time with :meth:`push`.  Only the last
+    ``max(window_candidates)`` samples are retained in a ring buffer and
+    the running sum of every window size is updated in O(1), so memory use
+    does not grow with the length of the stream.
+
+    Candidates are selected greedily in arrival order: a new window
+    replaces the pending windows it conflicts with only if it scores
+    higher than all of them.  A pending window is *finalized* (returned by
+    :meth:`push`) once no future window can start within ``min_gap``
+    seconds of its end.  Call :meth:`flush` when the stream ends.
+
+    With ``top_n`` the best windows can only be known at the end of the
+    stream: finalized windows are kept in a min-heap bounded to ``top_n``
+    entries (the lowest scoring one is evicted first) and :meth:`flush`
+    returns the survivors in chronological order.
+
+    Parameters
+    ----------
+    window_candidates, step, min_gap:
+        Same meaning as for :func:`pick_best_windows`.
+    top_n:
+        Number of highest scoring windows emitted by :meth:`flush`, or
+        ``None`` to emit every window from :meth:`push` as soon as it is
+        finalized.
+    min_score:
+        Windows scoring at or below this value are never emitted.  A live
+        stream has no global ranking, so this takes the place of the
+        "top N" cut-off for quiet stretches.
+    """
+
+    def __init__(
+        self,
+        window_candidates: Sequence[int] = (60, 45, 30),
+        step: int = 5,
+        top_n: int | None = None,
+        min_gap: int = 2,
+        min_score: float = 0.0,
+    ) -> None:
+        self.window_candidates = tuple(window_candidates)
+        self.step = step
+        self.top_n = top_n
+        self.min_gap = min_gap
+        self.min_score = min_score
+        self._size = max(self.window_candidates)
+        self._motion = [0.0] * self._size
+        self._speech = [0.0] * self._size
+        self._sum_m = {w: 0.0 for w in self.window_candidates}
+        self._sum_s = {w: 0.0 for w in self.window_candidates}
+        self._t = 0  # number of samples seen so far
+        self._pending: List[Window] = []  # sorted by start, non-conflicting
+        self._best: List[Tuple[float, int, Window]] = []  # min-heap when top_n is set
+
+    @property
+    def seconds(self) -> int:
+        """Number of samples consumed so far."""
+        return self._t
+
+    def push(self, motion: float, speech: float) -> List[Window]:
+        """Consume one per-second sample and return finalized windows."""
+
+        t = self._t
+        slot = t % self._size
+        for w in self.window_candidates:
+            if t >= w:
+                old = (t - w) % self._size
+                self._sum_m[w] -= self._motion[old]
+                self._sum_s[w] -= self._speech[old]
+            self._sum_m[w] += motion
+            self._sum_s[w] += speech
+        self._motion[slot] = float(motion)
+        self._speech[slot] = float(speech)
+        self._t = t + 1
+
+        end = self._t
+        for w in self.window_candidates:
+            start = end - w
+            if start >= 0 and start % self.step == 0:
+                score = MOTION_WEIGHT * self._sum_m[w] / w + SPEECH_WEIGHT * self._sum_s[w] / w
+                self._offer(Window(start, end, score))
+
+        # The next window to be scored ends at ``end + 1``; the earliest
+        # any future window can start is therefore ``end + 1 - size``.
+        return self._finalize(end + 1 - self._size)
+
+    def extend(self, motion: Iterable[float], speech: Iterable[float]) -> List[Window]:
+        """Push several samples at once, returning all finalized windows."""
+
+        out: List[Window] = []
+        for m, s in zip(motion, speech):
+            out.extend(self.push(m, s))
+        return out
+
+    def flush(self) -> List[Window]:
+        """Finalize and return every pending window (end of stream).
+
+        With ``top_n`` this returns the best ``top_n`` windows of the
+        whole stream, sorted by start.
+        """
+
+        done = self._finalize(None)
+        if self.top_n is not None:
+            done = sorted((win for _, _, win in self._best), key=lambda w: w.start)
+            self._best = []
+        return done
+
+    def _offer(self, win: Window) -> None:
+        if win.score <= self.min_score:
+            return
+        # The pending set is small (bounded by the ring buffer span), so a
+        # linear scan is cheaper than maintaining a separate index.
+        lo = 0
+        while lo < len(self._pending) and self._pending[lo].end + self.min_gap <= win.start:
+            lo += 1
+        hi = lo
+        while hi < len(self._pending) and self._pending[hi].start < win.end + self.min_gap:
+            hi += 1
+        conflicts = self._pending[lo:hi]
+        if conflicts and win.score <= max(p.score for p in conflicts):
+            return
+        self._pending[lo:hi] = [win]
+
+    def _finalize(self, horizon: int | None) -> List[Window]:
+        done: List[Window] = []
+        while self._pending and (horizon is None or self._pending[0].end + self.min_gap <= horizon):
+            win = self._pending.pop(0)
+            if self.top_n is None:
+                done.append(win)
+            elif len(self._best) < self.top_n:
+                heapq.heappush(self._best, (win.score, win.start, win))
+            elif self.top_n and (win.score, win.start) > self._best[0][:2]:
+                heapq.heapreplace(self._best, (win.score, win.start, win))
+        return done
+
+
+def _rgb_to_hsv(rgb: "np.ndarray", hsv: "np.ndarray") -> None:
+    """Convert ``(n, 3)`` uint8 RGB pixels to ``(3, n)`` float32 HSV.
+
+    Uses OpenCV's 8-bit ranges (H ``0..180``, S and V ``0..255``) so
+    ``config.SCENE_THRESHOLD`` keeps the meaning it has in PySceneDetect's
+    content detector.
+    """
+
+    r, g, b = (rgb[:, i].astype(np.float32) for i in range(3))
+    v = np.maximum(np.maximum(r, g), b)
+    c = v - np.minimum(np.minimum(r, g), b)
+    safe_c = np.where(c > 0, c, 1.0)
+    h = np.where(
+        v == r,
+        np.mod((g - b) / safe_c, 6.0),
+        np.where(v == g, (b - r) / safe_c + 2.0, (r - g) / safe_c + 4.0),
+    )
+    hsv[0] = np.where(c > 0, h * 30.0, 0.0)
+    hsv[1] = np.where(v > 0, c / np.where(v > 0, v, 1.0) * 255.0, 0.0)
+    hsv[2] = v
+
+
+def _content_deltas(stream, width: int, height: int) -> Iterator[Tuple[int, float]]:
+    """Yield ``(frame_index, hsv_delta)`` for raw ``rgb24`` frames.
+
+    The delta is the mean absolute change of hue, saturation and value
+    between consecutive frames, averaged over the three channels.
+    """
+
+    n = width * height
+    raw = bytearray(n * 3)
+    rgb = np.frombuffer(raw, dtype=np.uint8).reshape(n, 3)
+    hsv = [np.empty((3, n), dtype=np.float32), np.empty((3, n), dtype=np.float32)]
+    diff = np.empty((3, n), dtype=np.float32)
+    scale = 1.0 / (3 * n)
+    idx = 0
+    while ffmpeg_utils.read_exact(stream, raw):
+        _rgb_to_hsv(rgb, hsv[idx & 1])
+        if idx:
+            np.subtract(hsv[idx & 1], hsv[(idx - 1) & 1], out=diff)
+            np.abs(diff, out=diff)
+            yield idx, float(diff.sum(dtype=np.float64)) * scale
+        idx += 1
+
+
+def detect_scenes(
+    path: str,
+    threshold: float = config.SCENE_THRESHOLD,
+    keyframes_only: bool = False,
+    min_scene_len: int = 15,
+) -> Iterator[Tuple[int, int]]:
+    """Lazily yield ``(start_frame, end_frame)`` scene ranges of ``path``.
+
+    ffmpeg decodes the video and streams ``rgb24`` frames downscaled to
+    ``config.ANALYSIS_W`` x ``config.ANALYSIS_H``; a cut is declared when
+    the HSV delta to the previous frame reaches ``threshold`` and the
+    current scene is at least ``min_scene_len`` frames long.  Ranges are
+    half-open and numbered in source frames; each one is yielded as soon
+    as its closing cut is seen, so consumers can start before the scan
+    finishes.  Closing the generator early stops ffmpeg.
+
+    With ``keyframes_only`` the decoder skips every non-key frame
+    (``-skip_frame nokey``), which is much faster but only finds cuts
+    on keyframes; keyframe positions come from :func:`.mediainfo.probe`.
+    """
+
+    if np is None:
+        raise RuntimeError("numpy is required for detect_scenes")
+
+    frame_of = None
+    total = None
+    if keyframes_only:
+        from .mediainfo import probe  # local import: mediainfo is not needed otherwise
+
+        info = probe(path)
+        fps = info.fps or config.OUTPUT_FPS
+        origin = info.keyframes[0] if info.keyframes else 0.0
+        frame_of = [int(round((t - origin) * fps)) for t in info.keyframes]
+        total = int(round(info.duration * fps))
+
+    cmd = [ffmpeg_utils.find_ffmpeg(), "-v", "error", "-nostdin"]
+    if keyframes_only:
+        cmd += ["-skip_frame", "nokey"]
+    cmd += [
+        "-i",
+        str(path),
+        "-map",
+        "0:v:0",
+        "-vsync",
+        "passthrough",
+        "-vf",
+        f"scale={config.ANALYSIS_W}:{config.ANALYSIS_H}:flags=area,format=rgb24",
+        "-f",
+        "rawvideo",
+        "pipe:1",
+    ]
+
+    last_cut = 0
+    frames = 1
+    with ffmpeg_utils.open_pipe(cmd, tag="detect_scenes") as proc:
+        for idx, delta in _content_deltas(proc.stdout, config.ANALYSIS_W, config.ANALYSIS_H):
+            frame = idx
+            if frame_of is not None:
+                frame = frame_of[idx] if idx < len(frame_of) else frame_of[-1]
+            frames = frame + 1
+            if delta >= threshold and frame - last_cut >= min_scene_len:
+                yield last_cut, frame
+                last_cut = frame
+    end = max(frames, total or 0)
+    if end > last_cut:
+        yield last_cut, end
+
+
+class _PerSecond:
+    """Average time-stamped samples into one value per second."""
+
+    def __init__(self) -> None:
+        self.values: List[float] = []
+        self._acc = 0.0
+        self._count = 0
+
+    def add(self, second: int, value: float) -> None:
+        while second > len(self.values):
+            self.values.append(self._acc / self._count if self._count else 0.0)
+            self._acc, self._count = 0.0, 0
+        self._acc += value
+        self._count += 1
+
+    def finish(self, length: int | None = None):
+        if self._count:
+            self.values.append(self._acc / self._count)
+            self._acc, self._count = 0.0, 0
+        out = np.asarray(self.values, dtype=np.float32)
+        return out if length is None else _fit_length(out, length)
+
+
+def _fit_length(values: "np.ndarray", length: int) -> "np.ndarray":
+    """Truncate or zero-pad ``values`` to ``length`` entries."""
+    return np.pad(values[:length], (0, max(0, length - len(values))))
+
+
+def _frame_deltas(stream, width: int, height: int) -> Iterator[Tuple[int, float]]:
+    """Yield ``(frame_index, mean_abs_luma_delta)`` for raw gray frames.
+
+    Deltas are on the ``0..255`` scale and start at frame index 1.  Two
+    frame buffers are swapped instead of reallocated per frame.
+    """
+
+    bufs = [bytearray(width * height), bytearray(width * height)]
+    frames = [np.frombuffer(b, dtype=np.uint8) for b in bufs]
+    diff = np.empty(width * height, dtype=np.int16)
+    inv_px = 1.0 / (width * height)
+    idx = 0
+    while ffmpeg_utils.read_exact(stream, bufs[idx & 1]):
+        if idx:
+            np.subtract(frames[idx & 1], frames[(idx - 1) & 1], out=diff, dtype=np.int16)
+            np.abs(diff, out=diff)
+            yield idx, float(diff.sum(dtype=np.int64)) * inv_px
+        idx += 1
 
-def detect_scenes(path: str, threshold: float) -> Iterable[Tuple[int, int]]:
-    """Placeholder scene detection returning a single full-range scene."""
-    # In a full implementation we would call PySceneDetect here.
-    raise NotImplementedError("Scene detection is not implemented in this kata")
 
+def _seek_args(start_s: float, end_s: float | None) -> List[str]:
+    args: List[str] = []
+    if start_s:
+        args += ["-ss", str(start_s)]
+    if end_s is not None:
+        args += ["-t", str(max(0.0, end_s - start_s))]
+    return args
 
-def motion_profile(path: str, start_s: float, end_s: float, fps: int, stride_frames: int):
-    raise NotImplementedError
 
+def _gray_filter(rate: float) -> str:
+    return f"fps={rate},scale={config.ANALYSIS_W}:{config.ANALYSIS_H}:flags=area,format=gray"
+
+
+def motion_profile(
+    path: str,
+    start_s: float = 0.0,
+    end_s: float | None = None,
+    fps: int = config.SAMPLE_HZ,
+    stride_frames: int = 1,
+):
+    """Return the per-second motion energy of ``path`` between two times.
+
+    ffmpeg decodes the range once and streams downscaled grayscale frames
+    (``config.ANALYSIS_W`` x ``config.ANALYSIS_H``) over a pipe at
+    ``fps / stride_frames`` frames per second.  Each value is the mean
+    absolute luma difference between consecutive sampled frames within
+    that second, scaled to ``0..1``.  The result is a ``float32`` array
+    with one entry per second that can be passed straight to
+    :func:`pick_best_windows`.
+    """
+
+    if np is None:
+        raise RuntimeError("numpy is required for motion_profile")
+
+    rate = fps / max(1, stride_frames)
+    cmd = [ffmpeg_utils.find_ffmpeg(), "-v", "error", "-nostdin"]
+    cmd += _seek_args(start_s, end_s)
+    cmd += [
+        "-i",
+        str(path),
+        "-an",
+        "-sn",
+        "-dn",
+        "-vf",
+        _gray_filter(rate),
+        "-f",
+        "rawvideo",
+        "pipe:1",
+    ]
+
+    seconds = _PerSecond()
+    with ffmpeg_utils.open_pipe(cmd, tag="motion_profile") as proc:
+        for idx, delta in _frame_deltas(proc.stdout, config.ANALYSIS_W, config.ANALYSIS_H):
+            seconds.add(int(idx / rate), delta / 255.0)
+    length = None if end_s is None else int(math.ceil(end_s - start_s))
+    return seconds.finish(length)
+
+
+def _flatness(power: "np.ndarray") -> "np.ndarray":
+    """Spectral flatness (geometric / arithmetic mean) of each row."""
+
+    power = power + 1e-12
+    return np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+
+
+def _read_speech(stream, energy: _PerSecond, activity: _PerSecond | None = None) -> None:
+    """Consume mono ``AUDIO_RATE`` s16le PCM and record per-second profiles.
+
+    ``energy`` receives the RMS of each second (``0..1``).  ``activity``,
+    if given, receives the fraction of ``VAD_FRAME`` sample frames that
+    look like voice: loud enough (``VAD_MIN_RMS``) and tonal enough
+    (spectral flatness over the speech band below ``VAD_MAX_FLATNESS``).
+    Buffers are allocated once, so memory use does not depend on the
+    length of the stream.
+    """
+
+    raw = bytearray(AUDIO_RATE * 2)
+    samples = np.frombuffer(raw, dtype=np.int16)
+    work = np.empty(AUDIO_RATE, dtype=np.float32)
+    window = np.hanning(VAD_FRAME).astype(np.float32)
+    freqs = np.fft.rfftfreq(VAD_FRAME, 1.0 / AUDIO_RATE)
+    band = (freqs >= 300) & (freqs <= 4000)
+    second = 0
+    while True:
+        got = ffmpeg_utils.read_full(stream, raw) // 2
+        if not got:
+            break
+        chunk = work[:got]
+        np.multiply(samples[:got], 1.0 / 32768.0, out=chunk)
+        energy.add(second, math.sqrt(float(np.dot(chunk, chunk)) / got))
+        if activity is not None:
+            n = got // VAD_FRAME
+            if n:
+                frames = chunk[: n * VAD_FRAME].reshape(n, VAD_FRAME)
+                loud = np.sqrt(np.mean(frames * frames, axis=1)) >= VAD_MIN_RMS
+                power = np.abs(np.fft.rfft(frames * window, axis=1)[:, band]) ** 2
+                voiced = loud & (_flatness(power) < VAD_MAX_FLATNESS)
+                activity.add(second, float(voiced.mean()))
+            else:
+                activity.add(second, 0.0)
+        second += 1
+        if got < AUDIO_RATE:
+            break
+
+
+def _speech_profiles(path: str, start_s: float, end_s: float | None, with_activity: bool):
+    if np is None:
+        raise RuntimeError("numpy is required for speech analysis")
+
+    cmd = [ffmpeg_utils.find_ffmpeg(), "-v", "error", "-nostdin"]
+    cmd += _seek_args(start_s, end_s)
+    cmd += [
+        "-i",
+        str(path),
+        "-map",
+        "0:a:0",
+        "-ac",
+        "1",
+        "-ar",
+        str(AUDIO_RATE),
+        "-f",
+        "s16le",
+        "pipe:1",
+    ]
+    energy = _PerSecond()
+    activity = _PerSecond() if with_activity else None
+    with ffmpeg_utils.open_pipe(cmd, tag="speech") as proc:
+        _read_speech(proc.stdout, energy, activity)
+    length = None if end_s is None else int(math.ceil(end_s - start_s))
+    return energy.finish(length), activity.finish(length) if activity is not None else None
+
+
+def speech_energy(path: str, start_s: float = 0.0, end_s: float | None = None):
+    """Return the per-second RMS speech energy of ``path`` between two times.
+
+    ffmpeg streams mono 16 kHz PCM over a pipe (nothing is written to
+    disk) and the RMS of every second is computed in fixed-size chunks.
+    The result is a ``float32`` array in ``0..1`` with one entry per
+    second, ready for :func:`pick_best_windows`.
+    """
+
+    return _speech_profiles(path, start_s, end_s, with_activity=False)[0]
+
+
+def voice_activity(path: str, start_s: float = 0.0, end_s: float | None = None):
+    """Return the per-second voice activity of ``path`` (``0..1``).
+
+    Each value is the fraction of 20 ms frames in that second that pass
+    the energy and spectral-flatness test of :func:`_read_speech`.
+    """
 
-def speech_energy(path: str, start_s: float, end_s: float):
-    raise NotImplementedError
+    return _speech_profiles(path, start_s, end_s, with_activity=True)[1]
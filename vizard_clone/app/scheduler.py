@@ -1,9 +1,30 @@
-"""Simple scheduling stub using APScheduler."""
+"""Upload scheduling with a persistent job queue.
+
+Jobs live in a SQLite store (WAL mode, indexed on the due time) so they
+survive restarts, and in an in-memory min-heap ordered by ``Job.when`` so
+:meth:`Scheduler.run_pending` only touches jobs that are due.  Due jobs
+are uploaded on a bounded thread pool; failures are retried with
+exponential backoff up to ``config.UPLOAD_RETRIES`` times.  When
+APScheduler is installed :meth:`Scheduler.start` ticks the queue from a
+``BackgroundScheduler``.
+
+Delivery is at least once: a job that was running when the process died
+is uploaded again after a restart.
+"""
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import datetime
-from typing import List
+import heapq
+import json
+import logging
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from . import config
 
 try:  # pragma: no cover - APScheduler is optional for tests
     from apscheduler.schedulers.background import BackgroundScheduler
@@ -12,6 +33,10 @@ except Exception:  # pragma: no cover
 
 from .uploader import upload
 
+log = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+
 
 @dataclass
 class Job:
@@ -20,18 +45,180 @@ class Job:
     title: str
     description: str
     tags: List[str]
+    id: Optional[int] = None
+    attempts: int = field(default=0, compare=False)
+
+
+def _ts(when: datetime) -> float:
+    """Seconds since the epoch; naive datetimes are taken as UTC."""
+
+    if when.tzinfo is not None:
+        when = when.astimezone(timezone.utc).replace(tzinfo=None)
+    return (when - _EPOCH).total_seconds()
+
+
+class JobStore:
+    """SQLite-backed job table shared by the scheduler threads."""
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        path = Path(path or Path(config.TEMP) / "jobs.sqlite3")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                due REAL NOT NULL,
+                path TEXT NOT NULL,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                tags TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                state TEXT NOT NULL DEFAULT 'pending',
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS jobs_state_due ON jobs (state, due);
+            """
+        )
+
+    def add(self, job: Job) -> int:
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT INTO jobs (due, path, title, description, tags, attempts) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (_ts(job.when), job.path, job.title, job.description, json.dumps(job.tags), job.attempts),
+            )
+            return int(cur.lastrowid)
+
+    def pending(self) -> Iterator[Tuple[float, Job]]:
+        """Yield ``(due, job)`` for every pending job in due order."""
+
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, due, path, title, description, tags, attempts FROM jobs "
+                "WHERE state = 'pending' ORDER BY due"
+            ).fetchall()
+        for id_, due, path, title, description, tags, attempts in rows:
+            when = _EPOCH + timedelta(seconds=due)
+            yield due, Job(when, path, title, description, json.loads(tags), id_, attempts)
+
+    def reschedule(self, job_id: int, due: float, attempts: int, error: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET due = ?, attempts = ?, error = ? WHERE id = ?",
+                (due, attempts, error, job_id),
+            )
+
+    def finish(self, job_id: int, state: str, error: Optional[str] = None) -> None:
+        """Mark a job ``done`` or ``failed``; it is never loaded again."""
+
+        with self._lock:
+            self._db.execute("UPDATE jobs SET state = ?, error = ? WHERE id = ?", (state, error, job_id))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
 
 
 class Scheduler:
-    def __init__(self):
-        self.jobs: List[Job] = []
+    """Run uploads when their jobs become due.
+
+    Parameters
+    ----------
+    store:
+        Job store; defaults to ``TEMP/jobs.sqlite3``.  Pending jobs in
+        it are loaded on start-up.
+    workers:
+        Maximum number of concurrent uploads.
+    retries, backoff:
+        A failing upload is retried up to ``retries`` times, after
+        ``backoff * 2**(attempt - 1)`` seconds.
+    clock:
+        Returns the current naive UTC time (tests inject a fake one).
+    """
+
+    def __init__(
+        self,
+        store: Optional[JobStore] = None,
+        workers: int = config.UPLOAD_WORKERS,
+        retries: int = config.UPLOAD_RETRIES,
+        backoff: float = config.UPLOAD_BACKOFF,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self.store = store or JobStore()
+        self.retries = retries
+        self.backoff = backoff
+        self.clock = clock
+        self._heap: List[Tuple[float, int, Job]] = [(due, job.id, job) for due, job in self.store.pending()]
+        heapq.heapify(self._heap)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="upload")
         self.scheduler = BackgroundScheduler() if BackgroundScheduler else None
 
-    def add(self, job: Job):
-        self.jobs.append(job)
+    @property
+    def jobs(self) -> List[Job]:
+        """Queued jobs in due order (a snapshot)."""
+
+        with self._lock:
+            return [job for _, _, job in sorted(self._heap)]
+
+    def add(self, job: Job) -> Job:
+        job.id = self.store.add(job)
+        with self._lock:
+            heapq.heappush(self._heap, (_ts(job.when), job.id, job))
+        return job
+
+    def run_pending(self) -> List[Future]:
+        """Dispatch every due job to the upload pool.
+
+        Only due jobs are popped from the heap, so a tick costs
+        ``O(k log n)`` for ``k`` due jobs.  Returns the upload futures.
+        """
+
+        now = _ts(self.clock())
+        due: List[Job] = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[2])
+        return [self._pool.submit(self._execute, job) for job in due]
+
+    def _execute(self, job: Job) -> None:
+        try:
+            upload(job.path, job.title, job.description, job.tags)
+        except Exception as exc:
+            job.attempts += 1
+            if job.attempts > self.retries:
+                log.error("upload of %s failed after %d attempts: %s", job.path, job.attempts, exc)
+                self.store.finish(job.id, "failed", str(exc))
+                return
+            delay = self.backoff * 2 ** (job.attempts - 1)
+            log.warning("upload of %s failed (%s); retrying in %.0fs", job.path, exc, delay)
+            job.when = self.clock() + timedelta(seconds=delay)
+            due = _ts(job.when)
+            self.store.reschedule(job.id, due, job.attempts, str(exc))
+            with self._lock:
+                heapq.heappush(self._heap, (due, job.id, job))
+            return
+        self.store.finish(job.id, "done")
+
+    def start(self, interval: float = 30.0) -> bool:
+        """Tick :meth:`run_pending` every ``interval`` seconds in the background.
+
+        Returns ``False`` if APScheduler is not installed; callers then
+        have to call :meth:`run_pending` themselves.
+        """
+
+        if self.scheduler is None:
+            return False
+        self.scheduler.add_job(self.run_pending, "interval", seconds=interval)
+        self.scheduler.start()
+        return True
 
-    def run_pending(self):
-        for job in list(self.jobs):
-            if job.when <= datetime.utcnow():
-                upload(job.path, job.title, job.description, job.tags)
-                self.jobs.remove(job)
+    def shutdown(self, wait: bool = True) -> None:
+        if self.scheduler is not None and self.scheduler.running:
+            self.scheduler.shutdown(wait=wait)
+        self._pool.shutdown(wait=wait)
+        self.store.close()
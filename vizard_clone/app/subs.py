@@ -1,16 +1,21 @@
-"""Subtitle and dubbing helpers (stub).
+"""Subtitle helpers.
 
-A production ready implementation would wrap Whisper for ASR, translation
-and TTS for dubbing.  These operations are far beyond the scope of the
-exercise so the functions below only provide minimal placeholders that
-mimic the expected interfaces.  They are intentionally simplistic but
-allow other modules to be imported without pulling large dependencies.
+Subtitle segments are written as SRT or styled ASS in clip time, parsed
+back from those files and burnt into clips with ffmpeg.  Speech
+recognition lives in :mod:`.asr` and dubbing in :mod:`.dub`; both keep
+their heavy dependencies optional.
 """
 from __future__ import annotations
 
+import os
+import re
+import shutil
+import textwrap
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List, Optional
+
+from . import config
 
 
 @dataclass
@@ -21,28 +26,277 @@ class SubtitleSegment:
 
 
 def transcribe_segment(src: str | Path, start_s: float, dur_s: float, tmp_dir: str, model: str):
-    """Return a dummy transcription object.
+    """Return the transcription of one window of ``src``.
+
+    The whole source is transcribed once per process (and cached on
+    disk) by :mod:`.asr`; this only slices the window out of it.  The
+    result is ``{"language": ..., "segments": [...]}`` with segment times
+    on the source timeline.  ``tmp_dir`` is kept for compatibility.
+    """
+
+    from . import asr  # local import: asr depends on this module
+
+    language = None if config.LANG_AUTO else config.ASR_LANGUAGE
+    lang, segments = asr.get_service().segments(src, start_s, dur_s, model, language)
+    return {"language": lang, "segments": segments}
+
+
+def line_chars(width: int = config.TARGET_W, font_size: int = config.SUB_FONT_SIZE) -> int:
+    """Characters that fit on one subtitle line of a ``width`` px frame.
+
+    Assumes an average glyph width of half the font size and keeps the
+    horizontal margins free.
+    """
+
+    usable = width - 2 * config.SUB_MARGIN_H
+    return max(8, int(usable / (font_size * 0.5)))
+
+
+def _wrap(text: str, max_chars: int) -> List[str]:
+    return textwrap.wrap(" ".join(text.split()), max_chars, break_long_words=False) or [""]
 
-    The stub pretends everything is English and simply returns a single
-    subtitle covering the requested duration.
+
+def _clip_times(
+    segments: Iterable[SubtitleSegment], offset: float
+) -> Iterator[tuple[int, int, str]]:
+    """Yield ``(start_ms, end_ms, text)`` relative to ``offset``.
+
+    Segments that end before ``offset``, have no duration or have no
+    text are skipped: a blank text line would end an SRT block early.
     """
 
-    seg = SubtitleSegment(start_s, start_s + dur_s, "stub")
-    return {"language": "en", "segments": [seg]}
+    for seg in segments:
+        start = max(0, round((seg.start - offset) * 1000))
+        end = round((seg.end - offset) * 1000)
+        if end > start and seg.text.strip():
+            yield start, end, seg.text
+
+
+def _srt_time(ms: int) -> str:
+    h, ms = divmod(ms, 3_600_000)
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
 
 
-def write_srt(segments: List[SubtitleSegment], path: str | Path) -> Path:
+def _ass_time(ms: int) -> str:
+    cs = (ms + 5) // 10
+    h, cs = divmod(cs, 360_000)
+    m, cs = divmod(cs, 6000)
+    s, cs = divmod(cs, 100)
+    return f"{h:d}:{m:02d}:{s:02d}.{cs:02d}"
+
+
+def write_srt(
+    segments: Iterable[SubtitleSegment],
+    path: str | Path,
+    offset: float = 0.0,
+    max_chars: Optional[int] = None,
+) -> Path:
+    """Write ``segments`` as SubRip, with times relative to ``offset``.
+
+    ``segments`` may be any iterable (including a generator); it is
+    consumed once and written through a single buffered file.  Text is
+    wrapped to ``max_chars`` per line (default: :func:`line_chars`).
+    """
+
     path = Path(path)
-    with path.open("w", encoding="utf-8") as fh:
-        for idx, seg in enumerate(segments, 1):
-            fh.write(f"{idx}\n")
-            fh.write(f"00:00:00,000 --> 00:00:00,000\n{seg.text}\n\n")
+    width = max_chars or line_chars()
+    blocks = (
+        f"{idx}\n{_srt_time(start)} --> {_srt_time(end)}\n" + "\n".join(_wrap(text, width)) + "\n\n"
+        for idx, (start, end, text) in enumerate(_clip_times(segments, offset), 1)
+    )
+    with path.open("w", encoding="utf-8", newline="\n") as fh:
+        fh.writelines(blocks)
     return path
 
 
-def burn_subtitles(video: str | Path, srt: str | Path, out_path: str | Path) -> Path:
-    """Placeholder that simply copies the source video to ``out_path``."""
-    src = Path(video)
-    out = Path(out_path)
-    out.write_bytes(src.read_bytes())
+def ass_header(width: int = config.TARGET_W, height: int = config.TARGET_H) -> str:
+    """Script header with a single ``Default`` style for burn-in."""
+
+    return (
+        "[Script Info]\n"
+        "ScriptType: v4.00+\n"
+        f"PlayResX: {width}\n"
+        f"PlayResY: {height}\n"
+        "WrapStyle: 2\n"
+        "ScaledBorderAndShadow: yes\n"
+        "\n"
+        "[V4+ Styles]\n"
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, "
+        "BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, "
+        "BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n"
+        f"Style: Default,{config.SUB_FONT},{config.SUB_FONT_SIZE},&H00FFFFFF,&H000000FF,"
+        f"&H00000000,&H80000000,-1,0,0,0,100,100,0,0,1,4,1,2,"
+        f"{config.SUB_MARGIN_H},{config.SUB_MARGIN_H},{config.SUB_MARGIN_V},1\n"
+        "\n"
+        "[Events]\n"
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+    )
+
+
+def write_ass(
+    segments: Iterable[SubtitleSegment],
+    path: str | Path,
+    offset: float = 0.0,
+    max_chars: Optional[int] = None,
+) -> Path:
+    """Write ``segments`` as an Advanced SubStation Alpha script.
+
+    Same contract as :func:`write_srt`; the ``Default`` style from
+    :func:`ass_header` sizes text for a ``TARGET_W`` x ``TARGET_H``
+    frame.  Wrapped lines are joined with ``\\N`` and WrapStyle 2
+    stops libass from re-wrapping them.  Braces would start override
+    tags, so they are written as parentheses.
+    """
+
+    path = Path(path)
+    width = max_chars or line_chars()
+    events = (
+        f"Dialogue: 0,{_ass_time(start)},{_ass_time(end)},Default,,0,0,0,,"
+        + "\\N".join(_wrap(text, width)).replace("{", "(").replace("}", ")")
+        + "\n"
+        for start, end, text in _clip_times(segments, offset)
+    )
+    with path.open("w", encoding="utf-8", newline="\n") as fh:
+        fh.write(ass_header())
+        fh.writelines(events)
+    return path
+
+
+_SRT_TIME = re.compile(r"(\d+):(\d{2}):(\d{2})[,.](\d{3})")
+_ASS_TIME = re.compile(r"(\d+):(\d{2}):(\d{2})\.(\d{2})")
+
+
+def _parse_time(pattern: re.Pattern, value: str, scale: int) -> float:
+    match = pattern.fullmatch(value.strip())
+    if match is None:
+        raise ValueError(f"bad subtitle timestamp {value!r}")
+    h, m, s, frac = (int(g) for g in match.groups())
+    return h * 3600 + m * 60 + s + frac / scale
+
+
+def parse_srt(path: str | Path, offset: float = 0.0) -> List[SubtitleSegment]:
+    """Load a SubRip file written by :func:`write_srt`.
+
+    Wrapped lines are joined with spaces and ``offset`` is added back,
+    so ``parse_srt(write_srt(segs, p, offset), offset)`` returns the
+    original segments (to the millisecond).
+    """
+
+    text = Path(path).read_text(encoding="utf-8-sig").replace("\r\n", "\n")
+    out = []
+    for block in text.split("\n\n"):
+        lines = block.strip("\n").split("\n")
+        if len(lines) < 2 or "-->" not in lines[1]:
+            continue
+        start, _, end = lines[1].partition("-->")
+        out.append(
+            SubtitleSegment(
+                _parse_time(_SRT_TIME, start, 1000) + offset,
+                _parse_time(_SRT_TIME, end, 1000) + offset,
+                " ".join(lines[2:]),
+            )
+        )
     return out
+
+
+def parse_ass(path: str | Path, offset: float = 0.0) -> List[SubtitleSegment]:
+    """Load the events of an ASS script written by :func:`write_ass`.
+
+    Like :func:`parse_srt` but with the centisecond precision of ASS.
+    """
+
+    out = []
+    with Path(path).open(encoding="utf-8-sig") as fh:
+        for line in fh:
+            if not line.startswith("Dialogue:"):
+                continue
+            fields = line[len("Dialogue:") :].rstrip("\r\n").split(",", 9)
+            out.append(
+                SubtitleSegment(
+                    _parse_time(_ASS_TIME, fields[1], 100) + offset,
+                    _parse_time(_ASS_TIME, fields[2], 100) + offset,
+                    fields[9].replace("\\N", " "),
+                )
+            )
+    return out
+
+
+def _has_events(path: Path) -> bool:
+    """Whether a subtitle file contains anything to draw."""
+
+    try:
+        if path.suffix.lower() != ".ass":
+            return path.stat().st_size > 0 and any(line.strip() for line in path.open(encoding="utf-8"))
+        with path.open(encoding="utf-8") as fh:
+            return any(line.startswith("Dialogue:") for line in fh)
+    except OSError:
+        return False
+
+
+def _link_or_copy(src: Path, out: Path) -> None:
+    """Publish ``src`` as ``out`` without reading it into memory.
+
+    A hard link is tried first; across filesystems the kernel copies the
+    data (``shutil.copyfile`` uses ``copy_file_range``/``sendfile``).
+    Either way ``out`` is replaced atomically.
+    """
+
+    tmp = out.with_name(f".{out.name}.tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, out)
+
+
+def burn_subtitles(video: str | Path, srt: str | Path, out_path: str | Path) -> Path:
+    """Render the subtitles in ``srt`` into ``video`` and write ``out_path``.
+
+    ``.ass`` files go through the ``ass`` filter (keeping their styles),
+    anything else through ``subtitles``.  ffmpeg writes a temporary file
+    next to ``out_path`` which is then renamed over it, so ``video`` and
+    ``out_path`` may be the same file.  Without subtitle events the video
+    is linked or kernel-copied instead of re-encoded; no clip data passes
+    through Python either way.
+    """
+
+    src = Path(video).resolve()
+    subs_path = Path(srt).resolve()
+    out = Path(out_path).resolve()
+    if not _has_events(subs_path):
+        if src != out:
+            _link_or_copy(src, out)
+        return Path(out_path)
+
+    from .ffmpeg_utils import _run, find_ffmpeg, x264_args  # local import: keeps this module light
+
+    tmp = out.with_name(f".{out.stem}.burn{out.suffix}")
+    filt = "ass" if subs_path.suffix.lower() == ".ass" else "subtitles"
+    cmd = [
+        find_ffmpeg(),
+        "-y",
+        "-v",
+        "error",
+        "-i",
+        str(src),
+        # run inside the subtitle directory so the filter gets a bare name
+        "-vf",
+        f"{filt}={subs_path.name}",
+        *x264_args(),
+        "-pix_fmt",
+        "yuv420p",
+        "-c:a",
+        "copy",
+        "-movflags",
+        "+faststart",
+        str(tmp),
+    ]
+    try:
+        _run(cmd, cwd=subs_path.parent, tag="burn_subtitles")
+        os.replace(tmp, out)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return Path(out_path)
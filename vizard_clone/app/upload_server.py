@@ -0,0 +1,158 @@
+"""Local stand-in for the resumable upload endpoint.
+
+:class:`UploadServer` implements the subset of the resumable protocol
+used by :class:`.uploader.UploadClient` on top of
+``http.server.ThreadingHTTPServer``, so uploads, throughput and resume
+behaviour can be exercised offline:
+
+* ``POST /upload`` with JSON metadata and ``X-Upload-Content-Length``
+  opens a session and returns its URL in ``Location``.
+* ``PUT <session>`` with ``Content-Range: bytes a-b/total`` stores a
+  chunk; ``308`` with ``Range: bytes=0-n`` means more is expected, ``200``
+  with the video resource finishes the upload.
+* ``PUT <session>`` with ``Content-Range: bytes */total`` and no body
+  reports the committed offset the same way.
+
+Received files are written to ``root``.  ``fail_chunks`` makes the given
+(1-based) chunk requests fail with ``503`` to simulate interruptions.
+"""
+from __future__ import annotations
+
+import json
+import re
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can reuse connections
+    server: "_Server"
+
+    def log_message(self, fmt: str, *args) -> None:  # pragma: no cover - quiet
+        pass
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.owner._lock:
+            self.server.owner.connections += 1
+
+    def _reply(self, status: int, body: Optional[dict] = None, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def do_POST(self) -> None:
+        owner = self.server.owner
+        meta = json.loads(self._body() or b"{}")
+        total = int(self.headers.get("X-Upload-Content-Length") or 0)
+        sid = uuid.uuid4().hex
+        (owner.root / f"{sid}.part").write_bytes(b"")
+        with owner._lock:
+            owner.sessions[sid] = {"meta": meta, "total": total, "offset": 0}
+        host = self.headers.get("Host") or "%s:%d" % self.server.server_address[:2]
+        self._reply(200, headers={"Location": f"http://{host}/upload/{sid}"})
+
+    def do_PUT(self) -> None:
+        owner = self.server.owner
+        sid = self.path.rsplit("/", 1)[-1]
+        session = owner.sessions.get(sid)
+        body = self._body()
+        if session is None:
+            self._reply(404, {"error": "no such session"})
+            return
+        with owner._lock:
+            owner.chunk_requests += 1
+            fail = owner.chunk_requests in owner.fail_chunks
+        content_range = self.headers.get("Content-Range", "")
+        match = _RANGE.fullmatch(content_range)
+        if fail:
+            self._reply(503, {"error": "try again"})
+            return
+        if match:
+            start, end = int(match.group(1)), int(match.group(2))
+            if start != session["offset"] or end - start + 1 != len(body):
+                self._reply(400, {"error": "unexpected range"})
+                return
+            with (owner.root / f"{sid}.part").open("r+b") as fh:
+                fh.seek(start)
+                fh.write(body)
+            session["offset"] = end + 1
+            owner.bytes_received += len(body)
+        if session["offset"] >= session["total"]:
+            part = owner.root / f"{sid}.part"
+            video = {"id": sid, "title": session["meta"].get("title", ""), "size": session["total"]}
+            if part.exists():
+                part.replace(owner.root / f"{sid}.bin")
+            self._reply(200, video)
+            return
+        headers = {"Range": f"bytes=0-{session['offset'] - 1}"} if session["offset"] else {}
+        self._reply(308, headers=headers)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    owner: "UploadServer"
+
+
+class UploadServer:
+    """Threaded resumable-upload server on ``127.0.0.1``."""
+
+    def __init__(self, root: str | Path, fail_chunks: Iterable[int] = ()) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.fail_chunks = set(fail_chunks)
+        self.sessions: Dict[str, dict] = {}
+        self.connections = 0
+        self.chunk_requests = 0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+        self._httpd = _Server(("127.0.0.1", 0), _Handler)
+        self._httpd.owner = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/upload"
+
+    def file(self, video_id: str) -> Path:
+        """Path of a completed upload."""
+        return self.root / f"{video_id}.bin"
+
+    def start(self) -> "UploadServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "UploadServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":  # pragma: no cover - manual testing
+    import sys
+    import time
+
+    with UploadServer(sys.argv[1] if len(sys.argv) > 1 else "uploads") as srv:
+        print(f"resumable upload endpoint: {srv.url}")
+        while True:
+            time.sleep(3600)
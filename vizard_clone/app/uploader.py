@@ -1,9 +1,236 @@
-"""YouTube uploader stub."""
+"""Resumable, chunked video uploader.
+
+:class:`UploadClient` speaks a resumable upload protocol (the one served
+by :mod:`.upload_server`): a session is opened with the video metadata,
+then the file is sent in ``config.UPLOAD_CHUNK`` sized ``PUT`` requests
+straight out of a memory map.  The committed offset of every session is
+persisted under ``TEMP/uploads``, so an interrupted upload continues
+where it stopped on the next attempt (e.g. a scheduler retry) instead of
+starting over.  HTTP connections are kept alive and reused through a
+small pool, and at most ``config.UPLOAD_PER_CHANNEL`` uploads run at the
+same time for one channel.
+
+:func:`upload` uses the client when ``config.UPLOAD_URL`` is set and
+otherwise keeps the old offline stub behaviour.
+"""
 from __future__ import annotations
 
+import http.client
+import json
+import mmap
+import threading
+from collections import defaultdict
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from . import config
+from .cache import file_fingerprint, make_key
+
+
+class UploadError(RuntimeError):
+    """Raised when the server rejects an upload or the transfer fails."""
+
+
+class ConnectionPool:
+    """Idle keep-alive ``http.client`` connections per host."""
+
+    def __init__(self, max_idle: int = 8, timeout: float = 60.0) -> None:
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._idle: Dict[Tuple[str, str, int], List[http.client.HTTPConnection]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def _key(self, url: str) -> Tuple[str, str, int]:
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        return parts.scheme, parts.hostname or "", port
+
+    def request(
+        self, method: str, url: str, body=None, headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, http.client.HTTPMessage, bytes]:
+        """Send one request and return ``(status, headers, body)``.
+
+        The connection goes back to the pool unless the server closed it
+        or the request failed.
+        """
+
+        key = self._key(url)
+        with self._lock:
+            conn = self._idle[key].pop() if self._idle[key] else None
+        if conn is None:
+            cls = http.client.HTTPSConnection if key[0] == "https" else http.client.HTTPConnection
+            conn = cls(key[1], key[2], timeout=self.timeout)
+        parts = urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        try:
+            conn.request(method, path or "/", body=body, headers=headers or {})
+            resp = conn.getresponse()
+            data = resp.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            raise
+        if resp.will_close:
+            conn.close()
+        else:
+            with self._lock:
+                if len(self._idle[key]) < self.max_idle:
+                    self._idle[key].append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+        return resp.status, resp.headers, data
+
+    def close(self) -> None:
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+
+def _committed(headers: http.client.HTTPMessage) -> int:
+    """Offset after a ``308`` reply (``Range: bytes=0-n`` -> ``n + 1``)."""
+
+    value = headers.get("Range")
+    if not value:
+        return 0
+    return int(value.rpartition("-")[2]) + 1
+
+
+class UploadClient:
+    """Resumable upload client, safe to share between threads."""
+
+    def __init__(
+        self,
+        url: str,
+        chunk_size: int = config.UPLOAD_CHUNK,
+        per_channel: int = config.UPLOAD_PER_CHANNEL,
+        state_dir: str | Path | None = None,
+        pool: Optional[ConnectionPool] = None,
+    ) -> None:
+        self.url = url
+        self.chunk_size = chunk_size
+        self.per_channel = per_channel
+        self.state_dir = Path(state_dir or Path(config.TEMP) / "uploads")
+        self.pool = pool or ConnectionPool()
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, channel: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if channel not in self._slots:
+                self._slots[channel] = threading.BoundedSemaphore(self.per_channel)
+            return self._slots[channel]
+
+    def _open_session(self, meta: dict, total: int) -> str:
+        status, headers, data = self.pool.request(
+            "POST",
+            self.url,
+            body=json.dumps(meta).encode(),
+            headers={"Content-Type": "application/json", "X-Upload-Content-Length": str(total)},
+        )
+        location = headers.get("Location")
+        if status != 200 or not location:
+            raise UploadError(f"cannot open upload session: HTTP {status} {data[:200]!r}")
+        return location
+
+    def _status(self, session: str, total: int) -> Tuple[int, Optional[dict]]:
+        """Ask the server how much of ``session`` it has."""
+
+        status, headers, data = self.pool.request(
+            "PUT", session, body=b"", headers={"Content-Range": f"bytes */{total}"}
+        )
+        if status in (200, 201):
+            return total, json.loads(data or b"{}")
+        if status == 308:
+            return _committed(headers), None
+        raise UploadError(f"upload session lost: HTTP {status}")
+
+    def upload(
+        self,
+        path: str | Path,
+        title: str,
+        description: str,
+        tags: list[str],
+        channel: Optional[str] = None,
+    ) -> dict:
+        """Upload ``path`` and return the server's video resource.
+
+        Raises :class:`UploadError` (or ``OSError``) on failure; the
+        committed offset is kept, so calling again resumes the session.
+        """
+
+        path = Path(path)
+        channel = channel or config.CHANNEL_ID or "default"
+        total = path.stat().st_size
+        state = self.state_dir / f"{make_key(file_fingerprint(path), channel)}.json"
+        meta = {"title": title, "description": description, "tags": tags, "channel": channel}
+
+        with self._slot(channel):
+            session = offset = None
+            if state.exists():
+                try:
+                    session = json.loads(state.read_text())["session"]
+                    offset, done = self._status(session, total)
+                except (OSError, ValueError, KeyError, UploadError):
+                    session = None  # stale session: start over
+                else:
+                    if done is not None:
+                        state.unlink(missing_ok=True)
+                        return done
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+            if session is None:
+                session, offset = self._open_session(meta, total), 0
+                # persist at once so a failure on the first chunk still resumes
+                state.write_text(json.dumps({"session": session, "offset": offset}))
+
+            with path.open("rb") as fh:
+                mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) if total else None
+                view = memoryview(mm) if mm is not None else memoryview(b"")
+                try:
+                    while True:
+                        end = min(offset + self.chunk_size, total)
+                        chunk_range = f"bytes {offset}-{end - 1}/{total}" if end > offset else f"bytes */{total}"
+                        chunk = view[offset:end]
+                        try:
+                            status, headers, data = self.pool.request(
+                                "PUT", session, body=chunk, headers={"Content-Range": chunk_range}
+                            )
+                        finally:
+                            # a traceback may outlive this frame; an unreleased
+                            # slice would make mm.close() raise BufferError
+                            chunk.release()
+                        if status in (200, 201):
+                            state.unlink(missing_ok=True)
+                            return json.loads(data or b"{}")
+                        if status != 308:
+                            raise UploadError(f"chunk at {offset} rejected: HTTP {status}")
+                        offset = _committed(headers)
+                        state.write_text(json.dumps({"session": session, "offset": offset}))
+                finally:
+                    view.release()
+                    if mm is not None:
+                        mm.close()
+
+
+_CLIENT: Optional[UploadClient] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client() -> UploadClient:
+    """Return the shared client for ``config.UPLOAD_URL``."""
+
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None or _CLIENT.url != config.UPLOAD_URL:
+            _CLIENT = UploadClient(config.UPLOAD_URL)
+        return _CLIENT
 
 
 def upload(path: str | Path, title: str, description: str, tags: list[str]) -> dict:
-    """Pretend to upload *path* returning a dummy response."""
-    return {"id": "stub", "title": title}
+    """Upload *path*; without ``config.UPLOAD_URL`` return a dummy response."""
+
+    if not config.UPLOAD_URL:
+        return {"id": "stub", "title": title}
+    return get_client().upload(path, title, description, tags)
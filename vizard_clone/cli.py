@@ -2,15 +2,65 @@
 from __future__ import annotations
 
 import argparse
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-from .app import pipeline
+from .app import ffmpeg_utils, pipeline
 
 
-def cmd_process(args: argparse.Namespace) -> None:
-    for video in args.videos:
-        out_dir = Path(args.out_dir or pipeline.config.PROCESSED)
-        pipeline.process_video(video, out_dir)
+def cmd_process(args: argparse.Namespace) -> int:
+    """Process every input video, ``--jobs`` at a time.
+
+    Videos run on a thread pool: the heavy lifting happens in ffmpeg
+    subprocesses, which are additionally capped at ``--jobs`` concurrent
+    processes.  Each job gets its own temporary directory.  Outputs are
+    named after the source stem; stems that occur more than once in the
+    batch get the job index appended so no two jobs write the same files.
+    A failing video is reported on stderr and does not abort the batch.
+    """
+
+    out_dir = Path(args.out_dir or pipeline.config.PROCESSED)
+    jobs = max(1, args.jobs)
+    ffmpeg_utils.set_max_processes(jobs)
+
+    stems = Counter(Path(video).stem for video in args.videos)
+    failures = 0
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {}
+        for idx, video in enumerate(args.videos):
+            stem = Path(video).stem
+            name = stem if stems[stem] == 1 else f"{stem}-{idx:03d}"
+            tmp_dir = out_dir / "tmp" / f"{idx:03d}-{stem}"
+            futures[pool.submit(pipeline.process_video, video, out_dir, tmp_dir, name)] = video
+        for fut in as_completed(futures):
+            video = futures[fut]
+            try:
+                clips = fut.result()
+            except Exception as exc:
+                failures += 1
+                print(f"{video}: failed: {exc}", file=sys.stderr)
+            else:
+                print(f"{video}: {len(clips)} clip(s)")
+    if failures:
+        print(f"{failures} of {len(args.videos)} video(s) failed", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_bench_encode(args: argparse.Namespace) -> int:
+    """Benchmark the configured encoder profiles on a synthetic source."""
+
+    from .app import bench  # imported lazily, only needed for this command
+
+    unknown = [p for p in args.profiles if p not in pipeline.config.ENCODER_PROFILES]
+    if unknown:
+        print(f"unknown encoder profile(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    results = bench.bench_encode(args.profiles or None, duration=args.duration)
+    print(bench.format_results(results))
+    return 0
 
 
 def main(argv: list[str] | None = None) -> int:
@@ -20,12 +70,27 @@ def main(argv: list[str] | None = None) -> int:
     p_process = sub.add_parser("process", help="process input videos")
     p_process.add_argument("videos", nargs="+", help="input video files")
     p_process.add_argument("--out-dir", default=None)
+    p_process.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="videos processed concurrently (also caps running ffmpeg processes)",
+    )
     p_process.set_defaults(func=cmd_process)
 
+    p_bench = sub.add_parser("bench-encode", help="benchmark encoder profiles")
+    p_bench.add_argument(
+        "profiles",
+        nargs="*",
+        help="profiles to run (default: all of %s)" % ", ".join(pipeline.config.ENCODER_PROFILES),
+    )
+    p_bench.add_argument("--duration", type=float, default=10.0, help="seconds of test pattern")
+    p_bench.set_defaults(func=cmd_bench_encode)
+
     args = parser.parse_args(argv)
     if hasattr(args, "func"):
-        args.func(args)
-        return 0
+        return args.func(args) or 0
     parser.print_help()
     return 1
 